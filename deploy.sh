@@ -4,23 +4,18 @@ set -e
 
 pip install -r requirements.txt
 
-echo "🛠️ Initializing database..."
-python -m src.core.database.init_db
-
-# Only run migrations if alembic.ini exists
-if [ -f "alembic.ini" ]; then
-    echo "🔄 Running database migrations..."
-    alembic upgrade head
-else
-    echo "⚠️ No alembic.ini found - skipping migrations"
-fi
+# Creates new tables, runs the Alembic migrations (src/alembic) to head and
+# stamps the schema. The app's packages live in src/, but this runs from the
+# repo root so config still loads the root .env
+echo "🛠️ Initializing database and running migrations..."
+PYTHONPATH=src python -m core.database.init_db
 
 # Seed the database (only if SEED_DB=true)
 if [ "$SEED_DB" = "true" ]; then
     echo "🏗️ Starting database seeding..."
-    python <<EOF
+    PYTHONPATH=src python <<EOF
 import asyncio
-from src.core.database.seeddb import main
+from core.database.seeddb import main
 
 async def run_seeding():
     await main()
@@ -1,30 +1,29 @@
 from logging.config import fileConfig
-from sqlalchemy import create_engine
+from sqlalchemy import pool
 from sqlalchemy.ext.asyncio import create_async_engine
 from alembic import context
 import sys
 import os
 
-# Add your project directory to the Python path
-sys.path.append(os.getcwd())
+# Make `core` and `apps` importable whatever the working directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import your SQLAlchemy Base and models
-from core.database import Base
+from core.database import Base, session_manager
 from core.config import settings
 from apps.requotes.models import *  # Import all your models
-from apps.requotes.models import *  # Import all your models
 
 # This is the Alembic Config object, which provides access to the values within the .ini file.
 config = context.config
 
-# Interpret the config file for Python logging.
-if config.config_file_name is not None:
+# Interpret the config file for Python logging (not when the app runs the
+# migrations, see core.database.migrations: that would reset its loggers)
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
     fileConfig(config.config_file_name)
 
 # Set the target metadata
 target_metadata = Base.metadata
 
-# Define the database URL
 
 def run_migrations_offline():
     """Run migrations in 'offline' mode."""
@@ -33,27 +32,53 @@ def run_migrations_offline():
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
     )
 
     with context.begin_transaction():
         context.run_migrations()
 
+
+def do_run_migrations(connection):
+    """
+    Run the migrations on a (sync) connection. One transaction per revision
+    lets a revision step out of it with `autocommit_block()`, which
+    CREATE INDEX CONCURRENTLY needs.
+    """
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        transaction_per_migration=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
 async def run_migrations_online():
     """Run migrations in 'online' mode."""
-    connectable = create_async_engine(settings.APOSTGRES_DATABASE_URL)
+    db_url = session_manager._ensure_ssl(settings.APOSTGRES_DATABASE_URL)
+    connectable = create_async_engine(
+        db_url,
+        poolclass=pool.NullPool,
+        connect_args={
+            "ssl": "require" if "render.com" in db_url else None,
+            "prepared_statement_cache_size": settings.db_statement_cache_size
+        }
+    )
 
-    async with connectable.connect() as connection:
-        await connection.run_sync(
-            lambda sync_conn: context.configure(
-                connection=sync_conn, target_metadata=target_metadata
-            )
-        )
+    try:
+        async with connectable.connect() as connection:
+            await connection.run_sync(do_run_migrations)
+    finally:
+        await connectable.dispose()
 
-        async with connection.begin():
-            await connection.run_sync(context.run_migrations)
 
 if context.is_offline_mode():
     run_migrations_offline()
+elif config.attributes.get("connection") is not None:
+    # Called with a connection from a running engine (see core.database.migrations)
+    do_run_migrations(config.attributes["connection"])
 else:
     import asyncio
-    asyncio.run(run_migrations_online())
\ No newline at end of file
+    asyncio.run(run_migrations_online())
@@ -0,0 +1,47 @@
+"""admin_stats snapshot and admin_daily_stats series
+
+Revision ID: 2f7e9b1c5a44
+Revises: 8c3d2a6f4b10
+Create Date: 2026-10-19 12:20:05.871903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f7e9b1c5a44'
+down_revision: Union[str, None] = '8c3d2a6f4b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: init_db's create_all already builds them on fresh databases
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS admin_stats (
+            id INTEGER NOT NULL PRIMARY KEY,
+            total_users INTEGER NOT NULL,
+            users_with_ratings INTEGER NOT NULL,
+            supporters_count INTEGER NOT NULL,
+            total_verses_caught INTEGER NOT NULL,
+            refreshed_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+            CONSTRAINT ck_admin_stats_single_row CHECK (id = 1)
+        )
+    """)
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS admin_daily_stats (
+            day DATE NOT NULL PRIMARY KEY,
+            active_users INTEGER NOT NULL,
+            verses_caught INTEGER NOT NULL,
+            donations_count INTEGER NOT NULL,
+            donations_amount NUMERIC(12, 2) NOT NULL,
+            refreshed_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now()
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS admin_daily_stats")
+    op.execute("DROP TABLE IF EXISTS admin_stats")
@@ -0,0 +1,26 @@
+"""claimed_until on payments for the reconciler
+
+Revision ID: 3a9f6c2e8d15
+Revises: 7e2a9d4c1f60
+Create Date: 2026-10-19 19:12:48.306154
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3a9f6c2e8d15'
+down_revision: Union[str, None] = '7e2a9d4c1f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: init_db's create_all already builds it on fresh databases
+    op.execute("ALTER TABLE payments ADD COLUMN IF NOT EXISTS claimed_until TIMESTAMP WITHOUT TIME ZONE")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE payments DROP COLUMN IF EXISTS claimed_until")
@@ -0,0 +1,37 @@
+"""unique (user_id, theme_id) on user_themes
+
+Revision ID: 5b1f0c9d2e7a
+Revises: 
+Create Date: 2026-10-19 09:12:41.118532
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1f0c9d2e7a'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep a single row per (user, theme), preferring an unlocked one
+    op.execute("""
+        DELETE FROM user_themes ut
+        USING user_themes other
+        WHERE ut.user_id = other.user_id
+          AND ut.theme_id = other.theme_id
+          AND (COALESCE(ut.unlocked, false), ut.id) < (COALESCE(other.unlocked, false), other.id)
+    """)
+    # IF NOT EXISTS: init_db's create_all already builds it on fresh databases
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_user_themes_user_theme
+        ON user_themes (user_id, theme_id)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uq_user_themes_user_theme")
@@ -0,0 +1,37 @@
+"""unique (user_id, tag) on achievements
+
+Revision ID: 7e2a9d4c1f60
+Revises: d41a7e3c9f28
+Create Date: 2026-10-19 16:41:05.220917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2a9d4c1f60'
+down_revision: Union[str, None] = 'd41a7e3c9f28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the first award of each achievement
+    op.execute("""
+        DELETE FROM achievements a
+        USING achievements other
+        WHERE a.user_id = other.user_id
+          AND a.tag = other.tag
+          AND (COALESCE(a.achieved_at, 'infinity'), a.id) > (COALESCE(other.achieved_at, 'infinity'), other.id)
+    """)
+    # IF NOT EXISTS: init_db's create_all already builds it on fresh databases
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_achievements_user_tag
+        ON achievements (user_id, tag)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS uq_achievements_user_tag")
@@ -0,0 +1,40 @@
+"""payment_events webhook inbox
+
+Revision ID: 8c3d2a6f4b10
+Revises: 5b1f0c9d2e7a
+Create Date: 2026-10-19 11:03:27.524310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c3d2a6f4b10'
+down_revision: Union[str, None] = '5b1f0c9d2e7a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: init_db's create_all already builds them on fresh databases
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS payment_events (
+            id VARCHAR NOT NULL PRIMARY KEY,
+            event_type VARCHAR NOT NULL,
+            reference VARCHAR,
+            payload TEXT NOT NULL,
+            received_at TIMESTAMP WITHOUT TIME ZONE DEFAULT now(),
+            processed_at TIMESTAMP WITHOUT TIME ZONE
+        )
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_payment_events_unprocessed
+        ON payment_events (received_at)
+        WHERE processed_at IS NULL
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS payment_events")
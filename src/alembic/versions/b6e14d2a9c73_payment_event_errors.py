@@ -0,0 +1,26 @@
+"""error on payment_events for skipped malformed events
+
+Revision ID: b6e14d2a9c73
+Revises: 3a9f6c2e8d15
+Create Date: 2026-10-19 19:47:31.815472
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e14d2a9c73'
+down_revision: Union[str, None] = '3a9f6c2e8d15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # IF NOT EXISTS: init_db's create_all already builds it on fresh databases
+    op.execute("ALTER TABLE payment_events ADD COLUMN IF NOT EXISTS error TEXT")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE payment_events DROP COLUMN IF EXISTS error")
@@ -0,0 +1,39 @@
+"""indexes for user_activities hot queries
+
+Revision ID: d41a7e3c9f28
+Revises: 2f7e9b1c5a44
+Create Date: 2026-10-19 13:02:48.305617
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd41a7e3c9f28'
+down_revision: Union[str, None] = '2f7e9b1c5a44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps user_activities writable while the indexes build; it
+    # cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_activities_user_type_date
+            ON user_activities (user_id, activity_type, activity_date DESC)
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_activities_verse_caught
+            ON user_activities (user_id, activity_date DESC)
+            INCLUDE (activity_data)
+            WHERE activity_type = 'verse_caught'
+        """)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_user_activities_verse_caught")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_user_activities_user_type_date")
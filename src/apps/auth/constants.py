@@ -9,9 +9,61 @@ inspirational_verses = [
     {"book": "Joshua", "chapter": 1, "verse": 9, "text": "Have I not commanded you? Be strong and courageous. Do not be afraid; do not be discouraged, for the Lord your God will be with you wherever you go."},
     {"book": "2 Timothy", "chapter": 1, "verse": 7, "text": "For the Spirit God gave us does not make us timid, but gives us power, love and self-discipline."},
     {"book": "John", "chapter": 16, "verse": 33, "text": "I have told you these things, so that in me you may have peace. In this world you will have trouble. But take heart! I have overcome the world."},
-    {"book": "Psalm", "chapter": 46, "verse": 1, "text": "God is our refuge and strength, an ever-present help in trouble."},
+    {"book": "Psalms", "chapter": 46, "verse": 1, "text": "God is our refuge and strength, an ever-present help in trouble."},
     {"book": "Isaiah", "chapter": 41, "verse": 10, "text": "So do not fear, for I am with you; do not be dismayed, for I am your God. I will strengthen you and help you; I will uphold you with my righteous right hand."},
     {"book": "Hebrews", "chapter": 11, "verse": 1, "text": "Now faith is confidence in what we hope for and assurance about what we do not see."},
     {"book": "1 Peter", "chapter": 5, "verse": 7, "text": "Cast all your anxiety on him because he cares for you."},
     {"book": "Deuteronomy", "chapter": 31, "verse": 6, "text": "Be strong and courageous. Do not be afraid or terrified because of them, for the Lord your God goes with you; he will never leave you nor forsake you."},
 ]
+
+# Curated pool of references resolved against the verse store at startup.
+# Order matters: every worker must build the same pool for the rotation to agree.
+inspirational_references = [
+    ("Psalms", 23, 1),
+    ("Proverbs", 3, 5),
+    ("Isaiah", 40, 31),
+    ("Philippians", 4, 13),
+    ("Jeremiah", 29, 11),
+    ("Romans", 8, 28),
+    ("Matthew", 11, 28),
+    ("Joshua", 1, 9),
+    ("2 Timothy", 1, 7),
+    ("John", 16, 33),
+    ("Psalms", 46, 1),
+    ("Isaiah", 41, 10),
+    ("Hebrews", 11, 1),
+    ("1 Peter", 5, 7),
+    ("Deuteronomy", 31, 6),
+    ("Psalms", 27, 1),
+    ("Psalms", 34, 18),
+    ("Psalms", 37, 4),
+    ("Psalms", 55, 22),
+    ("Psalms", 91, 1),
+    ("Psalms", 118, 24),
+    ("Psalms", 121, 1),
+    ("Psalms", 139, 14),
+    ("Proverbs", 16, 3),
+    ("Proverbs", 18, 10),
+    ("Isaiah", 26, 3),
+    ("Isaiah", 43, 2),
+    ("Lamentations", 3, 22),
+    ("Lamentations", 3, 23),
+    ("Zephaniah", 3, 17),
+    ("Matthew", 5, 14),
+    ("Matthew", 6, 33),
+    ("Matthew", 6, 34),
+    ("John", 3, 16),
+    ("John", 14, 27),
+    ("Romans", 12, 12),
+    ("Romans", 15, 13),
+    ("2 Corinthians", 5, 7),
+    ("2 Corinthians", 12, 9),
+    ("Galatians", 6, 9),
+    ("Ephesians", 2, 10),
+    ("Philippians", 4, 6),
+    ("Philippians", 4, 7),
+    ("Colossians", 3, 23),
+    ("Hebrews", 13, 5),
+    ("James", 1, 5),
+    ("1 John", 4, 18),
+]
@@ -0,0 +1,101 @@
+"""
+Shared authentication dependencies.
+
+Every authenticated endpoint resolves the bearer token through `get_token_email`
+(claims only) or `get_current_user` (claims + user row) instead of decoding the
+JWT and querying the user itself.
+"""
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from cachetools import TLRUCache
+from fastapi import Depends, HTTPException
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import aget_db
+from apps.requotes.models import User
+
+# OAuth2 scheme for token authentication
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+
+# Tokens without an "exp" claim are only trusted for this long before re-verifying
+_NO_EXP_TTL_SECONDS = 300
+
+
+def _claims_expiry(token: str, claims: Dict[str, Any], now: float) -> float:
+    """Keep verified claims until the token itself expires."""
+    exp = claims.get("exp")
+    if exp is None:
+        return now + _NO_EXP_TTL_SECONDS
+    return float(exp)
+
+
+_claims_cache: TLRUCache = TLRUCache(
+    maxsize=settings.JWT_CACHE_MAXSIZE,
+    ttu=_claims_expiry,
+    timer=time.time,
+)
+# cachetools caches are not thread-safe; decode_token may run in threadpool workers
+_claims_cache_lock = threading.Lock()
+
+
+def decode_token(token: str) -> Dict[str, Any]:
+    """
+    Verify a JWT and return its claims.
+
+    Verified claims are cached per token until `exp`, so repeated requests with the
+    same token skip signature verification. Raises `JWTError` for invalid tokens.
+    """
+    with _claims_cache_lock:
+        claims = _claims_cache.get(token)
+    if claims is None:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        with _claims_cache_lock:
+            _claims_cache[token] = claims
+    return claims
+
+
+async def get_token_email(token: str = Depends(oauth2_scheme)) -> str:
+    """
+    FastAPI dependency returning the email (`sub`) of a valid bearer token.
+
+    Async so it runs on the event loop rather than in the threadpool: a cache
+    hit is a dict lookup, not worth a thread hop.
+    """
+    try:
+        email = decode_token(token).get("sub")
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    if not email:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return email
+
+
+async def load_user(db: AsyncSession, email: str) -> Optional[User]:
+    """
+    Load a user by email, memoized on the session.
+
+    Sessions are request scoped, so this is a per-request identity cache: however
+    many dependencies ask for the user, the row is fetched at most once.
+    """
+    identities = db.info.setdefault("users_by_email", {})
+    if email not in identities:
+        result = await db.execute(select(User).where(User.email == email))
+        identities[email] = result.scalar_one_or_none()
+    return identities[email]
+
+
+async def get_current_user(
+    email: str = Depends(get_token_email),
+    db: AsyncSession = Depends(aget_db),
+) -> User:
+    """FastAPI dependency returning the authenticated user."""
+    user = await load_user(db, email)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
@@ -0,0 +1,106 @@
+"""
+Transactional email templates compiled once and rendered on demand.
+"""
+import os
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "templates",
+)
+
+
+@dataclass(frozen=True)
+class EmailTemplate:
+    """A transactional email made of a subject, an HTML body and a plain text body."""
+    name: str
+    subject: str
+    html: str
+    text: str
+
+
+@dataclass(frozen=True)
+class RenderedEmail:
+    subject: str
+    html_content: str
+    plain_text_content: str
+
+
+class EmailTemplateRegistry:
+    """
+    Registry of transactional emails.
+
+    Templates are compiled by Jinja2 when `load()` is called (at startup) and the
+    compiled objects are kept, so sending an email is only a render call.
+    """
+
+    def __init__(self, directory: str = TEMPLATES_DIR):
+        self.env = Environment(
+            loader=FileSystemLoader(directory),
+            autoescape=select_autoescape(enabled_extensions=("html",), default_for_string=False),
+            auto_reload=False,
+        )
+        self._definitions: Dict[str, EmailTemplate] = {}
+        self._compiled: Dict[str, tuple[Template, Template]] = {}
+
+    def register(self, name: str, subject: str, html: str, text: str) -> None:
+        """Declare an email; it is compiled on the next `load()` or first use."""
+        self._definitions[name] = EmailTemplate(name=name, subject=subject, html=html, text=text)
+        self._compiled.pop(name, None)
+
+    def load(self) -> None:
+        """Compile every registered template (call at startup)."""
+        for name in self._definitions:
+            self._compile(name)
+        logger.info(f"Compiled {len(self._compiled)} email templates")
+
+    def _compile(self, name: str) -> tuple[Template, Template]:
+        compiled = self._compiled.get(name)
+        if compiled is None:
+            definition = self._definitions.get(name)
+            if definition is None:
+                raise KeyError(f"Unknown email template: {name}")
+            compiled = (
+                self.env.get_template(definition.html),
+                self.env.get_template(definition.text),
+            )
+            self._compiled[name] = compiled
+        return compiled
+
+    def render(self, name: str, context: Optional[Dict[str, Any]] = None) -> RenderedEmail:
+        """Render a single email."""
+        html_template, text_template = self._compile(name)
+        context = context or {}
+        return RenderedEmail(
+            subject=self._definitions[name].subject,
+            html_content=html_template.render(context),
+            plain_text_content=text_template.render(context),
+        )
+
+    def render_batch(self, name: str, contexts: Iterable[Dict[str, Any]]) -> List[RenderedEmail]:
+        """Render the same email for many recipients (e.g. when draining an outbox)."""
+        html_template, text_template = self._compile(name)
+        subject = self._definitions[name].subject
+        return [
+            RenderedEmail(
+                subject=subject,
+                html_content=html_template.render(context),
+                plain_text_content=text_template.render(context),
+            )
+            for context in contexts
+        ]
+
+
+email_templates = EmailTemplateRegistry()
+email_templates.register(
+    "verify_email",
+    subject="Verify Your VerseCatch Account",
+    html="emails/verify_email.html",
+    text="emails/verify_email.txt",
+)
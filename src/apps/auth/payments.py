@@ -0,0 +1,315 @@
+"""
+Payment settlement and background reconciliation.
+
+Pending payments are settled off the request path: `PaymentReconciler` claims a
+batch of pending payments, verifies them against Paystack concurrently with no
+transaction open and applies the results in one short transaction.
+`/api/verify-payment` can then answer from the local status.
+
+Every writer locks the payment row and re-checks that it is still pending before
+applying a transaction, and achievements are unique per (user, tag), so workers,
+webhooks and clients can settle the same payment concurrently.
+
+Paystack webhooks are only verified and appended to the `payment_events` inbox by
+the request handler; `PaymentEventConsumer` applies them in batches.
+"""
+import asyncio
+import json
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import func, literal, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import session_manager
+from core.workers import PeriodicWorker
+from apps.requotes.models import Achievement, Payment, PaymentEvent, User
+from .paystack import paystack_client
+
+logger = logging.getLogger(__name__)
+
+# Paystack transaction statuses that will not change anymore
+FINAL_STATUSES = {"success", "failed", "abandoned", "reversed"}
+
+SUPPORTER_ACHIEVEMENT = ("VerseCatch Supporter", "Supporter", "Donated at least 5 USD equivalent")
+
+
+def is_supporter_payment(payment: Payment) -> bool:
+    """Successful donations of at least 5 USD equivalent make the user a supporter."""
+    metadata = payment.payment_metadata or {}
+    return payment.status == "success" and metadata.get("original_usd_amount", 0) >= 5
+
+
+def apply_transaction(payment: Payment, transaction_data: Dict[str, Any]) -> None:
+    """Copy a verified Paystack transaction onto the payment row."""
+    payment.status = transaction_data["status"]
+    payment.payment_method = transaction_data.get("channel")
+    payment.completed_at = datetime.now()
+
+    # Reassign rather than mutate: JSONEncodedDict does not track in-place changes
+    if isinstance(transaction_data.get("metadata"), dict):
+        payment.payment_metadata = {**(payment.payment_metadata or {}), **transaction_data["metadata"]}
+
+
+async def mark_supporters(session: AsyncSession, user_ids: Iterable) -> None:
+    """Flag users as supporters and award the Supporter achievement, in two statements."""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return
+
+    name, tag, requirement = SUPPORTER_ACHIEVEMENT
+    await session.execute(
+        update(User).where(User.id.in_(user_ids)).values(is_supporter=True)
+    )
+    await session.execute(
+        pg_insert(Achievement)
+        .from_select(
+            ["user_id", "name", "tag", "requirement"],
+            select(User.id, literal(name), literal(tag), literal(requirement))
+            .where(User.id.in_(user_ids))
+        )
+        .on_conflict_do_nothing(index_elements=[Achievement.user_id, Achievement.tag])
+    )
+
+
+async def settle_payments(session: AsyncSession, transactions: Dict[str, Dict[str, Any]]) -> List[Payment]:
+    """
+    Apply verified transactions, keyed by reference, to the payments still pending.
+    Returns the settled payments.
+
+    Waits for any writer holding one of the rows; the status is re-checked once
+    locked, so a payment settled meanwhile is left alone. A fixed lock order avoids
+    deadlocks between batches sharing references.
+    """
+    if not transactions:
+        return []
+
+    result = await session.execute(
+        select(Payment)
+        .where(Payment.paystack_reference.in_(transactions))
+        .where(Payment.status == "pending")
+        .order_by(Payment.id)
+        .with_for_update()
+    )
+    payments: List[Payment] = result.scalars().all()
+    for payment in payments:
+        apply_transaction(payment, transactions[payment.paystack_reference])
+    await mark_supporters(
+        session, (payment.user_id for payment in payments if is_supporter_payment(payment))
+    )
+    return payments
+
+
+async def fetch_transaction(reference: str) -> Optional[Dict[str, Any]]:
+    """Paystack transaction data for a reference, or None if it could not be verified."""
+    status_code, response_data = await paystack_client.verify_transaction(reference)
+    if status_code != 200 or not response_data.get("status"):
+        return None
+    return response_data["data"]
+
+
+class PaymentReconciler(PeriodicWorker):
+    """
+    Background worker settling pending payments.
+
+    Runs every PAYMENT_RECONCILE_INTERVAL seconds (or sooner when nudged) over
+    pending payments older than PAYMENT_RECONCILE_MIN_AGE seconds, or nudged by
+    reference. Payments that are still pending after PAYMENT_RECONCILE_MAX_AGE are
+    left alone.
+    """
+
+    name = "Payment reconciliation"
+
+    def __init__(self):
+        super().__init__()
+        self._nudged: Set[str] = set()
+
+    @property
+    def interval(self) -> int:
+        return settings.PAYMENT_RECONCILE_INTERVAL
+
+    def nudge(self, reference: Optional[str] = None) -> None:
+        """Run the next pass now, including `reference` however recent the payment is."""
+        if reference:
+            self._nudged.add(reference)
+        super().nudge()
+
+    async def run_once(self) -> int:
+        return await self.reconcile_once()
+
+    async def claim(self, nudged: Set[str]) -> List[str]:
+        """
+        Claim a batch of pending payments for PAYMENT_RECONCILE_LEASE seconds and
+        return their references, nudged ones first.
+
+        The claim is committed straight away: concurrent reconcilers skip claimed
+        payments, and no row stays locked while Paystack is called.
+        """
+        due = Payment.created_at <= func.now() - timedelta(seconds=settings.PAYMENT_RECONCILE_MIN_AGE)
+        order_by = [Payment.created_at]
+        if nudged:
+            is_nudged = Payment.paystack_reference.in_(nudged)
+            due = or_(due, is_nudged)
+            order_by.insert(0, is_nudged.desc())
+        claimable = (
+            select(Payment.id)
+            .where(Payment.status == "pending")
+            .where(due)
+            .where(Payment.created_at >= func.now() - timedelta(seconds=settings.PAYMENT_RECONCILE_MAX_AGE))
+            .where(or_(Payment.claimed_until.is_(None), Payment.claimed_until < func.now()))
+            .order_by(*order_by)
+            .limit(settings.PAYMENT_RECONCILE_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        async with session_manager.get_session() as session:
+            result = await session.execute(
+                update(Payment)
+                .where(Payment.id.in_(claimable.scalar_subquery()))
+                .values(claimed_until=func.now() + timedelta(seconds=settings.PAYMENT_RECONCILE_LEASE))
+                .returning(Payment.paystack_reference)
+                .execution_options(synchronize_session=False)
+            )
+            return result.scalars().all()
+
+    async def reconcile_once(self) -> int:
+        """
+        Verify one batch of pending payments. Returns how many were settled.
+
+        Paystack is called with no transaction open, so its latency never holds a
+        pooled connection or a row lock that `/api/verify-payment` or the webhook
+        consumer would wait for. Results are then applied in a short transaction
+        to the payments that are still pending.
+        """
+        nudged, self._nudged = self._nudged, set()
+        references = await self.claim(nudged)
+        if not references:
+            return 0
+
+        semaphore = asyncio.Semaphore(settings.PAYMENT_RECONCILE_CONCURRENCY)
+
+        async def verify(reference: str) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                try:
+                    return await fetch_transaction(reference)
+                except Exception as e:
+                    logger.warning(f"Could not verify payment {reference}: {str(e)}")
+                    return None
+
+        results = await asyncio.gather(*(verify(reference) for reference in references))
+
+        # Still pending at Paystack: retried once the claim expires
+        transactions = {
+            reference: data
+            for reference, data in zip(references, results)
+            if data and data.get("status") in FINAL_STATUSES
+        }
+        if not transactions:
+            return 0
+        async with session_manager.get_session() as session:
+            payments = await settle_payments(session, transactions)
+        return len(payments)
+
+
+def webhook_event_id(event: Dict[str, Any], payload: bytes) -> str:
+    """
+    Stable id for a webhook delivery.
+
+    Paystack retries resend the same event for the same transaction, so
+    "<event>:<transaction id>" deduplicates them; bodies without a transaction id
+    fall back to a hash of the payload.
+    """
+    data = event.get("data") or {}
+    if data.get("id") is not None:
+        return f"{event.get('event')}:{data['id']}"
+    return f"{event.get('event')}:sha256:{hashlib.sha256(payload).hexdigest()}"
+
+
+async def record_webhook_event(session: AsyncSession, event: Dict[str, Any], payload: bytes) -> bool:
+    """Append a verified webhook event to the inbox. Returns False for a duplicate delivery."""
+    result = await session.execute(
+        pg_insert(PaymentEvent)
+        .values(
+            id=webhook_event_id(event, payload),
+            event_type=event.get("event", ""),
+            reference=(event.get("data") or {}).get("reference"),
+            payload=payload.decode("utf-8"),
+        )
+        .on_conflict_do_nothing(index_elements=[PaymentEvent.id])
+    )
+    return result.rowcount > 0
+
+
+def parse_charge(payload: str) -> Dict[str, Any]:
+    """Transaction data of a `charge.success` event, or ValueError if it cannot be applied."""
+    event = json.loads(payload)
+    data = event.get("data") if isinstance(event, dict) else None
+    if not isinstance(data, dict):
+        raise ValueError("event has no transaction data")
+    if data.get("status") not in FINAL_STATUSES:
+        raise ValueError(f"unexpected transaction status {data.get('status')!r}")
+    return data
+
+
+class PaymentEventConsumer(PeriodicWorker):
+    """
+    Applies inbox events in batches.
+
+    Rows are claimed with `FOR UPDATE SKIP LOCKED`, so several workers can consume
+    the inbox concurrently without applying an event twice.
+    """
+
+    name = "Payment event consumer"
+
+    @property
+    def interval(self) -> int:
+        return settings.PAYMENT_EVENT_POLL_INTERVAL
+
+    async def run_once(self) -> int:
+        processed = 0
+        while True:
+            batch = await self.consume_batch()
+            processed += batch
+            if batch < settings.PAYMENT_EVENT_BATCH_SIZE:
+                return processed
+
+    async def consume_batch(self) -> int:
+        """Apply one batch of unprocessed events. Returns how many were consumed."""
+        async with session_manager.get_session() as session:
+            result = await session.execute(
+                select(PaymentEvent)
+                .where(PaymentEvent.processed_at.is_(None))
+                .order_by(PaymentEvent.received_at)
+                .limit(settings.PAYMENT_EVENT_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )
+            events: List[PaymentEvent] = result.scalars().all()
+            if not events:
+                return 0
+
+            # One transaction per reference, whatever the number of deliveries. A
+            # malformed event is recorded as processed with its error instead of
+            # failing the batch, which would claim it again on every pass
+            charges: Dict[str, Dict[str, Any]] = {}
+            for event in events:
+                if event.event_type != "charge.success" or not event.reference:
+                    continue
+                try:
+                    charges[event.reference] = parse_charge(event.payload)
+                except ValueError as e:
+                    logger.warning(f"Skipping malformed payment event {event.id}: {str(e)}")
+                    event.error = str(e)
+
+            await settle_payments(session, charges)
+
+            now = datetime.now()
+            for event in events:
+                event.processed_at = now
+        return len(events)
+
+
+payment_reconciler = PaymentReconciler()
+payment_event_consumer = PaymentEventConsumer()
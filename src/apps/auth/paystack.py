@@ -0,0 +1,80 @@
+"""
+Application-scoped Paystack API client.
+
+One pooled `httpx.AsyncClient` is opened in the app lifespan and reused by every
+request, so Paystack calls skip the TCP/TLS handshake after the first one.
+"""
+import asyncio
+import random
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class PaystackClient:
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self) -> None:
+        """Open the pooled client (called from the app lifespan)."""
+        if self._client is not None:
+            return
+        if not HTTP2_AVAILABLE:
+            logger.warning("h2 is not installed; Paystack client falls back to HTTP/1.1")
+        limits = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+        self._client = httpx.AsyncClient(
+            base_url=settings.PAYSTACK_BASE_URL,
+            headers={"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"},
+            timeout=httpx.Timeout(settings.PAYSTACK_TIMEOUT, connect=5.0),
+            # Transport-level retries cover connection failures only
+            transport=httpx.AsyncHTTPTransport(http2=HTTP2_AVAILABLE, limits=limits, retries=1),
+        )
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get(self, path: str) -> httpx.Response:
+        """GET with jittered exponential backoff on timeouts, 429 and 5xx."""
+        if self._client is None:
+            await self.start()
+
+        attempt = 0
+        while True:
+            try:
+                response = await self._client.get(path)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= settings.PAYSTACK_MAX_RETRIES:
+                    return response
+            except httpx.TransportError:
+                if attempt >= settings.PAYSTACK_MAX_RETRIES:
+                    raise
+            attempt += 1
+            await asyncio.sleep(random.uniform(0, 0.25 * 2 ** attempt))
+
+    async def verify_transaction(self, reference: str) -> Tuple[int, Dict[str, Any]]:
+        """
+        Call `/transaction/verify/{reference}`.
+
+        Returns:
+            (HTTP status code, decoded JSON body)
+        """
+        response = await self._get(f"/transaction/verify/{reference}")
+        return response.status_code, response.json()
+
+
+paystack_client = PaystackClient()
@@ -1,31 +1,33 @@
 import asyncio
-import random
 import json
-import httpx
+import random
 from jose import JWTError, jwt
 from core.config import settings
-from core.database import aget_db
-from sqlalchemy.orm import selectinload
+from core.database import aget_db, session_manager
+from typing import Optional
 from datetime import datetime, timedelta
 from core.security import verify_api_key
-from . constants import inspirational_verses
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi.security import OAuth2PasswordBearer
 from fastapi import WebSocket, WebSocketDisconnect
-from fastapi.responses import RedirectResponse, HTMLResponse
-from sqlalchemy import select, func, distinct, delete
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from apps.requotes.models import User, UserActivity,Achievement, UnverifiedUser, UserTheme, Theme, Payment, Rating, VerseCapture
+from fastapi.responses import RedirectResponse, HTMLResponse, Response, StreamingResponse
+from sqlalchemy import select, func, distinct, delete, text, bindparam, Boolean, String, true, tuple_, or_
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+from uuid import UUID as PyUUID
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from apps.requotes.models import RATING_DESCRIPTIONS, User, UserActivity,Achievement, UnverifiedUser, UserTheme, Payment, Rating, StatsSnapshot, DailyStats
 from apps.auth.schemas import UserCreate, LoginRequest, Token, EmailCheckRequest, EmailCheckResponse, SignupResponse, DeleteAccountRequest
 from apps.auth.utils import get_password_hash, verify_password, create_access_token, create_verification_token, send_verification_email, verify_paystack_signature
+from apps.auth.dependencies import oauth2_scheme, decode_token, load_user, get_current_user, get_token_email
+from apps.auth.themes import theme_catalog
+from apps.auth.verses import verse_pool, period_for, TIER_PERIOD_MINUTES
+from apps.auth.paystack import paystack_client
+from apps.auth.stats import refresh_snapshot
+from apps.auth.payments import FINAL_STATUSES, apply_transaction, is_supporter_payment, mark_supporters, payment_reconciler, payment_event_consumer, record_webhook_event
 from starlette.templating import Jinja2Templates
 
 router = APIRouter()
 templates = Jinja2Templates(directory="src/templates")
 
-# OAuth2 scheme for token authentication
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
-
 async def cleanup_unverified_users(db: AsyncSession):
     """
     Delete unverified users older than 24 hours.
@@ -313,19 +315,109 @@ async def check_email(request: EmailCheckRequest, db: AsyncSession = Depends(age
 
 async def award_achievement(session, user, name, tag, requirement):
     """Check if a user qualifies for an achievement and award it if not already given."""
-    existing_achievement = await session.execute(
-        select(Achievement).where(Achievement.user_id == user.id, Achievement.tag == tag)
+    result = await session.execute(
+        pg_insert(Achievement)
+        .values(user_id=user.id, name=name, tag=tag, requirement=requirement)
+        .on_conflict_do_nothing(index_elements=[Achievement.user_id, Achievement.tag])
     )
-    if not existing_achievement.scalar_one_or_none():
-        new_achievement = Achievement(user_id=user.id, name=name, tag=tag, requirement=requirement)
-        session.add(new_achievement)
+    if result.rowcount:
         await session.commit()
 
 
+async def load_user_details(db: AsyncSession, db_user: User):
+    """
+    Load achievements, payment status and catch counts for the /ws/auth/me payload.
+    Also refreshes the user's current tag from their most recent achievement.
+    """
+    achievements_result = await db.execute(
+        select(Achievement).where(Achievement.user_id == db_user.id)
+    )
+    achievements = achievements_result.scalars().all()
+
+    # Get user's payment status
+    payments_result = await db.execute(
+        select(Payment)
+        .where(Payment.user_id == db_user.id)
+        .order_by(Payment.completed_at.desc())
+    )
+    payments = payments_result.scalars().all()
+
+    # Determine payment status
+    has_paid = len(payments) > 0
+    last_payment = payments[0] if has_paid else None
+    payment_status = {
+        "has_paid": has_paid,
+        "last_payment_date": last_payment.created_at.isoformat() if last_payment else None,
+        "last_payment_amount": float(last_payment.amount) if last_payment else None,
+        "last_payment_currency": last_payment.currency if last_payment else None,
+        "is_supporter": db_user.is_supporter,
+        "total_payments": len(payments),
+        "total_donated": float(sum(p.amount for p in payments)) if payments else 0
+    }
+
+    # Sort achievements by achieved_at to get the most recent one
+    if achievements:
+        most_recent_achievement = max(achievements, key=lambda a: a.achieved_at)
+        db_user.current_tag = most_recent_achievement.tag
+        await db.commit()
+
+    total_verses_caught = await db.scalar(
+        select(func.count()).where(
+            UserActivity.user_id == db_user.id,
+            UserActivity.activity_type == "verse_caught"
+        )
+    )
+
+    unique_books_caught = await db.scalar(
+        select(func.count(distinct(UserActivity.activity_data))).where(
+            UserActivity.user_id == db_user.id,
+            UserActivity.activity_type == "verse_caught"
+        )
+    )
+
+    return achievements, payment_status, total_verses_caught, unique_books_caught
+
+
+def user_details_message(db_user: User, achievements, payment_status, total_verses_caught, unique_books_caught, logged_in_today):
+    """Build the JSON message sent on /ws/auth/me."""
+    return {
+        "id": str(db_user.id),
+        "user_name": db_user.user_name,
+        "email": db_user.email,
+        "is_active": db_user.is_active,
+        "verified": db_user.verified,
+        "streak": db_user.streak,
+        "faith_coins": db_user.faith_coins,
+        "current_tag": db_user.current_tag,
+        "bible_version": db_user.bible_version,
+        "created_at": db_user.created_at.isoformat(),
+        "logged_in_today": logged_in_today,
+        "total_verses_caught": total_verses_caught,
+        "unique_books_caught": unique_books_caught,
+        "has_taken_tour": db_user.has_taken_tour,
+        "payment_status": payment_status,
+        "has_rated": db_user.has_rated,
+        "achievements": [
+            {
+                "id": str(achievement.id),
+                "name": achievement.name,
+                "tag": achievement.tag,
+                "requirement": achievement.requirement,
+                "achieved_at": achievement.achieved_at.isoformat(),
+            }
+            for achievement in achievements
+        ],
+    }
+
+
 @router.websocket("/ws/auth/me")
-async def websocket_user_details(websocket: WebSocket, db: AsyncSession = Depends(aget_db)):
+async def websocket_user_details(websocket: WebSocket):
     """
     WebSocket endpoint for real-time updates on user details, including achievements, total verses caught, and unique books caught.
+
+    The connection can stay open for hours, so it never holds a database session
+    between updates: each update checks a session out of the pool and returns it
+    before sleeping.
     """
     api_key = websocket.query_params.get("api_key")
 
@@ -341,8 +433,7 @@ async def websocket_user_details(websocket: WebSocket, db: AsyncSession = Depend
 
         # Decode the token to get the user's email
         try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            email: str = payload.get("sub")
+            email: str = decode_token(token).get("sub")
             if email is None:
                 await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
                 return
@@ -350,195 +441,56 @@ async def websocket_user_details(websocket: WebSocket, db: AsyncSession = Depend
             await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
             return
 
-        # Find the user
-        result = await db.execute(select(User).where(User.email == email))
-        db_user = result.scalar_one_or_none()
-        if db_user is None:
-            await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-            return
-
-        achievements_result = await db.execute(
-            select(Achievement).where(Achievement.user_id == db_user.id)
-        )
-        achievements = achievements_result.scalars().all()
-
-        # Get user's payment status
-        payments_result = await db.execute(
-            select(Payment)
-            .where(Payment.user_id == db_user.id)
-            .order_by(Payment.completed_at.desc())
-        )
-        payments = payments_result.scalars().all()
-
-        # Determine payment status
-        has_paid = len(payments) > 0
-        last_payment = payments[0] if has_paid else None
-        payment_status = {
-            "has_paid": has_paid,
-            "last_payment_date": last_payment.created_at.isoformat() if last_payment else None,
-            "last_payment_amount": float(last_payment.amount) if last_payment else None,
-            "last_payment_currency": last_payment.currency if last_payment else None,
-            "is_supporter": db_user.is_supporter,
-            "total_payments": len(payments),
-            "total_donated": float(sum(p.amount for p in payments)) if payments else 0
-        }
+        today = datetime.utcnow().date()
 
-        # Sort achievements by achieved_at to get the most recent one
-        if achievements:
-            most_recent_achievement = max(achievements, key=lambda a: a.achieved_at)
-            db_user.current_tag = most_recent_achievement.tag
-            await db.commit()
+        async with session_manager.get_session() as db:
+            # Find the user
+            db_user = await load_user(db, email)
+            if db_user is None:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                return
 
-        total_verses_caught = await db.scalar(
-            select(func.count()).where(
-                UserActivity.user_id == db_user.id,
-                UserActivity.activity_type == "verse_caught"
-            )
-        )
+            details = await load_user_details(db, db_user)
+            print("Total Verses in Caught in websocket", details[2])
+            print("Total Unique Verses in Caught in websocket", details[3])
 
-        print("Total Verses in Caught in websocket", total_verses_caught)
-
-        unique_books_caught = await db.scalar(
-            select(func.count(distinct(UserActivity.activity_data))).where(
-                UserActivity.user_id == db_user.id,
-                UserActivity.activity_type == "verse_caught"
-            )
-        )
-        print("Total Unique Verses in Caught in websocket", unique_books_caught)
+            # Check if the user has logged in today
+            logged_in_today = db_user.last_login and db_user.last_login.date() == today
 
+            # Update the last login time if the user hasn't logged in today
+            if not logged_in_today:
+                db_user.last_login = datetime.utcnow()
+                db_user.streak += 1
+                if db_user.streak >= 7:
+                    db_user.current_tag = "Daily Devotee"
+                    await award_achievement(db, db_user, "Daily Devotee", "Daily Devotee", "Login for 7 Conservative days")
+                await db.commit()
 
-        # Check if the user has logged in today
-        today = datetime.utcnow().date()
-        logged_in_today = db_user.last_login and db_user.last_login.date() == today
-
-        # Update the last login time if the user hasn't logged in today
-        if not logged_in_today:
-            db_user.last_login = datetime.utcnow()
-            db_user.streak += 1
-            if db_user.streak >= 7:
-                db_user.current_tag = "Daily Devotee"
-                await award_achievement(db, db_user, "Daily Devotee", "Daily Devotee", "Login for 7 Conservative days")
-            await db.commit()
+            message = user_details_message(db_user, *details, logged_in_today)
 
         # Send initial user details
-        await websocket.send_json({
-            "id": str(db_user.id),
-            "user_name": db_user.user_name,
-            "email": db_user.email,
-            "is_active": db_user.is_active,
-            "verified": db_user.verified,
-            "streak": db_user.streak,
-            "faith_coins": db_user.faith_coins,
-            "current_tag": db_user.current_tag,
-            "bible_version": db_user.bible_version,
-            "created_at": db_user.created_at.isoformat(),
-            "logged_in_today": logged_in_today,
-            "total_verses_caught": total_verses_caught,
-            "unique_books_caught": unique_books_caught,
-            "has_taken_tour": db_user.has_taken_tour,
-            "payment_status": payment_status,
-            "has_rated": db_user.has_rated,
-            "achievements": [
-                {
-                    "id": str(achievement.id),
-                    "name": achievement.name,
-                    "tag": achievement.tag,
-                    "requirement": achievement.requirement,
-                    "achieved_at": achievement.achieved_at.isoformat(),
-                }
-                for achievement in achievements
-            ],
-        })
+        await websocket.send_json(message)
 
         # Keep the connection open and send updates
         try:
             while True:
                 await asyncio.sleep(5)  # Adjust the interval as needed
 
-                # Fetch the latest user data
-                result = await db.execute(select(User).where(User.email == email))
-                db_user = result.scalar_one_or_none()
-                if db_user is None:
-                    await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
-                    return
-                await db.refresh(db_user)
+                async with session_manager.get_session() as db:
+                    # Fetch the latest user data
+                    db_user = await load_user(db, email)
+                    if db_user is None:
+                        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                        return
 
-                achievements_result = await db.execute(
-                    select(Achievement).where(Achievement.user_id == db_user.id)
-                )
-                achievements = achievements_result.scalars().all()
-                # Get user's payment status
-                payments_result = await db.execute(
-                    select(Payment)
-                    .where(Payment.user_id == db_user.id)
-                    .order_by(Payment.completed_at.desc())
-                )
-                payments = payments_result.scalars().all()
-
-                # Determine payment status
-                has_paid = len(payments) > 0
-                last_payment = payments[0] if has_paid else None
-                payment_status = {
-                    "has_paid": has_paid,
-                    "last_payment_date": last_payment.created_at.isoformat() if last_payment else None,
-                    "last_payment_amount": float(last_payment.amount) if last_payment else None,
-                    "last_payment_currency": last_payment.currency if last_payment else None,
-                    "is_supporter": db_user.is_supporter,
-                    "total_payments": len(payments),
-                    "total_donated": float(sum(p.amount for p in payments)) if payments else 0
-                }
-
-                # Sort achievements by achieved_at to get the most recent one
-                if achievements:
-                    most_recent_achievement = max(achievements, key=lambda a: a.achieved_at)
-                    db_user.current_tag = most_recent_achievement.tag
-                    await db.commit()
-
-                total_verses_caught = await db.scalar(
-                    select(func.count()).where(
-                        UserActivity.user_id == db_user.id,
-                        UserActivity.activity_type == "verse_caught"
-                    )
-                )
+                    details = await load_user_details(db, db_user)
 
-                unique_books_caught = await db.scalar(
-                    select(func.count(distinct(UserActivity.activity_data))).where(
-                        UserActivity.user_id == db_user.id,
-                        UserActivity.activity_type == "verse_caught"
-                    )
-                )
+                    # Check if the user has logged in today
+                    logged_in_today = db_user.last_login and db_user.last_login.date() == today
 
-                # Check if the user has logged in today
-                logged_in_today = db_user.last_login and db_user.last_login.date() == today
-
-                await websocket.send_json({
-                    "id": str(db_user.id),
-                    "user_name": db_user.user_name,
-                    "email": db_user.email,
-                    "is_active": db_user.is_active,
-                    "verified": db_user.verified,
-                    "streak": db_user.streak,
-                    "faith_coins": db_user.faith_coins,
-                    "current_tag": db_user.current_tag,
-                    "bible_version": db_user.bible_version,
-                    "created_at": db_user.created_at.isoformat(),
-                    "logged_in_today": logged_in_today,
-                    "total_verses_caught": total_verses_caught,
-                    "unique_books_caught": unique_books_caught,
-                    "has_taken_tour": db_user.has_taken_tour,
-                    "payment_status": payment_status,
-                    "has_rated": db_user.has_rated,
-                    "achievements": [
-                        {
-                            "id": str(achievement.id),
-                            "name": achievement.name,
-                            "tag": achievement.tag,
-                            "requirement": achievement.requirement,
-                            "achieved_at": achievement.achieved_at.isoformat(),
-                        }
-                        for achievement in achievements
-                    ],
-                })
+                    message = user_details_message(db_user, *details, logged_in_today)
+
+                await websocket.send_json(message)
 
         except Exception as e:
             print(f"Error in while loop: {e}")
@@ -555,29 +507,14 @@ async def websocket_user_details(websocket: WebSocket, db: AsyncSession = Depend
 async def change_password(
     data: dict,
     db: AsyncSession = Depends(aget_db),
-    token: str = Depends(oauth2_scheme)
+    db_user: User = Depends(get_current_user)
 ):
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
     current_password = data.get("current_password")
     new_password = data.get("new_password")
 
     if not current_password or not new_password:
         raise HTTPException(status_code=400, detail="Current and new password are required")
 
-    # Find user by email
-    result = await db.execute(select(User).where(User.email == email))
-    db_user = result.scalar_one_or_none()
-
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     # Verify current password
     if not verify_password(current_password, db_user.password):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
@@ -592,120 +529,139 @@ async def change_password(
 @router.get("/api/themes")
 async def get_themes(
     db: AsyncSession = Depends(aget_db),
-    token: str = Depends(oauth2_scheme)
+    email: str = Depends(get_token_email)
 ):
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+    """
+    List all themes with the user's unlock state.
 
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
+    Theme data comes from the in-memory catalog with styles already encoded, so
+    this is one query for the user's current theme and unlocked set plus a merge.
+    """
+    await theme_catalog.ensure_loaded(db)
 
-    themes_result = await db.execute(select(Theme))
-    themes = themes_result.scalars().all()
+    result = await db.execute(
+        select(User.current_theme_id, UserTheme.theme_id, UserTheme.unlocked, UserTheme.unlocked_via_ad)
+        .outerjoin(UserTheme, UserTheme.user_id == User.id)
+        .where(User.email == email)
+    )
+    rows = result.all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="User not found")
 
-    # Get user's unlocked themes
-    user_themes_result = await db.execute(
-        select(UserTheme)
-        .where(UserTheme.user_id == user.id)
+    unlocked = {
+        str(row.theme_id): (bool(row.unlocked), bool(row.unlocked_via_ad))
+        for row in rows
+        if row.theme_id is not None
+    }
+
+    return Response(
+        content=theme_catalog.render(unlocked, rows[0].current_theme_id),
+        media_type="application/json"
     )
-    user_themes = {ut.theme_id: ut for ut in user_themes_result.scalars()}
-
-    response = []
-    for theme in themes:
-        user_theme = user_themes.get(theme.id)
-        response.append({
-            "id": str(theme.id),
-            "name": theme.name,
-            "display_name": theme.display_name,
-            "price": theme.price,
-            "styles": theme.styles,
-            "preview_image_url": theme.preview_image_url,
-            "unlocked": user_theme.unlocked if user_theme else False,
-            "is_current": str(user.current_theme_id) == str(theme.id),
-            "unlocked_via_ad": user_theme.unlocked_via_ad if user_theme else False
-        })
-
-    return response
 
 
 @router.post("/api/unlock-theme")
 async def unlock_theme(
     data: dict,
     db: AsyncSession = Depends(aget_db),
-    token: str = Depends(oauth2_scheme)
+    email: str = Depends(get_token_email)
 ):
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+    """
+    Unlock a theme for the user, either via an ad or by spending faith coins.
 
+    The balance check, the `user_themes` upsert and the coin debit run as a single
+    statement, so concurrent unlocks can neither overdraw the balance nor pay for
+    the same theme twice.
+    """
     theme_id = data.get("theme_id")
-    via_ad = data.get("via_ad", False)
+    via_ad = bool(data.get("via_ad", False))
 
     if not theme_id:
         raise HTTPException(status_code=400, detail="Theme ID is required")
 
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
-
-    result = await db.execute(select(Theme).where(Theme.id == theme_id))
-    theme = result.scalar_one_or_none()
-
-    if not theme:
+    try:
+        theme_id = PyUUID(str(theme_id))
+    except ValueError:
         raise HTTPException(status_code=404, detail="Theme not found")
 
-    # Check if already unlocked
     result = await db.execute(
-        select(UserTheme)
-        .where(UserTheme.user_id == user.id)
-        .where(UserTheme.theme_id == theme.id)
+        text("""
+            WITH theme AS (
+                SELECT id, price FROM themes WHERE id = :theme_id
+            ),
+            buyer AS (
+                SELECT id, faith_coins FROM users WHERE email = :email
+            ),
+            owned AS (
+                SELECT 1 FROM user_themes, buyer, theme
+                WHERE user_themes.user_id = buyer.id
+                  AND user_themes.theme_id = theme.id
+                  AND user_themes.unlocked
+            ),
+            unlocked AS (
+                INSERT INTO user_themes (user_id, theme_id, unlocked, unlocked_at, unlocked_via_ad)
+                SELECT buyer.id, theme.id, true, now() AT TIME ZONE 'utc', :via_ad
+                FROM buyer, theme
+                WHERE :via_ad OR buyer.faith_coins >= theme.price
+                ON CONFLICT (user_id, theme_id) DO UPDATE
+                    SET unlocked = true,
+                        unlocked_at = EXCLUDED.unlocked_at,
+                        unlocked_via_ad = EXCLUDED.unlocked_via_ad
+                    WHERE NOT COALESCE(user_themes.unlocked, false)
+                RETURNING user_id
+            ),
+            debit AS (
+                UPDATE users SET faith_coins = users.faith_coins - theme.price
+                FROM theme
+                WHERE NOT :via_ad
+                  AND users.id IN (SELECT user_id FROM unlocked)
+                  AND users.faith_coins >= theme.price
+                RETURNING users.faith_coins
+            )
+            SELECT
+                (SELECT price FROM theme) AS price,
+                (SELECT faith_coins FROM buyer) AS balance,
+                EXISTS (SELECT 1 FROM owned) AS already_unlocked,
+                EXISTS (SELECT 1 FROM unlocked) AS unlocked,
+                (SELECT faith_coins FROM debit) AS new_balance
+        """).bindparams(
+            bindparam("theme_id", type_=UUID(as_uuid=True)),
+            bindparam("email", type_=String),
+            bindparam("via_ad", type_=Boolean),
+        ),
+        {"theme_id": theme_id, "email": email, "via_ad": via_ad}
     )
-    user_theme = result.scalar_one_or_none()
+    outcome = result.one()
 
-    if user_theme and user_theme.unlocked:
-        return {"message": "Theme already unlocked"}
+    if outcome.balance is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if outcome.price is None:
+        raise HTTPException(status_code=404, detail="Theme not found")
 
-    # Handle via ad unlock
-    if via_ad:
-        # Here you would integrate with your ad service
-        # For now we'll just mark it as unlocked via ad
-        new_user_theme = UserTheme(
-            user_id=user.id,
-            theme_id=theme.id,
-            unlocked=True,
-            unlocked_at=datetime.utcnow(),
-            unlocked_via_ad=True
+    if not outcome.unlocked:
+        await db.rollback()
+        # Nothing was written: either it is owned already (possibly by a concurrent
+        # request that just committed) or the balance check failed
+        if outcome.already_unlocked or via_ad or outcome.balance >= outcome.price:
+            return {"message": "Theme already unlocked"}
+        raise HTTPException(
+            status_code=400,
+            detail=f"Not enough faith coins. You need {outcome.price} but have {outcome.balance}"
         )
-        db.add(new_user_theme)
-        await db.commit()
-        return {"message": "Theme unlocked via ad"}
 
-    # Handle faith coin purchase
-    if user.faith_coins < theme.price:
+    if not via_ad and outcome.new_balance is None:
+        # A concurrent purchase spent the coins after our balance check; undo the unlock
+        await db.rollback()
         raise HTTPException(
             status_code=400,
-            detail=f"Not enough faith coins. You need {theme.price} but have {user.faith_coins}"
+            detail=f"Not enough faith coins. You need {outcome.price}"
         )
 
-    user.faith_coins -= theme.price
-    new_user_theme = UserTheme(
-        user_id=user.id,
-        theme_id=theme.id,
-        unlocked=True,
-        unlocked_at=datetime.utcnow(),
-        unlocked_via_ad=False
-    )
-    db.add(new_user_theme)
     await db.commit()
 
+    if via_ad:
+        # Here you would integrate with your ad service
+        return {"message": "Theme unlocked via ad"}
     return {"message": "Theme unlocked successfully"}
 
 
@@ -713,24 +669,12 @@ async def unlock_theme(
 async def set_theme(
     data: dict,
     db: AsyncSession = Depends(aget_db),
-    token: str = Depends(oauth2_scheme)
+    user: User = Depends(get_current_user)
 ):
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        print(email)
-        if email is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
     theme_id = data.get("theme_id")
     if not theme_id:
         raise HTTPException(status_code=400, detail="Theme ID is required")
 
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
-
     # Verify user has unlocked this theme
     result = await db.execute(
         select(UserTheme)
@@ -751,110 +695,41 @@ async def set_theme(
 # Endpoint to Recieve Inspirational-Verses
 @router.get("/api/inspirational-verses")
 async def get_inspirational_verses(
+    response: Response,
     db: AsyncSession = Depends(aget_db),
-    token: str = Depends(oauth2_scheme)
+    email: str = Depends(get_token_email)
 ):
     """
     Retrieve inspirational verses from the Bible with their chapters and verses.
-    The same verse will be returned until the next refresh time (5 minutes for Daily Devotee, 30 minutes otherwise).
-    """
-    try:
-        # Authentication
-        try:
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-            if (email := payload.get("sub")) is None:
-                raise HTTPException(status_code=401, detail="Invalid token credentials")
-        except JWTError as e:
-            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-
-        # Fetch user with achievements
-        try:
-            result = await db.execute(
-                select(User)
-                .options(selectinload(User.achievements))
-                .where(User.email == email)
-            )
-            user = result.scalar_one_or_none()
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail="Error fetching user data")
+    The same verse will be returned until the next refresh time (5 minutes for Supporters, 15 minutes for Daily Devotees, 30 minutes otherwise).
 
-        current_time = datetime.utcnow()
-        
-        # Check if we have a valid cached verse
-        if user.last_inspirational_verse and user.next_inspirational_verse_time:
-            print("user already has an inspirational verse")
-            if current_time < user.next_inspirational_verse_time:
-                try:
-                    return {
-                        "verse": json.loads(user.last_inspirational_verse),
-                        "remaining_time": (user.next_inspirational_verse_time - current_time).total_seconds()
-                    }
-                except json.JSONDecodeError:
-                    # Fall through to generate new verse if stored verse is invalid
-                    pass
-
-        # Validate inspirational verses exist
-        if not inspirational_verses:
-            raise HTTPException(status_code=500, detail="No inspirational verses available")
-
-        print("user doesn't have an inspirational verse")
-
-        # Select and store new verse
-        selected_verse = random.choice(inspirational_verses)
-        print("Selected verse:", selected_verse)
-        has_daily_devotee = any(
-            achievement.tag == "Daily Devotee" 
-            for achievement in user.achievements
-        )
-        has_supporter = any(
-            achievement.tag == "Supporter" 
-            for achievement in user.achievements
+    The verse is derived from (user id, time bucket), so this endpoint never writes
+    and its response can be cached by the client until the bucket ends.
+    """
+    result = await db.execute(
+        select(User.id, Achievement.tag)
+        .outerjoin(
+            Achievement,
+            (Achievement.user_id == User.id) & Achievement.tag.in_(TIER_PERIOD_MINUTES)
         )
+        .where(User.email == email)
+    )
+    rows = result.all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="User not found")
 
-        # Determine cache time (priority: Supporter > Daily Devotee > Default)
-        if has_supporter:
-            cache_minutes = 5
-        elif has_daily_devotee:
-            cache_minutes = 15
-        else:
-            cache_minutes = 30
+    await verse_pool.ensure_loaded(db)
+    period = period_for(row.tag for row in rows if row.tag)
+    try:
+        verse, remaining_time = verse_pool.pick(rows[0].id, period)
+    except LookupError:
+        raise HTTPException(status_code=500, detail="No inspirational verses available")
 
-        try:
-            print("Updating user with new verse")
-
-            verse_json = json.dumps(selected_verse)
-            try:
-                json.loads(verse_json)
-            except json.JSONDecodeError as e:
-                raise HTTPException(status_code=500, detail="Invalid verse data format")
-
-            user.last_inspirational_verse = json.dumps(selected_verse)
-            user.next_inspirational_verse_time = current_time + timedelta(minutes=cache_minutes)
-            db.add(user)
-            try:
-                await db.flush()
-                await db.commit()
-                print("User updated successfully")
-        
-                return {
-                    "verse": selected_verse,
-                    "remaining_time": cache_minutes * 60
-                }
-            except Exception as e:
-                await db.rollback()
-                print(f"Error during commit: {str(e)}")  # Add this line
-                raise HTTPException(status_code=500, detail="Failed to update user verse")
-        except HTTPException:
-            raise
-        except Exception as e:
-            print(f"Unexpected error: {str(e)}")
-            raise HTTPException(status_code=500, detail="Internal server error")
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="Internal server error")
+    response.headers["Cache-Control"] = f"private, max-age={int(remaining_time)}"
+    return {
+        "verse": verse,
+        "remaining_time": remaining_time
+    }
     
 
 # Payment PayStack Endpoint
@@ -862,22 +737,9 @@ async def get_inspirational_verses(
 async def create_payment(
     data: dict,
     db: AsyncSession = Depends(aget_db),
-    token: str = Depends(oauth2_scheme)
+    user: User = Depends(get_current_user)
 ):
     print("Payment Request Recieved")
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email = payload.get("sub")
-        if not email:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     amount = data["amount"]
     if not amount or amount <= 0:
         raise HTTPException(status_code=400, detail="Invalid amount")
@@ -951,19 +813,17 @@ async def create_payment(
 async def verify_payment(
     data: dict,
     db: AsyncSession = Depends(aget_db),
-    token: str = Depends(oauth2_scheme)
+    user: User = Depends(get_current_user)
 ):
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email = payload.get("sub")
-        if not email:
-            raise HTTPException(status_code=401, detail="Invalid token")
-
-        user_result = await db.execute(select(User).where(User.email == email))
-        user = user_result.scalar_one_or_none()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
+    """
+    Verify a payment by reference.
 
+    Settled payments are answered from the local record without calling Paystack.
+    Pending payments are verified inline, unless the client sends `"async": true`,
+    in which case the background reconciler is nudged and the local status is
+    returned immediately.
+    """
+    try:
         reference = data.get("reference")
         if not reference:
             raise HTTPException(status_code=400, detail="Reference required")
@@ -977,102 +837,84 @@ async def verify_payment(
         )
         payment = result.scalar_one_or_none()
 
+        if payment and (payment.status in FINAL_STATUSES or data.get("async")):
+            if payment.status not in FINAL_STATUSES:
+                payment_reconciler.nudge(reference)
+            return {
+                "status": "success" if payment.status in FINAL_STATUSES else "pending",
+                "payment_status": payment.status,
+                "isSupporter": is_supporter_payment(payment),
+                "payment_id": str(payment.id),
+                "amount": payment.amount,
+                "currency": payment.currency
+            }
+
+        # A single Paystack round trip serves both the backfill and the verification
+        try:
+            status_code, response_data = await paystack_client.verify_transaction(reference)
+        except Exception as e:
+            print(f"Paystack verification failed: {str(e)}")
+            raise HTTPException(
+                status_code=400,
+                detail=f"Could not verify payment with Paystack: {str(e)}"
+            )
+        verified = status_code == 200 and response_data.get("status")
+
         if not payment:
             print(f"No local payment found for reference: {reference}")
-            # Verify with Paystack
-            try:
-
-                url = f"https://api.paystack.co/transaction/verify/{reference}"
-                headers = {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
-
-                async with httpx.AsyncClient() as client:
-                    paystack_response = await client.get(url, headers=headers)
-                    paystack_data = paystack_response.json()
-
-                if paystack_response.status_code != 200 or not paystack_data.get("status"):
-                    raise HTTPException(
-                        status_code=404,
-                        detail="Payment not found in Paystack"
-                    )
-
-                # Create payment record from Paystack data
-                paystack_amount = paystack_data["data"]["amount"] / 100  # Convert from pesewas
-                metadata = {
-                    "donation_type": "standard",
-                    "original_usd_amount": 0  # Will be updated if we can calculate
-                }
-
-                # Try to get original USD amount if possible
-                if "metadata" in paystack_data["data"]:
-                    metadata["original_usd_amount"] = paystack_data["data"]["metadata"].get(
-                        "originalUsdAmount", 0
-                    )
-
-                payment = Payment(
-                    user_id=user.id,
-                    amount=paystack_amount,
-                    currency=paystack_data["data"]["currency"],
-                    paystack_reference=reference,
-                    status="pending",
-                    payment_metadata=metadata
-                )
-                db.add(payment)
-                await db.commit()
-                await db.refresh(payment)
-                print(f"Created new payment record from Paystack: {payment.id}")
-
-            except Exception as e:
-                print(f"Paystack verification failed: {str(e)}")
+            if not verified:
                 raise HTTPException(
-                    status_code=400,
-                    detail=f"Could not verify payment with Paystack: {str(e)}"
+                    status_code=404,
+                    detail="Payment not found in Paystack"
                 )
 
-        # Final verification with Paystack
-        url = f"https://api.paystack.co/transaction/verify/{reference}"
-        headers = {"Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}"}
+            # Create payment record from Paystack data
+            paystack_amount = response_data["data"]["amount"] / 100  # Convert from pesewas
+            metadata = {
+                "donation_type": "standard",
+                "original_usd_amount": 0  # Will be updated if we can calculate
+            }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url, headers=headers)
-            response_data = response.json()
+            # Try to get original USD amount if possible
+            if "metadata" in response_data["data"]:
+                metadata["original_usd_amount"] = response_data["data"]["metadata"].get(
+                    "originalUsdAmount", 0
+                )
+
+            payment = Payment(
+                user_id=user.id,
+                amount=paystack_amount,
+                currency=response_data["data"]["currency"],
+                paystack_reference=reference,
+                status="pending",
+                payment_metadata=metadata
+            )
+            db.add(payment)
+            await db.commit()
+            await db.refresh(payment)
+            print(f"Created new payment record from Paystack: {payment.id}")
 
-        if response.status_code != 200 or not response_data.get("status"):
+        if not verified:
             print(f"Paystack verification failed: {response_data}")
             raise HTTPException(
                 status_code=400,
                 detail=response_data.get("message", "Payment verification failed")
             )
 
-        transaction_data = response_data["data"]
-        
-        # Update payment record
-        payment.status = transaction_data["status"]
-        payment.payment_method = transaction_data.get("channel")
-        payment.completed_at = datetime.now()
-        
-        # Update metadata if needed
-        if "metadata" in transaction_data:
-            payment.payment_metadata.update(transaction_data["metadata"])
-
-        # Handle supporter status
-        original_usd_amount = payment.payment_metadata.get("original_usd_amount", 0)
-        is_supporter = original_usd_amount >= 5
-
-        if is_supporter and user:
-            await award_achievement(
-                db, 
-                user, 
-                "VerseCatch Supporter", 
-                "Supporter", 
-                "Donated at least 5 USD equivalent"
-            )
-            user.is_supporter = True
-            db.add(user)
+        # Lock the row: the reconciler or a webhook may have settled it meanwhile
+        await db.refresh(payment, with_for_update=True)
+        if payment.status not in FINAL_STATUSES:
+            apply_transaction(payment, response_data["data"])
+            # Handle supporter status
+            if is_supporter_payment(payment):
+                await mark_supporters(db, [payment.user_id])
 
         await db.commit()
+        is_supporter = is_supporter_payment(payment)
 
         return {
             "status": "success",
+            "payment_status": payment.status,
             "isSupporter": is_supporter,
             "payment_id": str(payment.id),
             "amount": payment.amount,
@@ -1082,7 +924,7 @@ async def verify_payment(
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Payment verification error: {str(e)}", exc_info=True)
+        print(f"Payment verification error: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail="An error occurred while verifying payment"
@@ -1095,37 +937,29 @@ async def payment_webhook(
     request: Request,
     db: AsyncSession = Depends(aget_db)
 ):
+    """
+    Acknowledge a Paystack webhook.
+
+    The event is only verified and appended to the `payment_events` inbox; the
+    background consumer applies it. Redeliveries of an event are ignored.
+    """
     # Verify Paystack signature
     payload = await request.body()
     signature = request.headers.get("x-paystack-signature")
-    
-    if not verify_paystack_signature(payload, signature):
+
+    if not signature or not verify_paystack_signature(payload, signature):
         raise HTTPException(status_code=401, detail="Invalid signature")
 
-    event = await request.json()
-    
-    if event["event"] == "charge.success":
-        reference = event["data"]["reference"]
-        
-        # Update payment record
-        result = await db.execute(
-            select(Payment)
-            .where(Payment.paystack_reference == reference)
-        )
-        payment = result.scalar_one_or_none()
-        
-        if payment and payment.status == "pending":
-            payment.status = "success"
-            payment.payment_method = event["data"]["channel"]
-            payment.completed_at = datetime.now()
-            
-            # Update user status if supporter donation
-            if payment.amount >= 5:
-                user = await db.get(User, payment.user_id)
-                user.is_supporter = True
-                db.add(user)
-            
-            await db.commit()
+    try:
+        event = json.loads(payload)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid payload")
+    if not isinstance(event, dict) or not isinstance(event.get("data", {}), (dict, type(None))):
+        raise HTTPException(status_code=400, detail="Invalid payload")
+
+    if await record_webhook_event(db, event, payload):
+        await db.commit()
+        payment_event_consumer.nudge()
 
     return {"status": "success"}
 
@@ -1135,7 +969,7 @@ async def payment_webhook(
 async def submit_rating(
     data: dict,
     db: AsyncSession = Depends(aget_db),
-    token: str = Depends(oauth2_scheme)
+    user: User = Depends(get_current_user)
 ):
     """
     Submit a user rating for the app. Feedback is automatically generated based on the rating.
@@ -1146,14 +980,6 @@ async def submit_rating(
     Returns:
     - message: str
     """
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email = payload.get("sub")
-        if not email:
-            raise HTTPException(status_code=401, detail="Invalid token")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Invalid token")
-
     rating = data.get("rating")
     
     if rating is None:
@@ -1166,25 +992,11 @@ async def submit_rating(
     except ValueError:
         raise HTTPException(status_code=400, detail="Rating must be an integer between 1 and 5")
 
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     if user.has_rated:
         raise HTTPException(status_code=400, detail="You have already submitted a rating")
 
-    # Define rating descriptions
-    rating_descriptions = {
-        1: "Worse - Needs work",
-        2: "Good - Has potential",
-        3: "Better - Good but could improve",
-        4: "Best - Really enjoying it",
-        5: "Excellent - Perfect experience!"
-    }
-
     # Get the automatic feedback based on rating
-    feedback = rating_descriptions.get(rating, "")
+    feedback = RATING_DESCRIPTIONS.get(rating, "")
 
     try:
         new_rating = Rating(
@@ -1210,43 +1022,111 @@ async def submit_rating(
         raise HTTPException(status_code=500, detail="Failed to submit rating")
 
 
+def ratings_cursor(rated_at, user_id) -> str:
+    """`/admin/user-ratings` cursor for a row; `rated_at` is empty for users rated before it was recorded."""
+    return f"{rated_at.isoformat() if rated_at else ''}|{user_id}"
+
+
+def parse_ratings_cursor(cursor: str):
+    """Split a `/admin/user-ratings` cursor ("<rated_at>|<user id>") into its keys."""
+    try:
+        rated_at, user_id = cursor.split("|", 1)
+        return (datetime.fromisoformat(rated_at) if rated_at else None), PyUUID(user_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def user_ratings_query(after=None, limit: int = 100):
+    """
+    One `/admin/user-ratings` page, newest first, after the keys `after`
+    (see `parse_ratings_cursor`). Users without a `rated_at` come last. Selects
+    one row more than `limit` to tell whether there is a next page.
+    """
+    verses_caught = (
+        select(func.count().label("total_verses_caught"))
+        .where(
+            UserActivity.user_id == User.id,
+            UserActivity.activity_type == "verse_caught"
+        )
+        .lateral("verses_caught")
+    )
+    stmt = (
+        select(
+            User.id,
+            User.user_name,
+            User.email,
+            User.rating,
+            User.rating_description.label("rating_description"),
+            User.rating_feedback,
+            User.rated_at,
+            User.is_supporter,
+            verses_caught.c.total_verses_caught,
+        )
+        .join(verses_caught, true())
+        .where(User.has_rated == True)
+        .order_by(User.rated_at.desc().nulls_last(), User.id.desc())
+        .limit(limit + 1)
+    )
+    if after:
+        rated_at, user_id = after
+        if rated_at is None:
+            stmt = stmt.where(User.rated_at.is_(None), User.id < user_id)
+        else:
+            stmt = stmt.where(or_(
+                tuple_(User.rated_at, User.id) < tuple_(rated_at, user_id),
+                User.rated_at.is_(None)
+            ))
+    return stmt
+
+
 @router.get("/admin/user-ratings")
 async def get_user_ratings(
-    db: AsyncSession = Depends(aget_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(default=100, ge=1, le=1000),
     token: str = Depends(oauth2_scheme)
 ):
     """
-    Get all users with their ratings and feedback for admin dashboard
+    Get users with their ratings and feedback for admin dashboard, newest first.
+
+    Keyset paginated: pass the returned `next_cursor` to fetch the next page
+    (`null` on the last page). Each user's verse count comes from a lateral
+    aggregate in the same query, and rows are streamed as they are read.
     """
-    
-    result = await db.execute(
-        select(User)
-        .options(selectinload(User.ratings))
-        .where(User.has_rated == True)
-        .order_by(User.rated_at.desc())
-    )
-    users = result.scalars().all()
-    
-    ratings_data = []
-    for user in users:
-        ratings_data.append({
-            "id": str(user.id),
-            "user_name": user.user_name,
-            "email": user.email,
-            "rating": user.rating,
-            "rating_description": user.rating_description,
-            "feedback": user.rating_feedback,
-            "rated_at": user.rated_at.isoformat() if user.rated_at else None,
-            "is_supporter": user.is_supporter,
-            "total_verses_caught": await db.scalar(
-                select(func.count()).where(
-                    UserActivity.user_id == user.id,
-                    UserActivity.activity_type == "verse_caught"
-                )
-            )
-        })
-    
-    return {"users": ratings_data}
+    after = parse_ratings_cursor(cursor) if cursor else None
+    stmt = user_ratings_query(after, limit)
+
+    async def stream_ratings():
+        # The request-scoped session is gone once the response starts streaming
+        async with session_manager.get_session() as session:
+            result = await session.stream(stmt)
+            yield '{"users":['
+            sent = 0
+            last = None
+            has_more = False
+            async for row in result:
+                if sent == limit:
+                    # The extra row: there is another page after `last`
+                    has_more = True
+                    break
+                yield ("," if sent else "") + json.dumps({
+                    "id": str(row.id),
+                    "user_name": row.user_name,
+                    "email": row.email,
+                    "rating": row.rating,
+                    "rating_description": row.rating_description,
+                    "feedback": row.rating_feedback,
+                    "rated_at": row.rated_at.isoformat() if row.rated_at else None,
+                    "is_supporter": row.is_supporter,
+                    "total_verses_caught": row.total_verses_caught
+                })
+                sent += 1
+                last = row
+            await result.close()
+
+        next_cursor = ratings_cursor(last.rated_at, last.id) if has_more else None
+        yield '],"next_cursor":' + json.dumps(next_cursor) + "}"
+
+    return StreamingResponse(stream_ratings(), media_type="application/json")
 
 
 @router.get("/admin/user-stats")
@@ -1255,28 +1135,53 @@ async def get_user_stats(
     token: str = Depends(oauth2_scheme)
 ):
     """
-    Get all users statistics including total count, ratings, verse captures and supporters
+    Get all users statistics including total count, ratings, verse captures and supporters.
+
+    Served from the `admin_stats` snapshot kept up to date by the stats refresher
+    (see `refreshed_at`); it is only computed inline before the first refresh.
     """
-    # User statistics
-    total_users = await db.scalar(select(func.count(User.id)))
-    users_with_ratings = await db.scalar(
-        select(func.count(User.id))
-        .where(User.has_rated == True)
-    )
-    supporters_count = await db.scalar(
-        select(func.count(User.id))
-        .where(User.is_supporter == True)
-    )
-    
-    # Verse capture statistics
-    total_verses_caught = await db.scalar(
-        select(func.coalesce(func.sum(VerseCapture.count), 0))
-    )
-    
+    snapshot = await db.get(StatsSnapshot, 1)
+    if snapshot is None:
+        await refresh_snapshot(db)
+        await db.commit()
+        snapshot = await db.get(StatsSnapshot, 1)
+
+    total_users = snapshot.total_users
+    users_with_ratings = snapshot.users_with_ratings
+
     return {
         "total_users": total_users,
         "users_with_ratings": users_with_ratings,
-        "supporters_count": supporters_count,
+        "supporters_count": snapshot.supporters_count,
         "rating_percentage": round((users_with_ratings / total_users) * 100, 2) if total_users else 0,
-        "total_verses_caught": total_verses_caught
-    }
\ No newline at end of file
+        "total_verses_caught": snapshot.total_verses_caught,
+        "refreshed_at": snapshot.refreshed_at.isoformat() if snapshot.refreshed_at else None
+    }
+
+
+@router.get("/admin/user-stats/series")
+async def get_user_stats_series(
+    days: int = Query(default=30, ge=1, le=366),
+    db: AsyncSession = Depends(aget_db),
+    token: str = Depends(oauth2_scheme)
+):
+    """
+    Daily active users, verses caught and donations for the last `days` days, oldest first.
+    """
+    result = await db.execute(
+        select(DailyStats)
+        .where(DailyStats.day > func.current_date() - days)
+        .order_by(DailyStats.day)
+    )
+    return {
+        "days": [
+            {
+                "day": row.day.isoformat(),
+                "active_users": row.active_users,
+                "verses_caught": row.verses_caught,
+                "donations_count": row.donations_count,
+                "donations_amount": float(row.donations_amount)
+            }
+            for row in result.scalars()
+        ]
+    }
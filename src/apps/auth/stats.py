@@ -0,0 +1,114 @@
+"""
+Precomputed admin dashboard statistics.
+
+`StatsRefresher` periodically rewrites the `admin_stats` snapshot row and the
+recent days of the `admin_daily_stats` series, so the admin endpoints read a
+handful of rows instead of aggregating whole tables on every request.
+"""
+from datetime import date, timedelta
+
+from sqlalchemy import Date, bindparam, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.database import session_manager
+from core.workers import PeriodicWorker
+from apps.requotes.models import DailyStats
+
+# One pass over users instead of three filtered counts
+REFRESH_SNAPSHOT = text("""
+    INSERT INTO admin_stats (id, total_users, users_with_ratings, supporters_count, total_verses_caught, refreshed_at)
+    SELECT 1, u.total_users, u.users_with_ratings, u.supporters_count,
+           (SELECT COALESCE(SUM(count), 0) FROM verse_captures),
+           now()
+    FROM (
+        SELECT count(*) AS total_users,
+               count(*) FILTER (WHERE has_rated) AS users_with_ratings,
+               count(*) FILTER (WHERE is_supporter) AS supporters_count
+        FROM users
+    ) u
+    ON CONFLICT (id) DO UPDATE SET
+        total_users = EXCLUDED.total_users,
+        users_with_ratings = EXCLUDED.users_with_ratings,
+        supporters_count = EXCLUDED.supporters_count,
+        total_verses_caught = EXCLUDED.total_verses_caught,
+        refreshed_at = EXCLUDED.refreshed_at
+""")
+
+# Recompute every day from :since to today; days without activity get zero rows
+REFRESH_SERIES = text("""
+    INSERT INTO admin_daily_stats (day, active_users, verses_caught, donations_count, donations_amount, refreshed_at)
+    SELECT d.day, COALESCE(a.active_users, 0), COALESCE(a.verses_caught, 0),
+           COALESCE(p.donations_count, 0), COALESCE(p.donations_amount, 0), now()
+    FROM (
+        SELECT CAST(day AS date) AS day
+        FROM generate_series(CAST(:since AS timestamp), CAST(CURRENT_DATE AS timestamp), interval '1 day') AS day
+    ) d
+    LEFT JOIN (
+        SELECT CAST(activity_date AS date) AS day,
+               count(DISTINCT user_id) AS active_users,
+               count(*) FILTER (WHERE activity_type = 'verse_caught') AS verses_caught
+        FROM user_activities
+        WHERE activity_date >= :since
+        GROUP BY 1
+    ) a ON a.day = d.day
+    LEFT JOIN (
+        SELECT CAST(completed_at AS date) AS day,
+               count(*) AS donations_count,
+               SUM(amount) AS donations_amount
+        FROM payments
+        WHERE status = 'success' AND completed_at >= :since
+        GROUP BY 1
+    ) p ON p.day = d.day
+    ON CONFLICT (day) DO UPDATE SET
+        active_users = EXCLUDED.active_users,
+        verses_caught = EXCLUDED.verses_caught,
+        donations_count = EXCLUDED.donations_count,
+        donations_amount = EXCLUDED.donations_amount,
+        refreshed_at = EXCLUDED.refreshed_at
+""").bindparams(bindparam("since", type_=Date))
+
+# Where to start when the series is empty
+FIRST_DAY = text("""
+    SELECT LEAST(
+        (SELECT CAST(min(activity_date) AS date) FROM user_activities),
+        (SELECT CAST(min(completed_at) AS date) FROM payments WHERE status = 'success')
+    )
+""")
+
+
+async def refresh_snapshot(session: AsyncSession) -> None:
+    await session.execute(REFRESH_SNAPSHOT)
+
+
+async def refresh_series(session: AsyncSession) -> date:
+    """
+    Recompute the tail of the daily series (the whole history on the first run).
+
+    Returns the first day that was recomputed.
+    """
+    last_day = await session.scalar(select(func.max(DailyStats.day)))
+    if last_day is None:
+        since = await session.scalar(FIRST_DAY) or date.today()
+    else:
+        since = last_day - timedelta(days=max(settings.STATS_SERIES_RECOMPUTE_DAYS, 1) - 1)
+    await session.execute(REFRESH_SERIES, {"since": since})
+    return since
+
+
+class StatsRefresher(PeriodicWorker):
+    name = "Admin stats refresh"
+
+    @property
+    def interval(self) -> int:
+        return settings.STATS_REFRESH_INTERVAL
+
+    async def run_once(self) -> int:
+        async with session_manager.get_session() as session:
+            await refresh_snapshot(session)
+            await refresh_series(session)
+        # Nothing worth logging on every pass
+        return 0
+
+
+stats_refresher = StatsRefresher()
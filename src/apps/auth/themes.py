@@ -0,0 +1,106 @@
+"""
+In-memory theme catalog.
+
+Themes are static (seeded from `Settings.THEMES`), so each worker loads them once
+and JSON-encodes every theme's static fields, styles included, a single time.
+`/api/themes` then only has to fetch the user's unlocked set and splice the
+per-user flags into the pre-encoded objects.
+"""
+import json
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from apps.requotes.models import Theme
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CatalogTheme:
+    id: str
+    name: str
+    price: int
+    # JSON object of the static fields, without its closing brace
+    encoded_prefix: str
+
+
+def _json_bool(value: bool) -> str:
+    return "true" if value else "false"
+
+
+class ThemeCatalog:
+    def __init__(self):
+        self._themes: Optional[List[CatalogTheme]] = None
+        self._by_id: Dict[str, CatalogTheme] = {}
+
+    @property
+    def loaded(self) -> bool:
+        # An empty catalog (themes not seeded yet) is retried on the next request
+        return bool(self._themes)
+
+    async def load(self, session: AsyncSession) -> None:
+        """Load every theme from the database and pre-encode it."""
+        rows = (await session.execute(select(Theme))).scalars().all()
+
+        # Keep the order themes are declared in settings
+        order = {theme["name"]: index for index, theme in enumerate(settings.THEMES)}
+        rows = sorted(rows, key=lambda theme: (order.get(theme.name, len(order)), theme.name))
+
+        themes = []
+        for theme in rows:
+            styles = theme.styles
+            if isinstance(styles, str):
+                # Rows seeded before the seeder fix hold json.dumps(...) inside the JSON column
+                styles = json.loads(styles)
+            static = {
+                "id": str(theme.id),
+                "name": theme.name,
+                "display_name": theme.display_name,
+                "price": theme.price,
+                "styles": styles,
+                "preview_image_url": theme.preview_image_url,
+            }
+            themes.append(CatalogTheme(
+                id=str(theme.id),
+                name=theme.name,
+                price=theme.price,
+                encoded_prefix=json.dumps(static, separators=(",", ":"))[:-1],
+            ))
+
+        self._themes = themes
+        self._by_id = {theme.id: theme for theme in themes}
+        logger.info(f"Loaded {len(themes)} themes into the catalog")
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        if not self.loaded:
+            await self.load(session)
+
+    def get(self, theme_id) -> Optional[CatalogTheme]:
+        return self._by_id.get(str(theme_id))
+
+    def render(self, unlocked: Dict[str, Tuple[bool, bool]], current_theme_id: Optional[str]) -> str:
+        """
+        Build the `/api/themes` JSON array.
+
+        Args:
+            unlocked: theme id -> (unlocked, unlocked_via_ad) for the user's `user_themes` rows.
+            current_theme_id: the user's current theme id, if any.
+        """
+        current_theme_id = str(current_theme_id) if current_theme_id else None
+        parts = []
+        for theme in self._themes or []:
+            is_unlocked, via_ad = unlocked.get(theme.id, (False, False))
+            parts.append(
+                f'{theme.encoded_prefix},"unlocked":{_json_bool(is_unlocked)},'
+                f'"is_current":{_json_bool(theme.id == current_theme_id)},'
+                f'"unlocked_via_ad":{_json_bool(via_ad)}}}'
+            )
+        return "[" + ",".join(parts) + "]"
+
+
+theme_catalog = ThemeCatalog()
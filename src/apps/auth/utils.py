@@ -9,6 +9,7 @@ from datetime import datetime, timedelta
 from typing import Dict, Any
 from jose import jwt
 import logging
+from .emails import email_templates
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -51,67 +52,19 @@ async def send_verification_email(email: str, token: str):
     Send a production-ready verification email using SendGrid
     """
     verification_url = f"{settings.BASE_URL}/auth/verify?token={token}"
-    
-    # Professional email template with plain text fallback
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <title>Verify Your VerseCatch Account</title>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; }}
-            .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-            .button {{
-                display: inline-block;
-                padding: 12px 24px;
-                background-color: #2563eb;
-                color: white;
-                text-decoration: none;
-                border-radius: 4px;
-                font-weight: bold;
-            }}
-            .footer {{ margin-top: 20px; font-size: 12px; color: #6b7280; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <h2>Verify Your Email Address</h2>
-            <p>Thank you for signing up with VerseCatch! To complete your registration, please verify your email address by clicking the button below:</p>
-            
-            <p><a href="{verification_url}" class="button">Verify Email Address</a></p>
-            
-            <p>If you didn't create an account with VerseCatch, you can safely ignore this email.</p>
-            
-            <div class="footer">
-                <p>Best regards,<br>The VerseCatch Team</p>
-                <p><small>This email was sent to {email}. If you believe you received this in error, please contact support.</small></p>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    plain_text_content = f"""
-    Verify Your VerseCatch Account
-    ------------------------------
-    
-    Thank you for signing up with VerseCatch! To complete your registration, please verify your email address by visiting this link:
-    
-    {verification_url}
-    
-    If you didn't create an account with VerseCatch, you can safely ignore this email.
-    
-    Best regards,
-    The VerseCatch Team
-    """
+
+    # Templates are precompiled at startup; this is only a render
+    rendered = email_templates.render(
+        "verify_email",
+        {"verification_url": verification_url, "email": email},
+    )
 
     message = Mail(
         from_email=From(settings.EMAIL_FROM, "VerseCatch Team"),
         to_emails=To(email),
-        subject=Subject("Verify Your VerseCatch Account"),
-        html_content=HtmlContent(html_content),
-        plain_text_content=plain_text_content
+        subject=Subject(rendered.subject),
+        html_content=HtmlContent(rendered.html_content),
+        plain_text_content=rendered.plain_text_content
     )
 
     try:
@@ -0,0 +1,110 @@
+"""
+Stateless inspirational verse rotation.
+
+The verse a user sees is a pure function of (user id, time bucket), where the
+bucket length depends on the user's tier. Nothing is stored per user, so the
+endpoint is read-only and every worker computes the same answer.
+"""
+import time
+import hashlib
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from apps.requotes.models import Verse, Version
+from .constants import inspirational_verses, inspirational_references
+
+logger = logging.getLogger(__name__)
+
+# Rotation period per achievement tag, in minutes (priority: Supporter > Daily Devotee > Default)
+TIER_PERIOD_MINUTES = {
+    "Supporter": 5,
+    "Daily Devotee": 15,
+}
+DEFAULT_PERIOD_MINUTES = 30
+
+
+def period_for(tags: Iterable[str]) -> int:
+    """Rotation period in seconds for a user holding the given achievement tags."""
+    minutes = min(
+        (TIER_PERIOD_MINUTES[tag] for tag in tags if tag in TIER_PERIOD_MINUTES),
+        default=DEFAULT_PERIOD_MINUTES,
+    )
+    return minutes * 60
+
+
+class InspirationalVersePool:
+    """
+    Precomputed pool of curated verses.
+
+    Starts with the verses embedded in `constants.py` and is replaced by the
+    curated references resolved against the verse store, at startup or, if that
+    failed, on first use.
+    """
+
+    def __init__(self, verses: List[Dict]):
+        self._verses: Tuple[Dict, ...] = tuple(verses)
+        self._loaded = False
+
+    def __len__(self) -> int:
+        return len(self._verses)
+
+    @property
+    def loaded(self) -> bool:
+        # Until the store's pool is loaded every request retries, so a worker whose
+        # startup load failed does not keep serving different verses than the others
+        return self._loaded
+
+    async def load(self, session: AsyncSession) -> None:
+        """Resolve `inspirational_references` against the verse store in one query."""
+        version_stmt = select(Version.id, Version.name).order_by(Version.name).limit(1)
+        if settings.INSPIRATIONAL_VERSE_VERSION:
+            version_stmt = version_stmt.where(Version.name == settings.INSPIRATIONAL_VERSE_VERSION)
+        version = (await session.execute(version_stmt)).first()
+        if version is None:
+            logger.warning("No Bible version available; using the embedded inspirational verses")
+            return
+
+        result = await session.execute(
+            select(Verse.book, Verse.chapter, Verse.verse_number, Verse.text)
+            .where(Verse.version_id == version.id)
+            .where(tuple_(Verse.book, Verse.chapter, Verse.verse_number).in_(inspirational_references))
+        )
+        texts = {(row.book, row.chapter, row.verse_number): row.text for row in result}
+
+        verses = [
+            {"book": book, "chapter": chapter, "verse": verse_number, "text": texts[(book, chapter, verse_number)]}
+            for book, chapter, verse_number in inspirational_references
+            if (book, chapter, verse_number) in texts
+        ]
+        if not verses:
+            logger.warning(f"Curated references not found in {version.name}; using the embedded inspirational verses")
+            return
+
+        self._verses = tuple(verses)
+        self._loaded = True
+        logger.info(f"Loaded {len(verses)} inspirational verses from {version.name}")
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        if not self.loaded:
+            await self.load(session)
+
+    def pick(self, user_id, period: int, now: Optional[float] = None) -> Tuple[Dict, float]:
+        """
+        Return the user's verse for the current bucket and the seconds left in it.
+
+        Uses a keyed hash rather than `hash()` so that all workers agree.
+        """
+        if not self._verses:
+            raise LookupError("No inspirational verses available")
+        now = time.time() if now is None else now
+        bucket = int(now // period)
+        digest = hashlib.blake2b(f"{user_id}:{period}:{bucket}".encode(), digest_size=8).digest()
+        verse = self._verses[int.from_bytes(digest, "big") % len(self._verses)]
+        return verse, (bucket + 1) * period - now
+
+
+verse_pool = InspirationalVersePool(inspirational_verses)
@@ -1,13 +1,13 @@
 from datetime import datetime
 from typing import List
 from uuid import uuid4, UUID as PyUUID
-from sqlalchemy import ForeignKey, String, Integer, text, Column, Boolean, DateTime, CheckConstraint, Numeric, Text, UniqueConstraint
+from sqlalchemy import ForeignKey, String, Integer, text, Column, Boolean, Date, DateTime, CheckConstraint, Numeric, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import Optional
 from sqlalchemy.sql import func
 from core.database import Base
-from sqlalchemy import JSON, Index
+from sqlalchemy import JSON, Index, case
 from sqlalchemy.types import TypeDecorator, VARCHAR
 from sqlalchemy.ext.hybrid import hybrid_property
 import json
@@ -93,6 +93,11 @@ class Achievement(Base):
 
     user: Mapped["User"] = relationship("User", back_populates="achievements")
 
+    __table_args__ = (
+        # Each achievement is awarded once; conflict target for the awarding inserts
+        Index("uq_achievements_user_tag", "user_id", "tag", unique=True),
+    )
+
 
 class UserActivity(Base):
     __tablename__ = "user_activities"
@@ -108,6 +113,23 @@ class UserActivity(Base):
     user: Mapped["User"] = relationship("User", back_populates="activities")
 
 
+# Every activity lookup filters on (user_id, activity_type), latest first
+Index(
+    "ix_user_activities_user_type_date",
+    UserActivity.user_id,
+    UserActivity.activity_type,
+    UserActivity.activity_date.desc(),
+)
+# Verse catches are the hot type; INCLUDE lets book/verse lookups skip the heap
+Index(
+    "ix_user_activities_verse_caught",
+    UserActivity.user_id,
+    UserActivity.activity_date.desc(),
+    postgresql_where=text("activity_type = 'verse_caught'"),
+    postgresql_include=["activity_data"],
+)
+
+
 class Theme(Base):
     __tablename__ = "themes"
 
@@ -137,6 +159,20 @@ class UserTheme(Base):
     user: Mapped["User"] = relationship("User", back_populates="themes")
     theme: Mapped["Theme"] = relationship("Theme")
 
+    __table_args__ = (
+        # Conflict target for the single-statement unlock in /api/unlock-theme
+        Index("uq_user_themes_user_theme", "user_id", "theme_id", unique=True),
+    )
+
+
+RATING_DESCRIPTIONS = {
+    1: "Worse - Needs work",
+    2: "Good - Has potential",
+    3: "Better - Good but could improve",
+    4: "Best - Really enjoying it",
+    5: "Excellent - Perfect experience!"
+}
+
 
 class User(Base):
     __tablename__ = "users"
@@ -211,14 +247,11 @@ class User(Base):
     def rating_description(self) -> Optional[str]:
         if not self.rating:
             return None
-        rating_descriptions = {
-            1: "Worse - Needs work",
-            2: "Good - Has potential",
-            3: "Better - Good but could improve",
-            4: "Best - Really enjoying it",
-            5: "Excellent - Perfect experience!"
-        }
-        return rating_descriptions.get(self.rating)
+        return RATING_DESCRIPTIONS.get(self.rating)
+
+    @rating_description.expression
+    def rating_description(cls):
+        return case(RATING_DESCRIPTIONS, value=cls.rating, else_=None)
 
     def __repr__(self):
         return f"<User(id={self.id}, email={self.email}, streak={self.streak})>"
@@ -254,6 +287,8 @@ class Payment(Base):
     )
     created_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now())
     completed_at: Mapped[DateTime] = mapped_column(DateTime, nullable=True)
+    # Set by the reconciler while it verifies the payment with Paystack
+    claimed_until: Mapped[DateTime] = mapped_column(DateTime, nullable=True)
 
     user: Mapped["User"] = relationship("User", back_populates="payments")
 
@@ -266,6 +301,28 @@ class Payment(Base):
         return self.status == "success"
     
 
+class PaymentEvent(Base):
+    """Append-only inbox of verified Paystack webhook events, applied by a background consumer."""
+    __tablename__ = "payment_events"
+
+    id: Mapped[str] = mapped_column(String, primary_key=True)  # "<event>:<transaction id>"
+    event_type: Mapped[str] = mapped_column(String, nullable=False)
+    reference: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)  # raw request body
+    received_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now())
+    processed_at: Mapped[DateTime] = mapped_column(DateTime, nullable=True)
+    # Why the consumer skipped a malformed event; it is still marked processed
+    error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_payment_events_unprocessed",
+            "received_at",
+            postgresql_where=text("processed_at IS NULL"),
+        ),
+    )
+
+
 class Rating(Base):
     __tablename__ = "ratings"
 
@@ -281,4 +338,32 @@ class Rating(Base):
 
     __table_args__ = (
         CheckConstraint("rating >= 1 AND rating <= 5", name="check_rating_range"),
-    )
\ No newline at end of file
+    )
+
+
+class StatsSnapshot(Base):
+    """Precomputed `/admin/user-stats` totals (a single row, refreshed by `stats_refresher`)."""
+    __tablename__ = "admin_stats"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, default=1)
+    total_users: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    users_with_ratings: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    supporters_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_verses_caught: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    refreshed_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        CheckConstraint("id = 1", name="ck_admin_stats_single_row"),
+    )
+
+
+class DailyStats(Base):
+    """Per-day activity series for the admin dashboard."""
+    __tablename__ = "admin_daily_stats"
+
+    day: Mapped[datetime] = mapped_column(Date, primary_key=True)
+    active_users: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    verses_caught: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    donations_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    donations_amount: Mapped[float] = mapped_column(Numeric(12, 2), nullable=False, default=0)
+    refreshed_at: Mapped[DateTime] = mapped_column(DateTime, server_default=func.now())
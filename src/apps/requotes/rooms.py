@@ -0,0 +1,117 @@
+"""
+Shared "room" mode for `/ws/detect-quotes`.
+
+Phones in the same service hear the same audio, so connections that pass the
+same `room` (and Bible version) share one detection pipeline: only the room's
+publisher streams audio to Whisper/GPT, and detected quotes are fanned out to
+every listener, each of whom still gets their own verse capture recorded.
+
+Rooms live in the worker process that accepted the connections; a multi-worker
+deployment needs the `room` query parameter to route to a single worker.
+"""
+import asyncio
+import logging
+from typing import Dict, Optional, Tuple
+
+from fastapi import WebSocket
+
+from core.database import session_manager
+from apps.requotes.services import QuoteDetectionService
+from apps.requotes.services.limiter import connection_id
+from apps.requotes.sockets import send_json_if_connected, record_captures
+
+logger = logging.getLogger(__name__)
+
+
+class Room:
+    """
+    One detection pipeline and the connections listening to it.
+
+    The first member to send audio becomes the publisher; audio from anyone else
+    is ignored until the publisher leaves and another member starts sending.
+    """
+
+    def __init__(self, room_id: str, version: str):
+        self.id = room_id
+        self.version = version
+        # websocket -> user_email (None for anonymous listeners)
+        self.listeners: Dict[WebSocket, Optional[str]] = {}
+        self.publisher: Optional[WebSocket] = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._process())
+
+    def submit(self, websocket: WebSocket, audio_chunk: bytes) -> bool:
+        """Queue audio from a member. Returns False if it is not the publisher."""
+        if self.publisher is None:
+            self.publisher = websocket
+        if websocket is not self.publisher:
+            return False
+        self._queue.put_nowait((audio_chunk, websocket.audio_format))
+        return True
+
+    async def _process(self) -> None:
+        # The whole room counts as one connection for fair queueing of OpenAI calls
+        connection_id.set(f"room:{self.id}:{self.version}")
+        while True:
+            audio_chunk, audio_format = await self._queue.get()
+            try:
+                async with session_manager.get_session() as session:
+                    detector = QuoteDetectionService(
+                        session, audio_chunk, version=self.version, audio_format=audio_format
+                    )
+                    await detector.scan_for_quotes()
+                    if not detector.quote_detected:
+                        continue
+
+                    print(f"QUOTE DETECTED in room {self.id}")
+                    listeners = list(self.listeners.items())
+                    await record_captures(session, [user_email for _, user_email in listeners])
+
+                payload = [q.model_dump() for q in detector.quotes]
+                await asyncio.gather(*(send_json_if_connected(websocket, payload) for websocket, _ in listeners))
+            except Exception as e:
+                print(f"Error processing audio chunk in room {self.id}: {e}")
+                if self.publisher is not None:
+                    await send_json_if_connected(self.publisher, {"error": str(e)})
+            finally:
+                self._queue.task_done()
+
+    async def close(self) -> None:
+        """Stop the pipeline, dropping any queued audio."""
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+class RoomRegistry:
+    def __init__(self):
+        self._rooms: Dict[Tuple[str, str], Room] = {}
+
+    def join(self, room_id: str, version: str, websocket: WebSocket, user_email: Optional[str]) -> Room:
+        key = (room_id, version)
+        room = self._rooms.get(key)
+        if room is None:
+            room = self._rooms[key] = Room(room_id, version)
+            logger.info(f"Opened room {room_id} ({version})")
+        room.listeners[websocket] = user_email
+        return room
+
+    async def leave(self, room: Room, websocket: WebSocket) -> None:
+        room.listeners.pop(websocket, None)
+        if room.publisher is websocket:
+            room.publisher = None
+        if not room.listeners:
+            self._rooms.pop((room.id, room.version), None)
+            await room.close()
+            logger.info(f"Closed room {room.id} ({room.version})")
+
+    def stats(self) -> Dict:
+        return {
+            "rooms": len(self._rooms),
+            "listeners": sum(len(room.listeners) for room in self._rooms.values()),
+        }
+
+
+room_registry = RoomRegistry()
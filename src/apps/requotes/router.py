@@ -1,17 +1,26 @@
 import asyncio
+import json
+import os
+import anyio
 from sqlalchemy import select, update, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
 from sqlalchemy.sql import func
 from apps.requotes.models import User,UserActivity,Achievement
-from core.database import aget_db
+from core.config import settings
+from core.database import aget_db, session_manager
 from core.security import verify_api_key
 from apps.requotes.services import QuoteDetectionService
+from apps.requotes.services.audio import AudioFormat, DEFAULT_AUDIO_FORMAT, PASSTHROUGH_CODECS, create_wav_buffer
+from apps.requotes.services.limiter import connection_id
+from apps.requotes.sockets import is_connected, send_json_if_connected, record_captures, receive_audio
+from apps.requotes.rooms import room_registry
 from apps.requotes.models import Verse, Version
 import logging
 from uuid import uuid4, UUID as PyUUID
-from typing import Optional
+from typing import List, Optional
 
 
 
@@ -21,12 +30,12 @@ router = APIRouter()
 
 async def award_achievement(session, user, name, tag, requirement):
     """Check if a user qualifies for an achievement and award it if not already given."""
-    existing_achievement = await session.execute(
-        select(Achievement).where(Achievement.user_id == user.id, Achievement.tag == tag)
+    result = await session.execute(
+        pg_insert(Achievement)
+        .values(user_id=user.id, name=name, tag=tag, requirement=requirement)
+        .on_conflict_do_nothing(index_elements=[Achievement.user_id, Achievement.tag])
     )
-    if not existing_achievement.scalar_one_or_none():
-        new_achievement = Achievement(user_id=user.id, name=name, tag=tag, requirement=requirement)
-        session.add(new_achievement)
+    if result.rowcount:
         await session.commit()
 
 
@@ -152,79 +161,121 @@ async def increment_capture_count(
     return result.scalar()
 
 
+def drain_queue(queue: asyncio.Queue) -> List[bytes]:
+    """Take every chunk still waiting in the queue."""
+    chunks = []
+    while not queue.empty():
+        chunk = queue.get_nowait()
+        if chunk is not None:
+            chunks.append(chunk)
+    return chunks
+
+
+def write_backlog(
+    directory: str,
+    chunks: List[bytes],
+    version: Optional[str],
+    user_email: Optional[str],
+    audio_format: AudioFormat = DEFAULT_AUDIO_FORMAT
+) -> str:
+    """Save unprocessed audio plus a JSON sidecar for offline processing."""
+    os.makedirs(directory, exist_ok=True)
+    name = f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid4()}"
+    if audio_format.is_passthrough:
+        # Encoded chunks are standalone files and cannot be concatenated
+        extension = os.path.splitext(PASSTHROUGH_CODECS[audio_format.codec])[1]
+        for index, chunk in enumerate(chunks):
+            with open(os.path.join(directory, f"{name}-{index:04d}{extension}"), "wb") as f:
+                f.write(chunk)
+    else:
+        with open(os.path.join(directory, f"{name}.wav"), "wb") as f:
+            f.write(create_wav_buffer(b"".join(chunks), audio_format.sample_rate, audio_format.channels).getvalue())
+    with open(os.path.join(directory, f"{name}.json"), "w") as f:
+        json.dump({
+            "version": version,
+            "user_email": user_email,
+            "chunks": len(chunks),
+            "format": audio_format.as_dict()
+        }, f)
+    return name
+
+
 async def process_audio_queue(
     websocket: WebSocket,
-    session: AsyncSession,
     queue: asyncio.Queue,
     version: str
 ):
+    """
+    Consume audio chunks for one connection.
+
+    Each chunk is its own unit of work with its own short-lived session, so an idle
+    or long-lived socket does not pin a pooled connection. The session only checks
+    out a connection once a quote needs to be looked up or recorded.
+
+    The endpoint cancels this task when the client disconnects; cancellation
+    aborts the in-flight OpenAI request and closes the chunk's session.
+    """
+    # OpenAI calls from this connection queue fairly against other connections
+    connection_id.set(str(id(websocket)))
+
     while True:
         audio_chunk = await queue.get()
         if audio_chunk is None:
             break
 
         try:
-            # Initialize detector (don't share session)
-            detector = QuoteDetectionService(session, audio_chunk, version=version)
-            await detector.scan_for_quotes()
-            
-            if detector.quote_detected:
-                print("QUOTE DETECTED")
-                user_id = None
-                anonymous_id = None
-
-                if websocket.user_email:
-                    print("User Is Logged In")
-                    result = await session.execute(
-                        select(User.id).where(User.email == websocket.user_email)
-                    )
-                    user_id = result.scalar()
-                    
-                    if user_id is None:
-                        print("User not found, falling back to anonymous")
-                        anonymous_id = str(uuid4())
-                else:
-                    anonymous_id = str(uuid4())
-                    print("USER IS Anonymous")
-
-                # Unified tracking
-                tracking_id = user_id if user_id is not None else anonymous_id
-                id_type = "user_id" if user_id is not None else "anonymous_id"
-                
-                if tracking_id:
-                    print(f"Attempting DB update as {id_type}...")
-                    try:
-                        # Use execute + commit instead of transaction block
-                        await session.execute(
-                            text(f"""
-                            INSERT INTO verse_captures ({id_type}, count)
-                            VALUES (:tracking_id, 1)
-                            ON CONFLICT ({id_type})
-                            DO UPDATE SET 
-                                count = verse_captures.count + 1,
-                                last_captured_at = NOW()
-                            """),
-                            {"tracking_id": tracking_id}
-                        )
-                        await session.commit()
-                        print("DONE UPDATING VERSECAPTURES")
-                    except Exception as e:
-                        print(f"DB update failed: {str(e)}")
-                        await session.rollback()
-                        raise
-                
-                await websocket.send_json([q.model_dump() for q in detector.quotes])
-                
+            async with session_manager.get_session() as session:
+                await process_audio_chunk(websocket, session, audio_chunk, version)
         except Exception as e:
             print(f"Error processing audio chunk: {e}")
-            await websocket.send_json({"error": str(e)})
+            await send_json_if_connected(websocket, {"error": str(e)})
         finally:
             queue.task_done()
 
+
+async def process_audio_chunk(
+    websocket: WebSocket,
+    session: AsyncSession,
+    audio_chunk: bytes,
+    version: str
+):
+    """Detect quotes in one audio chunk, record the capture and send the quotes."""
+    detector = QuoteDetectionService(session, audio_chunk, version=version, audio_format=websocket.audio_format)
+    await detector.scan_for_quotes()
+    
+    if detector.quote_detected:
+        print("QUOTE DETECTED")
+        await record_captures(session, [websocket.user_email])
+        await send_json_if_connected(websocket, [q.model_dump() for q in detector.quotes])
+
+
+async def run_room_connection(
+    websocket: WebSocket,
+    room_id: str,
+    version: str,
+    user_email: Optional[str]
+):
+    """Serve a `/ws/detect-quotes` connection that joined a shared room."""
+    room = room_registry.join(room_id, version, websocket, user_email)
+    try:
+        while True:
+            audio_chunk = await receive_audio(websocket)
+            room.submit(websocket, audio_chunk)
+
+    except WebSocketDisconnect:
+        print(f"WebSocket disconnected from room {room_id}")
+    except Exception as e:
+        print(f"Error in WebSocket connection: {str(e)}")
+    finally:
+        await room_registry.leave(room, websocket)
+        if is_connected(websocket):
+            await websocket.close()
+        print("WebSocket connection closed")
+
+
 @router.websocket("/ws/detect-quotes")
 async def websocket_endpoint(
     websocket: WebSocket,
-    session: AsyncSession = Depends(aget_db),
 ):
     """
     WebSocket endpoint for detecting quotes in real-time audio streams.
@@ -237,16 +288,24 @@ async def websocket_endpoint(
     Args:
         websocket (WebSocket): The WebSocket connection used for receiving audio data 
                                and sending detected quotes.
-        session (AsyncSession): A database session dependency for interacting with the database.
 
     Behavior:
         - The client must provide a valid `api_key` as a query parameter for authentication.
+        - The audio format defaults to 48 kHz mono 16-bit PCM. Clients can declare
+          another one with `codec`, `sample_rate` and `channels` query parameters,
+          or with a `{"type": "format", ...}` text message before the first chunk
+          (acknowledged with the accepted format). `codec` is `pcm16`, or `opus`
+          (Ogg), `webm`, `flac` or `wav` for self-contained encoded chunks, which
+          are forwarded to Whisper without re-encoding.
         - If authentication fails, the WebSocket is closed with status code `WS_1008_POLICY_VIOLATION`.
         - If authentication succeeds, the WebSocket connection is accepted.
         - Audio chunks sent by the client are placed into an `asyncio.Queue` for processing.
         - A background task (`process_audio_queue`) processes the audio data.
         - The connection remains open until the client disconnects or an error occurs.
         - When the connection is closed, the processing task is safely shut down.
+        - With a `room` query parameter the connection joins a shared room instead
+          (see `apps.requotes.rooms`): one member's audio is processed once and the
+          detected quotes are sent to every member of the room.
 
     Exceptions:
         - `WebSocketDisconnect`: Raised when the client disconnects.
@@ -255,8 +314,12 @@ async def websocket_endpoint(
     Notes:
         - The `process_audio_queue` function runs as a separate task and will process 
           incoming audio chunks asynchronously.
-        - Upon disconnection, a `None` value is added to the queue to signal termination 
-          of the processing task before closing the WebSocket connection.
+        - No database session is held for the lifetime of the connection; each audio
+          chunk checks one out from `session_manager` only while it is processed.
+        - Upon disconnection the processing task is cancelled, aborting any in-flight
+          OpenAI call. Chunks still queued are discarded, or saved to
+          `DETECT_QUOTES_BACKLOG_DIR` for offline processing when it is set. This
+          cleanup completes before the handler returns, even if it is cancelled.
 
     """
     api_key = websocket.query_params.get("api_key")
@@ -269,17 +332,31 @@ async def websocket_endpoint(
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
+    try:
+        audio_format = AudioFormat.from_params(websocket.query_params)
+    except ValueError as e:
+        print(f"Rejected audio format: {e}")
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+        return
+
     await websocket.accept()
 
     # Store user_email in the WebSocket object for later use
     websocket.user_email = user_email
+    # May be replaced by a handshake message before the first audio chunk
+    websocket.audio_format = audio_format
+
+    room_id = websocket.query_params.get("room")
+    if room_id:
+        await run_room_connection(websocket, room_id, version, user_email)
+        return
 
     audio_queue = asyncio.Queue()
-    processing_task = asyncio.create_task(process_audio_queue(websocket, session, audio_queue, version))
+    processing_task = asyncio.create_task(process_audio_queue(websocket, audio_queue, version))
 
     try:
         while True:
-            audio_chunk = await websocket.receive_bytes()
+            audio_chunk = await receive_audio(websocket)
             await audio_queue.put(audio_chunk)
 
     except WebSocketDisconnect:
@@ -287,11 +364,32 @@ async def websocket_endpoint(
     except Exception as e:
         print(f"Error in WebSocket connection: {str(e)}")
     finally:
-        await audio_queue.put(None)
-        await processing_task
-
-        await websocket.close()
-        print("WebSocket connection closed")
+        # Shielded: a server shutdown cancelling this handler must not interrupt
+        # the cleanup half way and lose the backlog
+        with anyio.CancelScope(shield=True):
+            # Nobody is listening anymore: stop work instead of draining the backlog
+            processing_task.cancel()
+            backlog = drain_queue(audio_queue)
+            try:
+                await processing_task
+            except asyncio.CancelledError:
+                pass
+
+            if backlog and settings.DETECT_QUOTES_BACKLOG_DIR:
+                try:
+                    name = await asyncio.to_thread(
+                        write_backlog, settings.DETECT_QUOTES_BACKLOG_DIR, backlog, version, user_email,
+                        websocket.audio_format
+                    )
+                    print(f"Saved {len(backlog)} unprocessed audio chunks as {name}")
+                except OSError as e:
+                    print(f"Could not save unprocessed audio: {e}")
+            elif backlog:
+                print(f"Discarded {len(backlog)} unprocessed audio chunks")
+
+            if is_connected(websocket):
+                await websocket.close()
+            print("WebSocket connection closed")
 
 
 # Set up logging
@@ -4,14 +4,23 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_
 from sqlalchemy.orm import joinedload
 
-from .openai import transcript_to_text, detect_quotes, QuoteId
+from .openai import detect_quotes, QuoteId
+from .transcription import transcript_to_text
+from .audio import AudioFormat, DEFAULT_AUDIO_FORMAT
 from ..schemas import Quote
 from ..models import Verse, Version
 
 
 class QuoteDetectionService:
-    def __init__(self, session: AsyncSession, audio_chunk: bytes, version: str):
+    def __init__(
+        self,
+        session: AsyncSession,
+        audio_chunk: bytes,
+        version: str,
+        audio_format: AudioFormat = DEFAULT_AUDIO_FORMAT,
+    ):
         self.audio_chunk = audio_chunk
+        self.audio_format = audio_format
         self.session = session
         self.quote_detected = False
         self.quotes: List[Quote] = []
@@ -69,7 +78,7 @@ class QuoteDetectionService:
             self.quote_detected = True
 
     async def scan_for_quotes(self):
-        text = await transcript_to_text(audio_chunk=self.audio_chunk)
+        text = await transcript_to_text(audio_chunk=self.audio_chunk, audio_format=self.audio_format)
         print("Transcribed text:", text)
         quotes_ids = await detect_quotes(text=text)
         await self._retrieve_quotes(quote_ids=quotes_ids)
@@ -0,0 +1,221 @@
+"""
+Result caches for the OpenAI calls.
+
+Retransmitted and looped audio produce identical PCM chunks, and short phrases
+("Let us pray") produce identical transcripts, so both stages are memoized:
+
+- `transcript_cache`: hash of the PCM chunk -> Whisper transcript;
+- `detection_cache`: normalized transcript -> detected `QuoteId`s.
+
+Each cache is an in-process LRU with a TTL. When `OPENAI_CACHE_SQLITE_PATH` is
+set, entries are also written to a local SQLite file, so they survive restarts
+and are shared by every worker on the host. Concurrent lookups of the same key
+share a single upstream call.
+"""
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from cachetools import TTLCache
+
+from core.config import settings
+
+
+def chunk_key(audio_chunk: bytes) -> str:
+    return hashlib.blake2b(audio_chunk, digest_size=16).hexdigest()
+
+
+def normalize_text(text: str) -> str:
+    """Case, punctuation and whitespace do not change which verses are quoted."""
+    return " ".join(re.sub(r"[^\w\s:]", " ", text.lower()).split())
+
+
+class SQLiteCacheBackend:
+    """Key/value store in a local SQLite file (WAL mode, safe across processes)."""
+
+    PRUNE_EVERY = 500
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            self._conn = conn
+        return self._conn
+
+    def _get(self, namespace: str, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set(self, namespace: str, key: str, value: str, ttl: float) -> None:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (namespace, key, value, time.time() + ttl),
+                )
+                self._writes += 1
+                if self._writes % self.PRUNE_EVERY == 0:
+                    conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+    async def get(self, namespace: str, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._get, namespace, key)
+
+    async def set(self, namespace: str, key: str, value: str, ttl: float) -> None:
+        await asyncio.to_thread(self._set, namespace, key, value, ttl)
+
+
+# namespace -> cache, for metrics
+caches: Dict[str, "ResultCache"] = {}
+
+
+class ResultCache:
+    def __init__(
+        self,
+        namespace: str,
+        maxsize: int,
+        ttl: float,
+        encode: Callable[[Any], str] = json.dumps,
+        decode: Callable[[str], Any] = json.loads,
+        backend: Optional[SQLiteCacheBackend] = None,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self._memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._encode = encode
+        self._decode = decode
+        self._backend = backend
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.memory_hits = 0
+        self.shared_hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.backend_errors = 0
+        caches[namespace] = self
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Cached value for `key`, computing it on a miss.
+
+        `None` results are not cached; exceptions propagate to every waiter.
+        """
+        while True:
+            if key in self._memory:
+                self.memory_hits += 1
+                return self._memory[key]
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The call we joined was cancelled with its connection: another
+                # waiter may already have started a new one, join that or start ours
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._load_shared(key)
+            if value is None:
+                self.misses += 1
+                value = await compute()
+                if value is not None:
+                    await self._store_shared(key, value)
+            if value is not None:
+                self._memory[key] = value
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting: keep the loop from logging an unretrieved exception
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def _load_shared(self, key: str) -> Any:
+        if self._backend is None:
+            return None
+        try:
+            encoded = await self._backend.get(self.namespace, key)
+        except sqlite3.Error as e:
+            self.backend_errors += 1
+            print(f"Shared cache read failed: {e}")
+            return None
+        if encoded is None:
+            return None
+        self.shared_hits += 1
+        return self._decode(encoded)
+
+    async def _store_shared(self, key: str, value: Any) -> None:
+        if self._backend is None:
+            return
+        try:
+            await self._backend.set(self.namespace, key, self._encode(value), self.ttl)
+        except sqlite3.Error as e:
+            self.backend_errors += 1
+            print(f"Shared cache write failed: {e}")
+
+    def snapshot(self) -> Dict:
+        hits = self.memory_hits + self.shared_hits + self.coalesced
+        lookups = hits + self.misses
+        return {
+            "size": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "shared_hits": self.shared_hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "backend_errors": self.backend_errors,
+        }
+
+
+shared_backend = (
+    SQLiteCacheBackend(settings.OPENAI_CACHE_SQLITE_PATH)
+    if settings.OPENAI_CACHE_SQLITE_PATH else None
+)
+
+transcript_cache = ResultCache(
+    "transcript",
+    maxsize=settings.OPENAI_TRANSCRIPT_CACHE_SIZE,
+    ttl=settings.OPENAI_TRANSCRIPT_CACHE_TTL,
+    backend=shared_backend,
+)
+
+
+def cache_metrics() -> Dict:
+    return {namespace: cache.snapshot() for namespace, cache in caches.items()}
@@ -0,0 +1,278 @@
+"""
+Copy-free audio framing.
+
+- `wav_header` builds the 44-byte RIFF header for a PCM payload, so a WAV upload
+  is just `(header, payload)` instead of a `wave` re-encode into a `BytesIO`.
+- `ConcatReader` is a read-only file object over several buffers; the HTTP
+  client reads the upload straight from the original chunk's memory.
+- `AudioRingBuffer` coalesces small websocket frames in a preallocated
+  `bytearray` and hands out `memoryview` slices, avoiding repeated `bytes`
+  concatenation.
+
+Run `python -m apps.requotes.services.framing` from `src/` for a microbenchmark
+of memory allocated per chunk against the previous `wave` + `BytesIO` path
+and `bytes` concatenation.
+"""
+import io
+import os
+import struct
+from typing import List, Optional, Sequence, Tuple
+
+WAV_HEADER_SIZE = 44
+
+
+def wav_header(data_size: int, sample_rate: int, channels: int = 1, sample_width: int = 2) -> bytes:
+    """Canonical PCM WAV header (`WAV_HEADER_SIZE` bytes) for `data_size` bytes of samples."""
+    block_align = channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, sample_rate * block_align, block_align, sample_width * 8,
+        b"data", data_size,
+    )
+
+
+def wav_parts(pcm, sample_rate: int, channels: int = 1, sample_width: int = 2) -> Tuple[bytes, memoryview]:
+    """A WAV file as (header, payload) without copying the payload."""
+    payload = memoryview(pcm).cast("B")
+    return wav_header(len(payload), sample_rate, channels, sample_width), payload
+
+
+class ConcatReader(io.RawIOBase):
+    """Seekable, read-only file over a sequence of buffers (never joins them up front)."""
+
+    def __init__(self, parts: Sequence, name: str = "file.wav"):
+        super().__init__()
+        self._parts: List[memoryview] = [memoryview(part).cast("B") for part in parts]
+        self._size = sum(len(part) for part in self._parts)
+        self._pos = 0
+        self.name = name
+
+    def __len__(self) -> int:
+        return self._size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += self._size
+        self._pos = min(max(offset, 0), self._size)
+        return self._pos
+
+    def _slices(self, size: int) -> List[memoryview]:
+        """Views covering `size` bytes from the current position (no copy)."""
+        slices = []
+        start = self._pos
+        end = min(self._size, start + size)
+        offset = 0
+        for part in self._parts:
+            part_end = offset + len(part)
+            if part_end > start and offset < end:
+                slices.append(part[max(start - offset, 0):min(end - offset, len(part))])
+            offset = part_end
+            if offset >= end:
+                break
+        self._pos = end
+        return slices
+
+    def readinto(self, buffer) -> int:
+        target = memoryview(buffer).cast("B")
+        written = 0
+        for piece in self._slices(len(target)):
+            target[written:written + len(piece)] = piece
+            written += len(piece)
+        return written
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self._size - self._pos
+        slices = self._slices(size)
+        # One copy into the returned bytes, however many parts there are
+        return slices[0].tobytes() if len(slices) == 1 else b"".join(slices)
+
+    def readall(self) -> bytes:
+        return self.read()
+
+
+class AudioRingBuffer:
+    """
+    Fixed-capacity byte ring for coalescing audio frames.
+
+    `write` copies each frame in once; `peek` returns up to two `memoryview`
+    segments over the stored bytes (valid until the next write), and `take`
+    copies a chunk out exactly once.
+    """
+
+    def __init__(self, capacity: int):
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buffer)
+
+    def _grow(self, needed: int) -> None:
+        data = self.take(self._size)
+        self._view.release()
+        self._buffer = bytearray(max(needed, 2 * len(self._buffer)))
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._size = 0
+        self.write(data)
+
+    def write(self, data) -> None:
+        data = memoryview(data).cast("B")
+        if self._size + len(data) > self.capacity:
+            self._grow(self._size + len(data))
+        end = (self._start + self._size) % self.capacity
+        first = min(len(data), self.capacity - end)
+        self._view[end:end + first] = data[:first]
+        self._view[:len(data) - first] = data[first:]
+        self._size += len(data)
+
+    def peek(self, size: int) -> Tuple[memoryview, ...]:
+        size = min(size, self._size)
+        first = min(size, self.capacity - self._start)
+        head = self._view[self._start:self._start + first]
+        if first == size:
+            return (head,)
+        return head, self._view[:size - first]
+
+    def consume(self, size: int) -> None:
+        size = min(size, self._size)
+        self._start = (self._start + size) % self.capacity
+        self._size -= size
+        if not self._size:
+            self._start = 0
+
+    def take(self, size: int) -> bytes:
+        segments = self.peek(size)
+        data = segments[0].tobytes() if len(segments) == 1 else b"".join(segments)
+        self.consume(len(data))
+        return data
+
+
+class PcmChunker:
+    """Coalesce PCM websocket frames into chunks of at least `min_bytes` (frame aligned)."""
+
+    def __init__(self, min_bytes: int, frame_size: int = 2):
+        self.min_bytes = max(frame_size, min_bytes - min_bytes % frame_size)
+        self._ring = AudioRingBuffer(4 * self.min_bytes)
+
+    def feed(self, frame) -> None:
+        self._ring.write(frame)
+
+    def pop(self) -> Optional[bytes]:
+        """The next full chunk, or None until enough frames have been fed."""
+        if len(self._ring) < self.min_bytes:
+            return None
+        return self._ring.take(self.min_bytes)
+
+    def pending(self) -> int:
+        return len(self._ring)
+
+
+def _legacy_upload(pcm: bytes) -> bytes:
+    """The previous path: `wave` into a BytesIO, then read by the HTTP client."""
+    import wave
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(48000)
+        wav_file.writeframes(pcm)
+    buffer.seek(0)
+    return buffer.read()
+
+
+def _framed_upload(pcm: bytes) -> bytes:
+    return ConcatReader(wav_parts(pcm, 48000)).read()
+
+
+class _BytesChunker:
+    """The naive alternative to `PcmChunker`: `bytes` concatenation and slicing."""
+
+    def __init__(self, min_bytes: int):
+        self.min_bytes = min_bytes
+        self._pending = b""
+
+    def feed(self, frame) -> None:
+        self._pending += frame
+
+    def pop(self) -> Optional[bytes]:
+        if len(self._pending) < self.min_bytes:
+            return None
+        chunk = self._pending[:self.min_bytes]
+        self._pending = self._pending[self.min_bytes:]
+        return chunk
+
+
+def _coalesce(chunker, frames: List[bytes]) -> List[bytes]:
+    chunks = []
+    for frame in frames:
+        chunker.feed(frame)
+        chunk = chunker.pop()
+        while chunk is not None:
+            chunks.append(chunk)
+            chunk = chunker.pop()
+    return chunks
+
+
+def benchmark(seconds: float = 5.0, frame_ms: int = 20, runs: int = 50) -> None:
+    """
+    Print, per chunk, the peak memory allocated on top of the input and the time
+    taken by each path. Coalescers are warmed up first, so the ring's one-off
+    preallocation is not counted.
+    """
+    import time
+    import tracemalloc
+
+    chunk_bytes = int(48000 * 2 * seconds)
+    pcm = os.urandom(chunk_bytes)
+    frame_bytes = 48000 * 2 * frame_ms // 1000
+    frames = [pcm[i:i + frame_bytes] for i in range(0, chunk_bytes, frame_bytes)]
+
+    assert _legacy_upload(pcm) == _framed_upload(pcm)
+    assert _coalesce(_BytesChunker(chunk_bytes), frames) == _coalesce(PcmChunker(chunk_bytes), frames) == [pcm]
+
+    bytes_chunker, ring_chunker = _BytesChunker(chunk_bytes), PcmChunker(chunk_bytes)
+    cases = (
+        ("upload: wave+BytesIO", lambda: _legacy_upload(pcm)),
+        ("upload: header+view", lambda: _framed_upload(pcm)),
+        ("coalesce: bytes +=", lambda: _coalesce(bytes_chunker, frames)),
+        ("coalesce: ring", lambda: _coalesce(ring_chunker, frames)),
+    )
+    print(f"{seconds:.0f}s chunk of 48 kHz PCM ({chunk_bytes} bytes), {frame_ms} ms frames")
+    print(f"{'path':<24}{'peak bytes':>12}{'x chunk':>9}{'us':>10}")
+    for label, func in cases:
+        func()
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak -= baseline
+
+        started = time.perf_counter()
+        for _ in range(runs):
+            func()
+        elapsed = (time.perf_counter() - started) / runs
+        print(f"{label:<24}{peak:>12}{peak / chunk_bytes:>8.2f}x{elapsed * 1e6:>10.0f}")
+
+
+if __name__ == "__main__":
+    benchmark()
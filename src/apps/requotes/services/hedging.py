@@ -0,0 +1,135 @@
+"""
+Hedged requests for tail latency.
+
+`hedged_call` starts a request and, if it has not returned after the model's
+recent p-th percentile latency, starts a duplicate; the first successful response
+wins and the other is cancelled. Duplicates are paid for from `HedgeBudget`, which
+caps them at a fraction of all calls so a slow upstream is not hit twice as hard.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+from core.config import settings
+from core.database.metrics import LatencyHistogram
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Recent latencies of one model, for percentile thresholds."""
+
+    def __init__(self, window: int = 500):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self.histogram = LatencyHistogram()
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self.histogram.observe(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """p-th percentile of the window, or None until enough samples were seen."""
+        if len(self._samples) < settings.OPENAI_HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def snapshot(self) -> Dict:
+        return {
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "latency_seconds": self.histogram.snapshot(),
+        }
+
+
+class HedgeBudget:
+    """Token bucket: every call earns `ratio` of a hedge, every hedge spends one."""
+
+    def __init__(self, ratio: float, burst: float = 10.0):
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = 0.0
+
+    def earn(self) -> None:
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+
+    def spend(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class Hedger:
+    def __init__(self):
+        self.trackers: Dict[str, LatencyTracker] = {}
+        self.budget = HedgeBudget(settings.OPENAI_HEDGE_BUDGET)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+
+    def tracker(self, model: str) -> LatencyTracker:
+        if model not in self.trackers:
+            self.trackers[model] = LatencyTracker()
+        return self.trackers[model]
+
+    async def _timed(self, model: str, make_request: Callable[[], Awaitable[T]]) -> T:
+        started = time.perf_counter()
+        result = await make_request()
+        self.tracker(model).observe(time.perf_counter() - started)
+        return result
+
+    async def call(self, model: str, make_request: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `make_request()`, hedging it when enabled and the primary is slow.
+
+        Latencies are recorded even with hedging disabled, so thresholds are ready
+        as soon as it is turned on.
+        """
+        self.calls += 1
+        threshold = self.tracker(model).percentile(settings.OPENAI_HEDGE_PERCENTILE)
+        if not settings.OPENAI_HEDGE_ENABLED or threshold is None:
+            return await self._timed(model, make_request)
+
+        self.budget.earn()
+        primary = asyncio.create_task(self._timed(model, make_request))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=threshold)
+            if done:
+                return primary.result()
+            if not self.budget.spend():
+                self.budget_denied += 1
+                return await primary
+
+            self.hedges += 1
+            tasks.add(asyncio.create_task(self._timed(model, make_request)))
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def snapshot(self) -> Dict:
+        return {
+            "enabled": settings.OPENAI_HEDGE_ENABLED,
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "budget_denied": self.budget_denied,
+            "models": {model: tracker.snapshot() for model, tracker in self.trackers.items()},
+        }
+
+
+hedger = Hedger()
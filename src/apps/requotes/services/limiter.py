@@ -0,0 +1,259 @@
+"""
+Adaptive concurrency limiting for OpenAI calls.
+
+`AdaptiveLimiter` wraps every upstream call with:
+
+- an AIMD concurrency limit: +1 per window of fast successes, multiplicative
+  decrease on slow responses, 429s and timeouts;
+- jittered exponential retries for 429, timeouts, connection errors and 5xx
+  (honouring `Retry-After`);
+- a circuit breaker that fails fast after repeated failures and lets a single
+  probe through once the cooldown has passed;
+- fair queueing: waiting calls are served round-robin per connection (see
+  `connection_id`), so one busy socket cannot starve the others.
+"""
+import asyncio
+import random
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+import openai
+
+from core.config import settings
+from core.database.metrics import LatencyHistogram
+
+T = TypeVar("T")
+
+# Fairness key for queued calls; set once per websocket processing task
+connection_id: ContextVar[str] = ContextVar("openai_connection_id", default="")
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        name: str,
+        target_latency: float,
+        initial_limit: Optional[int] = None,
+        min_limit: Optional[int] = None,
+        max_limit: Optional[int] = None,
+        backoff_ratio: float = 0.5,
+        slow_ratio: float = 0.9,
+    ):
+        self.name = name
+        self.target_latency = target_latency
+        self.min_limit = min_limit or settings.OPENAI_MIN_CONCURRENCY
+        self.max_limit = max_limit or settings.OPENAI_MAX_CONCURRENCY
+        self.limit = float(initial_limit or settings.OPENAI_INITIAL_CONCURRENCY)
+        self.backoff_ratio = backoff_ratio
+        self.slow_ratio = slow_ratio
+
+        self.in_flight = 0
+        # connection id -> waiters, rotated round-robin
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._probing = False
+
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.circuit_opens = 0
+        self.latency = LatencyHistogram()
+        self.queue_wait = LatencyHistogram()
+
+    # Concurrency slots
+
+    @property
+    def queued(self) -> int:
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def _has_capacity(self) -> bool:
+        return self.in_flight < max(int(self.limit), self.min_limit)
+
+    async def _acquire(self) -> None:
+        if self._has_capacity() and not self._waiters:
+            self.in_flight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(connection_id.get(), deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled: pass it on
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._has_capacity():
+            key, waiters = next(iter(self._waiters.items()))
+            future = waiters.popleft()
+            if waiters:
+                self._waiters.move_to_end(key)
+            else:
+                del self._waiters[key]
+            if future.done():
+                continue  # cancelled while waiting
+            self.in_flight += 1
+            future.set_result(None)
+
+    # AIMD
+
+    def _on_success(self, latency: float) -> None:
+        if latency > self.target_latency:
+            self.limit = max(self.min_limit, self.limit * self.slow_ratio)
+        else:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._wake()
+
+    def _on_overload(self) -> None:
+        self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+
+    # Circuit breaker
+
+    def _check_circuit(self) -> None:
+        if self._consecutive_failures < settings.OPENAI_CIRCUIT_FAILURES:
+            return
+        if time.monotonic() < self._open_until or self._probing:
+            self.rejected += 1
+            raise CircuitOpenError(f"{self.name}: upstream unavailable, circuit open")
+        # Half open: this call is the probe
+        self._probing = True
+
+    def _record_failure(self) -> None:
+        self._consecutive_failures += 1
+        self._probing = False
+        if self._consecutive_failures >= settings.OPENAI_CIRCUIT_FAILURES:
+            now = time.monotonic()
+            if now >= self._open_until:
+                self.circuit_opens += 1
+            self._open_until = now + settings.OPENAI_CIRCUIT_COOLDOWN
+
+    def _record_success(self) -> None:
+        self._consecutive_failures = 0
+        self._probing = False
+
+    # Calls
+
+    async def call(self, make_request: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `make_request()` under the limiter, retrying transient failures.
+
+        `make_request` is called once per attempt, so it must build a fresh request
+        (e.g. rewind or recreate file buffers).
+        """
+        attempt = 0
+        while True:
+            self._check_circuit()
+            queued_at = time.perf_counter()
+            try:
+                await self._acquire()
+            except asyncio.CancelledError:
+                self._probing = False
+                raise
+            started = time.perf_counter()
+            self.queue_wait.observe(started - queued_at)
+            self.calls += 1
+            try:
+                result = await make_request()
+            except RETRYABLE_ERRORS as e:
+                self.latency.observe(time.perf_counter() - started)
+                self._release()
+                self._record_failure()
+                if isinstance(e, openai.RateLimitError):
+                    self.rate_limited += 1
+                    self._on_overload()
+                elif isinstance(e, openai.APITimeoutError):
+                    self.timeouts += 1
+                    self._on_overload()
+                if attempt >= settings.OPENAI_MAX_RETRIES:
+                    self.failures += 1
+                    raise
+                attempt += 1
+                self.retries += 1
+                delay = retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(8.0, 0.5 * 2 ** attempt))
+                await asyncio.sleep(delay)
+                continue
+            except asyncio.CancelledError:
+                self._release()
+                self._probing = False
+                raise
+            except Exception:
+                # Not transient (bad request, auth): no retry, no circuit trip
+                self._release()
+                self._probing = False
+                self.failures += 1
+                raise
+
+            latency = time.perf_counter() - started
+            self.latency.observe(latency)
+            self._release()
+            self._record_success()
+            self._on_success(latency)
+            self.successes += 1
+            return result
+
+    def snapshot(self) -> Dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "calls": self.calls,
+            "successes": self.successes,
+            "failures": self.failures,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "circuit_open": self._consecutive_failures >= settings.OPENAI_CIRCUIT_FAILURES
+                and time.monotonic() < self._open_until,
+            "circuit_opens": self.circuit_opens,
+            "latency_seconds": self.latency.snapshot(),
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+        }
+
+
+transcription_limiter = AdaptiveLimiter("transcription", settings.OPENAI_TRANSCRIBE_TARGET_LATENCY)
+detection_limiter = AdaptiveLimiter("detection", settings.OPENAI_DETECT_TARGET_LATENCY)
+
+
+def limiter_metrics() -> Dict:
+    return {
+        limiter.name: limiter.snapshot()
+        for limiter in (transcription_limiter, detection_limiter)
+    }
@@ -1,86 +1,49 @@
-import io
 from typing import List, Optional
 
 from openai import AsyncOpenAI
 from pydantic import BaseModel
-import wave
 
 from core.config import settings
+from .limiter import transcription_limiter, detection_limiter
+from .hedging import hedger
+from .audio import AudioFormat, DEFAULT_AUDIO_FORMAT, upload_file
+from .preprocess import audio_preprocessor
+from .cache import ResultCache, normalize_text, shared_backend
 
-client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+# Retries are handled by the limiters, which also see every 429 and timeout
+client = AsyncOpenAI(
+    api_key=settings.OPENAI_API_KEY,
+    max_retries=0,
+    timeout=settings.OPENAI_TIMEOUT,
+)
 
+TRANSCRIPTION_MODEL = "whisper-1"
 
-def create_wav_buffer(raw_data, sample_rate=48000, channels=1, sample_width=2):
-    """
-    Creates an in-memory WAV file buffer from raw PCM audio data.
-
-    This function takes raw PCM audio data and encodes it into a WAV file format 
-    using the specified audio parameters. The generated WAV file is stored in an 
-    in-memory `BytesIO` buffer, making it easy to use without writing to disk.
-
-    Args:
-        raw_data (bytes): The raw PCM audio data to be written to the WAV file.
-        sample_rate (int, optional): The sample rate of the audio in Hz. Defaults to 48000 Hz.
-        channels (int, optional): The number of audio channels (1 for mono, 2 for stereo). Defaults to 1 (mono).
-        sample_width (int, optional): The sample width in bytes (e.g., 2 for 16-bit audio). Defaults to 2.
 
-    Returns:
-        io.BytesIO: A `BytesIO` buffer containing the generated WAV file.
-                    The buffer's `.name` attribute is set to "file.wav" for convenience.
-
-    Notes:
-        - The function uses the `wave` module to format the audio data into a WAV file.
-        - The buffer is rewound to the beginning (`seek(0)`) before returning.
-        - The resulting buffer can be used for streaming, HTTP responses, or further processing.
+async def transcribe_chunk(audio_chunk: bytes, audio_format: AudioFormat = DEFAULT_AUDIO_FORMAT) -> str:
     """
-    wav_buffer = io.BytesIO()
-
-    with wave.open(wav_buffer, "wb") as wav_file:
-        wav_file.setnchannels(channels)
-        wav_file.setsampwidth(sample_width) 
-        wav_file.setframerate(sample_rate)  
-        wav_file.writeframes(raw_data)
-
-    wav_buffer.seek(0)
-    wav_buffer.name = "file.wav"
-    return wav_buffer
-
-
-
-async def transcript_to_text(audio_chunk: bytes) -> str:
-    """
-    Transcribes an audio chunk into text using OpenAI's Whisper model.
-
-    This function takes raw audio data, converts it into a WAV file buffer, 
-    and sends it to OpenAI's Whisper transcription service asynchronously. 
-    The transcribed text is then returned.
-
-    Args:
-        audio_chunk (bytes): The raw PCM audio data to be transcribed.
-
-    Returns:
-        str: The transcribed text from the audio.
-
-    Raises:
-        Exception: If the transcription process fails, an error message is printed.
-
-    Notes:
-        - The function uses `create_wav_buffer` to convert raw audio data into 
-          a WAV format before sending it for transcription.
-        - The Whisper model (`whisper-1`) is used for processing.
-        - If an exception occurs, it is caught and logged, but no specific 
-          error handling is implemented beyond printing the error.
+    Transcribe one chunk with OpenAI's Whisper model (`whisper-1`).
+
+    PCM chunks are downmixed and resampled to `AUDIO_UPLOAD_SAMPLE_RATE` and
+    encoded as `AUDIO_UPLOAD_CODEC` (WAV, FLAC or Opus) on `audio_preprocessor`;
+    Opus/WebM/FLAC/WAV chunks are forwarded untouched. The call goes through
+    `transcription_limiter`, which bounds concurrency and retries rate limits,
+    timeouts and server errors, and, with `OPENAI_HEDGE_ENABLED`, is duplicated
+    when slower than the model's recent `OPENAI_HEDGE_PERCENTILE` latency.
     """
-    try:
-        buffer = create_wav_buffer(audio_chunk)
-        transcription = await client.audio.transcriptions.create(
-            model="whisper-1",
-            file=buffer,
-        )
-        return transcription.text
-
-    except Exception as e:
-        print("Could not transcribe", e)
+    # Resampling and encoding are CPU bound (and may run ffmpeg): keep them off the loop
+    parts, filename = await audio_preprocessor.prepare(audio_chunk, audio_format)
+    transcription = await hedger.call(
+        TRANSCRIPTION_MODEL,
+        lambda: transcription_limiter.call(
+            # A fresh file object per attempt: a retried upload must start from byte 0
+            lambda: client.audio.transcriptions.create(
+                model=TRANSCRIPTION_MODEL,
+                file=upload_file(parts, filename),
+            )
+        ),
+    )
+    return transcription.text
 
 
 class QuoteId(BaseModel):
@@ -93,6 +56,16 @@ class QuoteIds(BaseModel):
     ids: List[QuoteId]
 
 
+detection_cache = ResultCache(
+    "detection",
+    maxsize=settings.OPENAI_DETECTION_CACHE_SIZE,
+    ttl=settings.OPENAI_DETECTION_CACHE_TTL,
+    encode=lambda ids: QuoteIds(ids=ids).model_dump_json(),
+    decode=lambda encoded: QuoteIds.model_validate_json(encoded).ids,
+    backend=shared_backend,
+)
+
+
 prompt = """\
 You are a precise Bible quote identification system. Given any input text, identify and extract only definitive Bible quotes (not paraphrases or similar-sounding passages).
 
@@ -144,19 +117,28 @@ async def detect_quotes(text: str) -> Optional[List[QuoteId]]:
     Notes:
         - If `text` is empty, the function returns `None` immediately.
         - Uses OpenAI's `gpt-4o-mini` model with a structured system prompt (`prompt`).
+        - The call goes through `detection_limiter`; errors left after its retries
+          (or `CircuitOpenError`) propagate to the caller.
+        - Results are memoized by normalized text (`detection_cache`).
         - The response is expected in a structured format defined by `QuoteIds`.
         - Ensure `client.beta.chat.completions.parse` is properly configured for structured outputs.
     """
     if not text:
         return
 
-    completion = await client.beta.chat.completions.parse(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": text},
-        ],
-        response_format=QuoteIds,
+    return await detection_cache.get_or_compute(normalize_text(text), lambda: _detect(text))
+
+
+async def _detect(text: str) -> List[QuoteId]:
+    completion = await detection_limiter.call(
+        lambda: client.beta.chat.completions.parse(
+            model="gpt-4o-mini",
+            messages=[
+                {"role": "system", "content": prompt},
+                {"role": "user", "content": text},
+            ],
+            response_format=QuoteIds,
+        )
     )
 
     return completion.choices[0].message.parsed.ids
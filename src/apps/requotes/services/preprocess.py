@@ -0,0 +1,187 @@
+"""
+Audio preprocessing off the event loop.
+
+Resampling and encoding a chunk is CPU bound. `AudioPreprocessor` runs it in a
+thread pool (NumPy releases the GIL for most of the work) or, with
+`AUDIO_PREPROCESS_EXECUTOR=process`, in a process pool. Process workers read the
+PCM from a `multiprocessing.shared_memory` block and write the upload file back
+into it, so neither the chunk nor the result is pickled.
+
+Per-stage timings are exposed on `/metrics`; a growing `queue_wait` means the
+pool, not the transcription API, has become the bottleneck.
+"""
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Sequence, Tuple
+
+from core.config import settings
+from core.database.metrics import LatencyHistogram
+from .audio import AudioFormat, prepare_chunk
+
+EXECUTORS = ("thread", "process")
+STAGES = ("queue_wait", "transfer", "resample", "encode", "total")
+
+# Extra room for the result behind the input: a chunk already at the upload
+# rate comes back as WAV, 44 bytes longer than it went in
+RESULT_SLACK = 1024
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        # The parent owns (and unlinks) the block: keep the worker's tracker out of it
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13
+        return shared_memory.SharedMemory(name=name)
+
+
+def _write_parts(buffer: memoryview, offset: int, parts: Sequence) -> None:
+    for part in parts:
+        buffer[offset:offset + len(part)] = part
+        offset += len(part)
+
+
+def _prepare_shared(name: str, size: int, audio_format: AudioFormat, submitted_at: float):
+    """
+    Process pool task: the PCM is `block[:size]`, the upload file is written
+    right behind it. Returns (result length or bytes, file name, timings).
+    """
+    timings = {"queue_wait": max(0.0, time.time() - submitted_at)}
+    block = _attach(name)
+    chunk = block.buf[:size]
+    parts = None
+    try:
+        parts, filename = prepare_chunk(chunk, audio_format, timings)
+        length = sum(len(part) for part in parts)
+        if size + length > block.size:
+            # Larger than the input (e.g. upsampling): pickle this one
+            return b"".join(parts), filename, timings
+        _write_parts(block.buf, size, parts)
+        return length, filename, timings
+    finally:
+        # Views of the block must be gone before it can be closed
+        del parts
+        chunk.release()
+        block.close()
+
+
+class StageTimings:
+    """Latency histogram per preprocessing stage."""
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {stage: LatencyHistogram() for stage in STAGES}
+
+    def observe(self, timings: Dict[str, float]) -> None:
+        for stage, seconds in timings.items():
+            self.histograms[stage].observe(seconds)
+
+    def snapshot(self) -> Dict:
+        return {
+            stage: {
+                "avg_ms": round(histogram.sum / histogram.count * 1000, 3) if histogram.count else None,
+                **histogram.snapshot(),
+            }
+            for stage, histogram in self.histograms.items()
+        }
+
+
+class AudioPreprocessor:
+    def __init__(self, kind: str, workers: int):
+        if kind not in EXECUTORS:
+            raise ValueError(f"AUDIO_PREPROCESS_EXECUTOR must be one of {EXECUTORS}, got {kind!r}")
+        self.kind = kind
+        self.workers = workers
+        self._executor: Optional[Executor] = None
+        self.timings = StageTimings()
+        self.pending = 0
+        self.max_pending = 0
+        self.pool_failures = 0
+
+    def start(self) -> Executor:
+        """Create the pool (also done lazily by the first chunk)."""
+        if self._executor is None:
+            if self.kind == "process":
+                # Never fork a process running an event loop and its threads
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            else:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="audio-preprocess")
+        return self._executor
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def prepare(self, chunk: bytes, audio_format: AudioFormat) -> Tuple[Sequence, str]:
+        """`prepare_chunk` on the pool: (upload file parts, file name)."""
+        if audio_format.is_passthrough:
+            # Forwarded as-is: nothing to offload
+            return prepare_chunk(chunk, audio_format)
+
+        executor = self.start()
+        self.pending += 1
+        self.max_pending = max(self.max_pending, self.pending)
+        started = time.perf_counter()
+        try:
+            if self.kind == "process":
+                parts, filename, timings = await self._prepare_in_process(executor, chunk, audio_format)
+            else:
+                parts, filename, timings = await self._prepare_in_thread(executor, chunk, audio_format)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM killed): start a fresh pool for the next chunk
+            self.pool_failures += 1
+            if self._executor is executor:
+                self._executor = None
+            raise
+        finally:
+            self.pending -= 1
+
+        timings["total"] = time.perf_counter() - started
+        self.timings.observe(timings)
+        return parts, filename
+
+    async def _prepare_in_thread(self, executor: Executor, chunk: bytes, audio_format: AudioFormat):
+        submitted = time.perf_counter()
+
+        def run():
+            timings = {"queue_wait": time.perf_counter() - submitted}
+            parts, filename = prepare_chunk(chunk, audio_format, timings)
+            return parts, filename, timings
+
+        return await asyncio.get_running_loop().run_in_executor(executor, run)
+
+    async def _prepare_in_process(self, executor: Executor, chunk: bytes, audio_format: AudioFormat):
+        size = len(chunk)
+        started = time.perf_counter()
+        block = shared_memory.SharedMemory(create=True, size=2 * size + RESULT_SLACK)
+        try:
+            block.buf[:size] = chunk
+            transfer = time.perf_counter() - started
+
+            result, filename, timings = await asyncio.get_running_loop().run_in_executor(
+                executor, _prepare_shared, block.name, size, audio_format, time.time()
+            )
+
+            copied = time.perf_counter()
+            data = bytes(block.buf[size:size + result]) if isinstance(result, int) else result
+            timings["transfer"] = transfer + time.perf_counter() - copied
+            return (data,), filename, timings
+        finally:
+            block.close()
+            block.unlink()
+
+    def snapshot(self) -> Dict:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "pool_failures": self.pool_failures,
+            "stages": self.timings.snapshot(),
+        }
+
+
+audio_preprocessor = AudioPreprocessor(settings.AUDIO_PREPROCESS_EXECUTOR, settings.AUDIO_PREPROCESS_WORKERS)
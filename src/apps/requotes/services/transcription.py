@@ -0,0 +1,309 @@
+"""
+Speech-to-text backends.
+
+`TRANSCRIPTION_BACKEND` picks how audio chunks become text:
+
+- `openai`: Whisper over the network (`openai.transcribe_chunk`), behind the
+  limiter, hedging and upload preprocessing;
+- `local`: a CTranslate2 Whisper model (`faster-whisper`, CPU only, int8 by
+  default) on a worker pool in this process, with no per-minute cost and no
+  network hop. Needs `pip install faster-whisper`; the model named by
+  `LOCAL_WHISPER_MODEL` is downloaded on first start.
+
+Either way results are memoized in `transcript_cache`. Run
+`python -m apps.requotes.services.transcription CORPUS_DIR` from `src/` to
+compare the backends' latency and throughput on the same recordings.
+"""
+import asyncio
+import io
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+
+from core.config import settings
+from core.database.metrics import LatencyHistogram
+from .audio import AudioFormat, DEFAULT_AUDIO_FORMAT, resample_pcm16
+from .cache import chunk_key, transcript_cache
+from .openai import transcribe_chunk
+
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+
+WHISPER_SAMPLE_RATE = 16000
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptionBackend(ABC):
+    """Turns one audio chunk into text. Subclasses implement `_transcribe`."""
+
+    name = "base"
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.latency = LatencyHistogram()
+
+    async def start(self) -> None:
+        """Acquire resources (models, pools) ahead of the first chunk."""
+
+    async def close(self) -> None:
+        pass
+
+    async def transcribe(self, audio_chunk: bytes, audio_format: AudioFormat = DEFAULT_AUDIO_FORMAT) -> str:
+        self.calls += 1
+        started = time.perf_counter()
+        try:
+            return await self._transcribe(audio_chunk, audio_format)
+        except Exception:
+            self.failures += 1
+            raise
+        finally:
+            self.latency.observe(time.perf_counter() - started)
+
+    @abstractmethod
+    async def _transcribe(self, audio_chunk: bytes, audio_format: AudioFormat) -> str:
+        """Text of one chunk; `transcribe` wraps it with the call metrics."""
+
+    def snapshot(self) -> Dict:
+        return {
+            "backend": self.name,
+            "calls": self.calls,
+            "failures": self.failures,
+            "latency_seconds": self.latency.snapshot(),
+        }
+
+
+class OpenAITranscriptionBackend(TranscriptionBackend):
+    name = "openai"
+
+    async def _transcribe(self, audio_chunk: bytes, audio_format: AudioFormat) -> str:
+        return await transcribe_chunk(audio_chunk, audio_format)
+
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """
+    faster-whisper on CPU. One model is shared by `workers` threads: CTranslate2
+    releases the GIL and runs up to `workers` transcriptions in parallel, each
+    on `cpu_threads` cores.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        model_name: str,
+        compute_type: str = "int8",
+        workers: int = 2,
+        cpu_threads: int = 2,
+        beam_size: int = 1,
+        language: Optional[str] = "en",
+    ):
+        super().__init__()
+        self.model_name = model_name
+        self.compute_type = compute_type
+        self.workers = workers
+        self.cpu_threads = cpu_threads
+        self.beam_size = beam_size
+        self.language = language
+        self._model = None
+        self._load_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="local-whisper")
+        return self._executor
+
+    def _load(self):
+        with self._load_lock:
+            if self._model is None:
+                if not FASTER_WHISPER_AVAILABLE:
+                    raise RuntimeError("faster-whisper is not installed")
+                self._model = WhisperModel(
+                    self.model_name,
+                    device="cpu",
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads,
+                    num_workers=self.workers,
+                )
+        return self._model
+
+    async def start(self) -> None:
+        # Loading (and maybe downloading) the model takes seconds: not on the loop
+        await asyncio.get_running_loop().run_in_executor(self._pool(), self._load)
+
+    async def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _run(self, audio_chunk: bytes, audio_format: AudioFormat) -> str:
+        model = self._load()
+        if audio_format.is_passthrough:
+            # Container chunks are decoded by faster-whisper itself (PyAV)
+            audio = io.BytesIO(audio_chunk)
+        else:
+            pcm = resample_pcm16(audio_chunk, audio_format.sample_rate, WHISPER_SAMPLE_RATE, audio_format.channels)
+            audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        segments, _ = model.transcribe(
+            audio,
+            language=self.language or None,
+            beam_size=self.beam_size,
+            vad_filter=True,
+        )
+        # Segments are generated lazily: consume them here, on the worker thread
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+    async def _transcribe(self, audio_chunk: bytes, audio_format: AudioFormat) -> str:
+        return await asyncio.get_running_loop().run_in_executor(self._pool(), self._run, audio_chunk, audio_format)
+
+
+def create_backend(name: str) -> TranscriptionBackend:
+    if name == "openai":
+        return OpenAITranscriptionBackend()
+    if name == "local":
+        return LocalWhisperBackend(
+            settings.LOCAL_WHISPER_MODEL,
+            compute_type=settings.LOCAL_WHISPER_COMPUTE_TYPE,
+            workers=settings.LOCAL_WHISPER_WORKERS,
+            cpu_threads=settings.LOCAL_WHISPER_CPU_THREADS,
+            beam_size=settings.LOCAL_WHISPER_BEAM_SIZE,
+            language=settings.LOCAL_WHISPER_LANGUAGE,
+        )
+    raise ValueError(f"Unknown TRANSCRIPTION_BACKEND: {name!r} (expected 'openai' or 'local')")
+
+
+transcription_backend = create_backend(settings.TRANSCRIPTION_BACKEND)
+
+
+async def transcript_to_text(audio_chunk: bytes, audio_format: AudioFormat = DEFAULT_AUDIO_FORMAT) -> Optional[str]:
+    """
+    Transcribes an audio chunk into text with the configured backend.
+
+    Args:
+        audio_chunk (bytes): The audio data to be transcribed.
+        audio_format (AudioFormat, optional): How the client encoded the chunk.
+            Defaults to 48 kHz mono 16-bit PCM.
+
+    Returns:
+        Optional[str]: The transcribed text from the audio, or `None` if the
+        transcription failed.
+
+    Notes:
+        - `TRANSCRIPTION_BACKEND` selects OpenAI's Whisper API or a local model
+          (see `OpenAITranscriptionBackend` and `LocalWhisperBackend`).
+        - Transcripts are memoized per backend by a hash of the audio data
+          (`transcript_cache`), so retransmitted or repeated chunks are not
+          transcribed again.
+        - Failures are logged with their traceback and not raised: one bad
+          chunk does not end the stream, it just yields no quotes.
+    """
+    backend = transcription_backend
+    try:
+        return await transcript_cache.get_or_compute(
+            f"{backend.name}:{audio_format.key}:{chunk_key(audio_chunk)}",
+            lambda: backend.transcribe(audio_chunk, audio_format),
+        )
+    except Exception:
+        logger.exception(f"Could not transcribe {len(audio_chunk)} byte chunk with the {backend.name} backend")
+        return None
+
+
+def _load_corpus(directory: str, chunk_seconds: float):
+    """(chunk, format, audio seconds) for each chunk of the recordings in `directory`."""
+    import os
+    import wave
+
+    chunks = []
+    passthrough = {".ogg": "opus", ".webm": "webm", ".flac": "flac"}
+    for filename in sorted(os.listdir(directory)):
+        path = os.path.join(directory, filename)
+        extension = os.path.splitext(filename)[1].lower()
+        if extension == ".wav":
+            with wave.open(path, "rb") as wav_file:
+                if wav_file.getsampwidth() != 2:
+                    print(f"Skipping {filename}: not 16-bit PCM")
+                    continue
+                audio_format = AudioFormat(
+                    sample_rate=wav_file.getframerate(), channels=wav_file.getnchannels()
+                )
+                frames_per_chunk = int(audio_format.sample_rate * chunk_seconds)
+                while True:
+                    pcm = wav_file.readframes(frames_per_chunk)
+                    if not pcm:
+                        break
+                    seconds = len(pcm) / (2 * audio_format.channels * audio_format.sample_rate)
+                    chunks.append((pcm, audio_format, seconds))
+        elif extension in passthrough:
+            # Sent whole, the way a MediaRecorder client sends one chunk; duration unknown
+            with open(path, "rb") as f:
+                chunks.append((f.read(), AudioFormat(codec=passthrough[extension]), None))
+    return chunks
+
+
+async def benchmark(directory: str, backends, chunk_seconds: float = 5.0, concurrency: int = 4) -> None:
+    """Transcribe the same corpus with each backend (uncached) and print latency and throughput."""
+    chunks = _load_corpus(directory, chunk_seconds)
+    if not chunks:
+        print(f"No .wav/.ogg/.webm/.flac recordings in {directory}")
+        return
+    audio_seconds = sum(seconds for _, _, seconds in chunks if seconds)
+    print(f"{len(chunks)} chunks, {audio_seconds:.0f}s of PCM audio, concurrency {concurrency}")
+    print(f"{'backend':<10}{'p50 s':>8}{'p95 s':>8}{'max s':>8}{'wall s':>9}{'chunks/s':>10}{'x realtime':>12}{'failed':>8}")
+
+    for name in backends:
+        backend = create_backend(name)
+        try:
+            await backend.start()
+        except Exception as e:
+            print(f"{name:<10}could not start: {e}")
+            await backend.close()
+            continue
+
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def run(chunk, audio_format):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    await backend.transcribe(chunk, audio_format)
+                except Exception as e:
+                    print(f"{name}: {e}")
+                    return
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(run(chunk, audio_format) for chunk, audio_format, _ in chunks))
+        wall = time.perf_counter() - started
+        await backend.close()
+
+        latencies.sort()
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] if latencies else float("nan")
+        print(
+            f"{name:<10}{percentile(50):>8.2f}{percentile(95):>8.2f}{percentile(100):>8.2f}{wall:>9.1f}"
+            f"{len(latencies) / wall:>10.2f}{audio_seconds / wall:>11.1f}x{len(chunks) - len(latencies):>8}"
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark transcription backends on a recorded corpus")
+    parser.add_argument("corpus", help="directory of .wav (16-bit PCM) and .ogg/.webm/.flac recordings")
+    parser.add_argument("--backends", nargs="+", default=["openai", "local"], choices=["openai", "local"])
+    parser.add_argument("--chunk-seconds", type=float, default=5.0, help="split WAV recordings into chunks this long")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.corpus, args.backends, args.chunk_seconds, args.concurrency))
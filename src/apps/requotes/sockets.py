@@ -0,0 +1,156 @@
+"""
+Helpers shared by the `/ws/detect-quotes` connection modes.
+
+Covers the audio format handshake, coalescing small PCM frames into chunks,
+sending to a socket that may already be gone and recording verse captures for
+the listeners a detected quote was delivered to.
+"""
+import json
+from typing import Iterable, Optional
+from uuid import uuid4
+
+from fastapi import WebSocket, WebSocketDisconnect
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.websockets import WebSocketState
+
+from apps.requotes.models import User
+from apps.requotes.services.audio import AudioFormat, DEFAULT_AUDIO_FORMAT, SAMPLE_WIDTH
+from apps.requotes.services.framing import PcmChunker
+from core.config import settings
+
+
+def is_connected(websocket: WebSocket) -> bool:
+    return (
+        websocket.client_state == WebSocketState.CONNECTED
+        and websocket.application_state == WebSocketState.CONNECTED
+    )
+
+
+async def send_json_if_connected(websocket: WebSocket, data) -> bool:
+    """Send to the client unless it has gone away. Returns whether it was sent."""
+    if not is_connected(websocket):
+        return False
+    try:
+        await websocket.send_json(data)
+        return True
+    except (WebSocketDisconnect, RuntimeError):
+        return False
+
+
+def _pcm_chunker(websocket: WebSocket) -> Optional[PcmChunker]:
+    """
+    Coalescer for this connection's PCM frames, created with the first audio
+    (once the format is settled). None when `DETECT_QUOTES_MIN_CHUNK_MS` is unset
+    or the client sends container chunks, which cannot be split or joined.
+    """
+    if not hasattr(websocket, "pcm_chunker"):
+        audio_format = getattr(websocket, "audio_format", DEFAULT_AUDIO_FORMAT)
+        chunker = None
+        if settings.DETECT_QUOTES_MIN_CHUNK_MS > 0 and not audio_format.is_passthrough:
+            frame_size = SAMPLE_WIDTH * audio_format.channels
+            min_bytes = audio_format.sample_rate * frame_size * settings.DETECT_QUOTES_MIN_CHUNK_MS // 1000
+            chunker = PcmChunker(min_bytes, frame_size)
+        websocket.pcm_chunker = chunker
+    return websocket.pcm_chunker
+
+
+async def receive_audio(websocket: WebSocket) -> bytes:
+    """
+    Next audio chunk from the client.
+
+    Text messages before the first chunk are format handshakes,
+    `{"type": "format", "codec": ..., "sample_rate": ..., "channels": ...}`,
+    which set `websocket.audio_format` and are acknowledged with the accepted
+    format. Invalid or late handshakes get an `{"error": ...}` reply.
+
+    With `DETECT_QUOTES_MIN_CHUNK_MS`, PCM frames are collected in a ring buffer
+    and returned as chunks of that duration; a partial chunk left at disconnect
+    is dropped.
+    """
+    while True:
+        chunker = getattr(websocket, "pcm_chunker", None)
+        if chunker is not None:
+            chunk = chunker.pop()
+            if chunk is not None:
+                return chunk
+
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+
+        if message.get("bytes") is not None:
+            websocket.audio_started = True
+            chunker = _pcm_chunker(websocket)
+            if chunker is None:
+                return message["bytes"]
+            chunker.feed(message["bytes"])
+            continue
+
+        if message.get("text") is not None:
+            if getattr(websocket, "audio_started", False):
+                await send_json_if_connected(websocket, {"error": "The audio format must be sent before any audio"})
+                continue
+            try:
+                handshake = json.loads(message["text"])
+                if not isinstance(handshake, dict) or handshake.get("type") != "format":
+                    raise ValueError("Expected a format handshake")
+                websocket.audio_format = AudioFormat.from_params(handshake)
+            except ValueError as e:
+                await send_json_if_connected(websocket, {"error": str(e)})
+                continue
+            await send_json_if_connected(websocket, {"type": "format", **websocket.audio_format.as_dict()})
+
+
+def _capture_upsert(id_type: str):
+    return text(f"""
+        INSERT INTO verse_captures ({id_type}, count)
+        VALUES (:tracking_id, 1)
+        ON CONFLICT ({id_type})
+        DO UPDATE SET
+            count = verse_captures.count + 1,
+            last_captured_at = NOW()
+    """)
+
+
+CAPTURE_UPSERTS = {
+    "user_id": _capture_upsert("user_id"),
+    "anonymous_id": _capture_upsert("anonymous_id"),
+}
+
+
+async def record_captures(session: AsyncSession, user_emails: Iterable[Optional[str]]) -> None:
+    """
+    Count one verse capture for each listener and commit.
+
+    Logged-in listeners are resolved in one query; anonymous listeners, and emails
+    without an account, get a fresh anonymous id per capture.
+    """
+    user_emails = list(user_emails)
+    emails = {email for email in user_emails if email}
+    user_ids = {}
+    if emails:
+        result = await session.execute(
+            select(User.email, User.id).where(User.email.in_(emails))
+        )
+        user_ids = dict(result.all())
+
+    params = {"user_id": [], "anonymous_id": []}
+    for email in user_emails:
+        if email in user_ids:
+            params["user_id"].append({"tracking_id": user_ids[email]})
+        else:
+            if email:
+                print("User not found, falling back to anonymous")
+            params["anonymous_id"].append({"tracking_id": str(uuid4())})
+
+    try:
+        for id_type, rows in params.items():
+            if rows:
+                await session.execute(CAPTURE_UPSERTS[id_type], rows)
+        await session.commit()
+        print("DONE UPDATING VERSECAPTURES")
+    except Exception as e:
+        print(f"DB update failed: {str(e)}")
+        await session.rollback()
+        raise
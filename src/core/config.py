@@ -4,7 +4,7 @@ import logging
 from dotenv import load_dotenv
 from pydantic_settings import BaseSettings
 from pydantic import Field
-from typing import ClassVar, List, Dict, Any
+from typing import ClassVar, List, Dict, Any, Optional
 
 load_dotenv(".env", override=True)
 logger = logging.getLogger(__name__)
@@ -29,6 +29,102 @@ class Settings(BaseSettings):
     BASE_URL: str = os.getenv("BASE_URL")
     PAYSTACK_SECRET_KEY: str = os.getenv("PAYSTACK_SECRET_KEY")
     DATA_DIR: str = Field(default="../../data",env="DATA_DIR")
+    JWT_CACHE_MAXSIZE: int = Field(default=10000, env="JWT_CACHE_MAXSIZE")
+    # Where /ws/detect-quotes saves unprocessed audio when a client disconnects (unset: discard it)
+    DETECT_QUOTES_BACKLOG_DIR: Optional[str] = Field(default=None, env="DETECT_QUOTES_BACKLOG_DIR")
+    # Coalesce small PCM websocket frames into chunks of this many ms (0: one chunk per message)
+    DETECT_QUOTES_MIN_CHUNK_MS: int = Field(default=0, env="DETECT_QUOTES_MIN_CHUNK_MS")
+
+    # Database engine / pool
+    # DB_PROFILE "render" targets Render's pooled Postgres (no prepared statement cache),
+    # "direct" targets a direct Postgres connection where asyncpg's cache is safe.
+    DB_PROFILE: str = Field(default="render", env="DB_PROFILE")
+    DB_POOL_SIZE: int = Field(default=15, env="DB_POOL_SIZE")  # Render free tier max is 20
+    DB_MAX_OVERFLOW: int = Field(default=5, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: int = Field(default=30, env="DB_POOL_TIMEOUT")
+    DB_POOL_RECYCLE: int = Field(default=300, env="DB_POOL_RECYCLE")
+    DB_POOL_PRE_PING: bool = Field(default=True, env="DB_POOL_PRE_PING")
+    DB_ECHO: bool = Field(default=False, env="DB_ECHO")
+    # Overrides the profile's asyncpg prepared statement cache size when set
+    DB_STATEMENT_CACHE_SIZE: Optional[int] = Field(default=None, env="DB_STATEMENT_CACHE_SIZE")
+    # Worker startup: "verify" only compares the schema stamp written by init_db,
+    # "create" runs the extension + create_all DDL (previous behaviour), "skip" does neither
+    DB_STARTUP_MODE: str = Field(default="verify", env="DB_STARTUP_MODE")
+    # Bible version the inspirational verse pool is read from (first version by name if unset)
+    INSPIRATIONAL_VERSE_VERSION: Optional[str] = Field(default=None, env="INSPIRATIONAL_VERSE_VERSION")
+
+    # Paystack HTTP client (base URL can point at a local mock server)
+    PAYSTACK_BASE_URL: str = Field(default="https://api.paystack.co", env="PAYSTACK_BASE_URL")
+    PAYSTACK_TIMEOUT: float = Field(default=10.0, env="PAYSTACK_TIMEOUT")
+    PAYSTACK_MAX_RETRIES: int = Field(default=2, env="PAYSTACK_MAX_RETRIES")
+
+    # Background payment reconciliation (interval 0 disables the worker)
+    PAYMENT_RECONCILE_INTERVAL: int = Field(default=60, env="PAYMENT_RECONCILE_INTERVAL")
+    PAYMENT_RECONCILE_MIN_AGE: int = Field(default=30, env="PAYMENT_RECONCILE_MIN_AGE")
+    PAYMENT_RECONCILE_MAX_AGE: int = Field(default=2 * 24 * 3600, env="PAYMENT_RECONCILE_MAX_AGE")
+    PAYMENT_RECONCILE_BATCH_SIZE: int = Field(default=100, env="PAYMENT_RECONCILE_BATCH_SIZE")
+    PAYMENT_RECONCILE_CONCURRENCY: int = Field(default=8, env="PAYMENT_RECONCILE_CONCURRENCY")
+    # Seconds a claimed payment is left to its reconciler before another may verify it
+    PAYMENT_RECONCILE_LEASE: int = Field(default=60, env="PAYMENT_RECONCILE_LEASE")
+
+    # Webhook inbox consumer (poll interval 0 disables it; events are then left unapplied)
+    PAYMENT_EVENT_POLL_INTERVAL: int = Field(default=5, env="PAYMENT_EVENT_POLL_INTERVAL")
+    PAYMENT_EVENT_BATCH_SIZE: int = Field(default=200, env="PAYMENT_EVENT_BATCH_SIZE")
+
+    # Admin dashboard statistics (interval 0 disables the refresher)
+    STATS_REFRESH_INTERVAL: int = Field(default=300, env="STATS_REFRESH_INTERVAL")
+    # Days of the daily series recomputed on each refresh; older days are final
+    STATS_SERIES_RECOMPUTE_DAYS: int = Field(default=2, env="STATS_SERIES_RECOMPUTE_DAYS")
+
+    # OpenAI calls: adaptive concurrency (AIMD), retries and circuit breaker
+    OPENAI_TIMEOUT: float = Field(default=30.0, env="OPENAI_TIMEOUT")
+    OPENAI_MAX_RETRIES: int = Field(default=3, env="OPENAI_MAX_RETRIES")
+    OPENAI_INITIAL_CONCURRENCY: int = Field(default=8, env="OPENAI_INITIAL_CONCURRENCY")
+    OPENAI_MIN_CONCURRENCY: int = Field(default=1, env="OPENAI_MIN_CONCURRENCY")
+    OPENAI_MAX_CONCURRENCY: int = Field(default=64, env="OPENAI_MAX_CONCURRENCY")
+    # Latency (seconds) above which the concurrency limit backs off
+    OPENAI_TRANSCRIBE_TARGET_LATENCY: float = Field(default=4.0, env="OPENAI_TRANSCRIBE_TARGET_LATENCY")
+    OPENAI_DETECT_TARGET_LATENCY: float = Field(default=4.0, env="OPENAI_DETECT_TARGET_LATENCY")
+    OPENAI_CIRCUIT_FAILURES: int = Field(default=5, env="OPENAI_CIRCUIT_FAILURES")
+    OPENAI_CIRCUIT_COOLDOWN: float = Field(default=30.0, env="OPENAI_CIRCUIT_COOLDOWN")
+    # Hedged transcription: duplicate a call still running after the model's p-th percentile latency
+    OPENAI_HEDGE_ENABLED: bool = Field(default=False, env="OPENAI_HEDGE_ENABLED")
+    OPENAI_HEDGE_PERCENTILE: float = Field(default=95.0, env="OPENAI_HEDGE_PERCENTILE")
+    # Extra calls allowed, as a fraction of all calls
+    OPENAI_HEDGE_BUDGET: float = Field(default=0.05, env="OPENAI_HEDGE_BUDGET")
+    OPENAI_HEDGE_MIN_SAMPLES: int = Field(default=50, env="OPENAI_HEDGE_MIN_SAMPLES")
+
+    # Memoized transcripts (by PCM hash) and detections (by normalized transcript)
+    OPENAI_TRANSCRIPT_CACHE_SIZE: int = Field(default=2048, env="OPENAI_TRANSCRIPT_CACHE_SIZE")
+    OPENAI_TRANSCRIPT_CACHE_TTL: int = Field(default=3600, env="OPENAI_TRANSCRIPT_CACHE_TTL")
+    OPENAI_DETECTION_CACHE_SIZE: int = Field(default=4096, env="OPENAI_DETECTION_CACHE_SIZE")
+    OPENAI_DETECTION_CACHE_TTL: int = Field(default=24 * 3600, env="OPENAI_DETECTION_CACHE_TTL")
+    # SQLite file shared by the workers on a host (unset: in-process caches only)
+    OPENAI_CACHE_SQLITE_PATH: Optional[str] = Field(default=None, env="OPENAI_CACHE_SQLITE_PATH")
+
+    # Audio uploaded for transcription: resample rate (0 keeps the client rate) and codec (wav, flac, opus)
+    AUDIO_UPLOAD_SAMPLE_RATE: int = Field(default=16000, env="AUDIO_UPLOAD_SAMPLE_RATE")
+    AUDIO_UPLOAD_CODEC: str = Field(default="wav", env="AUDIO_UPLOAD_CODEC")
+    AUDIO_OPUS_BITRATE: str = Field(default="24k", env="AUDIO_OPUS_BITRATE")
+    # Where resampling/encoding runs: "thread" pool or "process" pool (PCM passed via shared memory)
+    AUDIO_PREPROCESS_EXECUTOR: str = Field(default="thread", env="AUDIO_PREPROCESS_EXECUTOR")
+    AUDIO_PREPROCESS_WORKERS: int = Field(default=4, env="AUDIO_PREPROCESS_WORKERS")
+
+    # Speech-to-text: "openai" (Whisper API) or "local" (faster-whisper on CPU)
+    TRANSCRIPTION_BACKEND: str = Field(default="openai", env="TRANSCRIPTION_BACKEND")
+    # faster-whisper model size (tiny.en, base.en, small.en, ...) or a local CTranslate2 model directory
+    LOCAL_WHISPER_MODEL: str = Field(default="base.en", env="LOCAL_WHISPER_MODEL")
+    LOCAL_WHISPER_COMPUTE_TYPE: str = Field(default="int8", env="LOCAL_WHISPER_COMPUTE_TYPE")
+    LOCAL_WHISPER_WORKERS: int = Field(default=2, env="LOCAL_WHISPER_WORKERS")  # parallel transcriptions
+    LOCAL_WHISPER_CPU_THREADS: int = Field(default=2, env="LOCAL_WHISPER_CPU_THREADS")  # per transcription
+    LOCAL_WHISPER_BEAM_SIZE: int = Field(default=1, env="LOCAL_WHISPER_BEAM_SIZE")
+    LOCAL_WHISPER_LANGUAGE: Optional[str] = Field(default="en", env="LOCAL_WHISPER_LANGUAGE")
+
+    @property
+    def db_statement_cache_size(self) -> int:
+        if self.DB_STATEMENT_CACHE_SIZE is not None:
+            return self.DB_STATEMENT_CACHE_SIZE
+        return 100 if self.DB_PROFILE == "direct" else 0
     THEMES: ClassVar[List[Dict[str, Any]]] = [
     {
         "name": "default",
@@ -3,10 +3,15 @@ Async database session manager for PostgreSQL with SQLAlchemy
 Optimized for Render deployment and FastAPI integration
 """
 import os
+import hashlib
+import logging
 from asyncio import current_task
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex, CreateTable
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_scoped_session,
@@ -15,14 +20,34 @@ from sqlalchemy.ext.asyncio import (
 )
 from sqlalchemy.orm import declarative_base
 from core.config import settings
+from .metrics import InstrumentedAsyncPool, pool_metrics
+from .migrations import head_revision, run_migrations
 
 Base = declarative_base()
+logger = logging.getLogger(__name__)
+
+
+def metadata_fingerprint() -> str:
+    """
+    Hash of the DDL the registered models would create.
+    Written to `schema_stamp` by init_db and compared by workers at startup,
+    together with the Alembic revision (see `verify_schema`).
+    """
+    dialect = postgresql.dialect()
+    statements = []
+    for table in Base.metadata.sorted_tables:
+        statements.append(str(CreateTable(table).compile(dialect=dialect)))
+        for index in sorted(table.indexes, key=lambda i: i.name or ""):
+            statements.append(str(CreateIndex(index).compile(dialect=dialect)))
+    return hashlib.sha256("\n".join(statements).encode()).hexdigest()
 
 class DatabaseSessionManager:
     """
     Enhanced database session manager with:
-    - Automatic table creation
-    - Connection pooling optimized for Render
+    - Table creation and migrations from the deploy step, schema stamp and
+      revision check on worker startup
+    - Connection pooling configured through Settings (DB_* variables)
+    - Pool checkout metrics
     - Proper SSL handling
     - UUID extension management
     """
@@ -32,21 +57,31 @@ class DatabaseSessionManager:
         self.session_factory = None
         self._session = None
 
-    async def init(self):
-        """Initialize engine and verify connection"""
+    async def init(self, startup_mode: str = None):
+        """
+        Initialize engine and verify connection.
+
+        `startup_mode` defaults to settings.DB_STARTUP_MODE:
+        - "verify": compare the schema stamp with the models and the Alembic
+          revision with the head (one small query)
+        - "create": run extension + table DDL and migrations, as the deploy step does
+        - "skip": only build the engine
+        """
         db_url = self._ensure_ssl(settings.APOSTGRES_DATABASE_URL)
         
         self.engine = create_async_engine(
             db_url,
-            pool_size=15,  # Render free tier max is 20
-            max_overflow=5,
-            pool_timeout=30,
-            pool_recycle=300,  # Recycle connections every 5 minutes
-            pool_pre_ping=True,  # Check connection health
-            echo=False,  # Set to True for debugging
+            poolclass=InstrumentedAsyncPool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            echo=settings.DB_ECHO,
             connect_args={
                 "ssl": "require" if "render.com" in db_url else None,
-                "prepared_statement_cache_size": 0  # Disable for Render
+                # 0 (disabled) on the "render" profile, asyncpg's default on "direct"
+                "prepared_statement_cache_size": settings.db_statement_cache_size
             }
         )
         
@@ -56,9 +91,11 @@ class DatabaseSessionManager:
             autoflush=False
         )
         
-        # Verify connection and setup
-        async with self.engine.begin() as conn:
-            await self._setup_database(conn)
+        startup_mode = startup_mode or settings.DB_STARTUP_MODE
+        if startup_mode == "create":
+            await self.create_schema()
+        elif startup_mode == "verify":
+            await self.verify_schema()
 
     def _ensure_ssl(self, db_url: str) -> str:
         """Ensure SSL is properly configured for Render"""
@@ -71,6 +108,72 @@ class DatabaseSessionManager:
         await conn.execute(text('CREATE EXTENSION IF NOT EXISTS "uuid-ossp"'))
         await conn.run_sync(Base.metadata.create_all)
 
+    @staticmethod
+    def _create_missing_indexes(sync_conn):
+        """Indexes the models declare on tables that existed before them"""
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(sync_conn, checkfirst=True)
+
+    async def _stamp_schema(self, conn):
+        """Record the fingerprint of the models the schema was built from"""
+        await conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_stamp (
+                id INTEGER PRIMARY KEY,
+                fingerprint VARCHAR NOT NULL,
+                stamped_at TIMESTAMP NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+            )
+        """))
+        await conn.execute(
+            text("""
+                INSERT INTO schema_stamp (id, fingerprint) VALUES (1, :fingerprint)
+                ON CONFLICT (id) DO UPDATE
+                SET fingerprint = EXCLUDED.fingerprint, stamped_at = now() AT TIME ZONE 'utc'
+            """),
+            {"fingerprint": metadata_fingerprint()}
+        )
+
+    async def create_schema(self):
+        """
+        Run the schema DDL once (deploy step, see init_db.py).
+
+        create_all only adds missing tables; the Alembic revisions then bring
+        existing tables up to date (deduplicating rows before their unique
+        indexes, for one), and any index the models declare that is still
+        missing is created. The stamp is written only once all of it succeeded.
+        """
+        async with self.engine.begin() as conn:
+            await self._setup_database(conn)
+        async with self.engine.connect() as conn:
+            await run_migrations(conn)
+        async with self.engine.begin() as conn:
+            await conn.run_sync(self._create_missing_indexes)
+            await self._stamp_schema(conn)
+
+    async def verify_schema(self) -> bool:
+        """
+        Check the schema stamp against the models and the Alembic revision
+        against the head, in one query and without any DDL or catalog
+        inspection. A mismatch is logged, not raised, so a worker can still serve.
+        """
+        async with self.engine.connect() as conn:
+            try:
+                stamp, revision = (await conn.execute(text("""
+                    SELECT (SELECT fingerprint FROM schema_stamp WHERE id = 1),
+                           (SELECT version_num FROM alembic_version)
+                """))).one()
+            except DBAPIError:
+                stamp = revision = None
+        head = head_revision()
+        if stamp != metadata_fingerprint() or revision != head:
+            logger.warning(
+                f"Database schema (stamp {stamp and stamp[:12]}, revision {revision}) does not match "
+                f"the models and migration head {head}; "
+                "run `python -m core.database.init_db` from the deploy step"
+            )
+            return False
+        return True
+
     @property
     def session(self) -> async_scoped_session:
         """Scoped session for the current async task"""
@@ -83,15 +186,38 @@ class DatabaseSessionManager:
 
     @asynccontextmanager
     async def get_session(self) -> AsyncGenerator[AsyncSession, None]:
-        """Context manager for safe session handling"""
-        async with self.session() as session:
+        """
+        Context manager for safe session handling.
+
+        Sessions are lazy: no pooled connection is checked out until the first
+        query, and nothing is committed if the session never started a transaction.
+        """
+        if not self.session_factory:
+            raise RuntimeError("DatabaseSessionManager not initialized")
+        async with self.session_factory() as session:
             try:
                 yield session
-                await session.commit()
+                if session.in_transaction():
+                    await session.commit()
             except Exception:
                 await session.rollback()
                 raise
 
+    def pool_status(self) -> dict:
+        """Current pool occupancy plus checkout counters and latency histograms"""
+        if not self.engine:
+            raise RuntimeError("DatabaseSessionManager not initialized")
+        pool = self.engine.pool
+        return {
+            "profile": settings.DB_PROFILE,
+            "size": pool.size(),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            **pool_metrics.snapshot(),
+        }
+
     async def close(self):
         """Cleanup connection pool"""
         if self.engine:
@@ -102,7 +228,8 @@ session_manager = DatabaseSessionManager()
 
 async def aget_db() -> AsyncGenerator[AsyncSession, None]:
     """
-    FastAPI dependency for database sessions
+    FastAPI dependency for database sessions.
+    Opt in per route; the connection is acquired on the session's first query.
     Usage:
     @router.get("/")
     async def endpoint(db: AsyncSession = Depends(aget_db)):
@@ -1,8 +1,18 @@
 # src/core/database/init_db.py
+"""
+Deploy-time schema setup. Runs the extension + table DDL and the Alembic
+migrations once, then writes the schema stamp that workers check on startup
+(DB_STARTUP_MODE=verify). Run from `src/`: `python -m core.database.init_db`.
+"""
+import os
+import sys
 import asyncio
 import logging
-from src.core.database._db import session_manager
-from src.apps.requotes.models import Base
+
+# Allow running the file directly as well
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from core.database._db import session_manager
+import apps.requotes.models  # noqa: F401  (register models on Base.metadata)
 
 # Configure logging (optional but consistent)
 logging.basicConfig(level=logging.INFO)
@@ -11,7 +21,7 @@ logger = logging.getLogger(__name__)
 async def init_db():
     try:
         logger.info("Initializing database engine...")
-        await session_manager.init()
+        await session_manager.init(startup_mode="skip")
         logger.info("Database engine initialized.")
     except Exception as e:
         logger.error(f"❌ Failed to initialize engine: {e}")
@@ -21,10 +31,9 @@ async def init_db():
         raise RuntimeError("❌ session_manager.engine is None after init()")
 
     try:
-        logger.info("Creating database tables...")
-        async with session_manager.engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
-            logger.info("✅ Database tables created successfully.")
+        logger.info("Creating database tables and running migrations...")
+        await session_manager.create_schema()
+        logger.info("✅ Database tables created, migrated to head and schema stamped.")
     except Exception as e:
         logger.error(f"❌ Failed to create tables: {e}")
         raise
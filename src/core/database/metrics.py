@@ -0,0 +1,129 @@
+"""
+Connection pool instrumentation.
+
+`InstrumentedAsyncPool` is a drop-in `AsyncAdaptedQueuePool` that times every
+checkout, so pool sizing can be based on observed wait times instead of guesses.
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class LatencyHistogram:
+    """Cumulative latency histogram (Prometheus style buckets, in seconds)."""
+
+    BUCKETS: Tuple[float, ...] = (
+        0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+    )
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def snapshot(self) -> Dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[f"le_{bound}"] = cumulative
+        buckets["le_inf"] = self.count
+        return {"count": self.count, "sum": round(self.sum, 6), "buckets": buckets}
+
+
+# Taking an idle connection off the queue takes microseconds; longer is a wait
+WAIT_THRESHOLD_SECONDS = 0.001
+
+
+class PoolMetrics:
+    """Counters and histograms collected by `InstrumentedAsyncPool`."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waits = 0
+        self.connects = 0
+        self.checkout_latency = LatencyHistogram()
+        self.wait_time = LatencyHistogram()
+        self.connect_time = LatencyHistogram()
+
+    def record_checkout(self, seconds: float, connect_seconds: Optional[List[float]] = None) -> None:
+        """
+        One checkout that took `seconds`, `connect_seconds` of which were spent
+        opening new connections. The rest was spent waiting on the pool.
+        """
+        connect_seconds = connect_seconds or []
+        self.checkouts += 1
+        self.checkout_latency.observe(seconds)
+        for connect in connect_seconds:
+            self.connects += 1
+            self.connect_time.observe(connect)
+        waited = seconds - sum(connect_seconds)
+        if waited >= WAIT_THRESHOLD_SECONDS:
+            self.waits += 1
+            self.wait_time.observe(waited)
+
+    def snapshot(self) -> Dict:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "waits": self.waits,
+            "connects": self.connects,
+            "checkout_latency_seconds": self.checkout_latency.snapshot(),
+            "wait_time_seconds": self.wait_time.snapshot(),
+            "connect_time_seconds": self.connect_time.snapshot(),
+        }
+
+
+pool_metrics = PoolMetrics()
+
+# Connect times of the checkout in progress in this task
+_connect_seconds: ContextVar[Optional[List[float]]] = ContextVar("pool_connect_seconds", default=None)
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records checkout latency.
+
+    Opening a new connection is timed separately (`connect_time`); a checkout
+    "waited" when the time left over, spent blocked on the pool, is measurable.
+    """
+
+    def _do_get(self):
+        if _connect_seconds.get() is not None:
+            # QueuePool retrying itself: timed by the outer call
+            return super()._do_get()
+
+        connects: List[float] = []
+        token = _connect_seconds.set(connects)
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.timeouts += 1
+            raise
+        finally:
+            _connect_seconds.reset(token)
+            pool_metrics.record_checkout(time.perf_counter() - start, connects)
+
+    def _create_connection(self):
+        start = time.perf_counter()
+        try:
+            return super()._create_connection()
+        finally:
+            connects = _connect_seconds.get()
+            if connects is not None:
+                connects.append(time.perf_counter() - start)
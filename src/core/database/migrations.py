@@ -0,0 +1,52 @@
+"""
+Alembic from inside the application.
+
+`alembic upgrade head` (run from `src/`) and `run_migrations` below use the same
+revisions and env.py; the latter runs them on a connection of an existing
+engine, e.g. from the deploy step.
+"""
+import os
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def alembic_config() -> Config:
+    """`src/alembic.ini` with absolute paths, usable from any working directory."""
+    config = Config(os.path.join(SRC_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(SRC_DIR, "alembic"))
+    # Keep the application's logging setup
+    config.attributes["configure_logger"] = False
+    return config
+
+
+def head_revision() -> str:
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+async def current_revision(conn: AsyncConnection):
+    """The revision the database is at, None if it was never migrated."""
+    try:
+        return await conn.scalar(text("SELECT version_num FROM alembic_version"))
+    except DBAPIError:
+        await conn.rollback()
+        return None
+
+
+async def run_migrations(conn: AsyncConnection, revision: str = "head") -> None:
+    """
+    Upgrade to `revision` on `conn`. The connection must not be in a transaction:
+    each revision runs in its own, and some step out of it (CREATE INDEX CONCURRENTLY).
+    """
+    def upgrade(sync_conn):
+        config = alembic_config()
+        config.attributes["connection"] = sync_conn
+        command.upgrade(config, revision)
+
+    await conn.run_sync(upgrade)
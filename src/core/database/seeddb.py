@@ -97,7 +97,7 @@ async def seed_themes(session: AsyncSession):
             price=theme_data.get("price", 0),
             preview_image_url=theme_data.get("preview_image_url", ""),
             is_default=theme_data.get("is_default", False),
-            styles=json.dumps(theme_data.get("styles", {}))
+            styles=theme_data.get("styles", {})  # JSON column; don't pre-encode
         )
         session.add(theme)
         seeded_count += 1
@@ -0,0 +1,70 @@
+"""
+Periodic background workers run inside the app process.
+
+Workers are started from the app lifespan and stopped on shutdown; every worker
+process runs its own copy, so `run_once` implementations must be idempotent.
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicWorker(ABC):
+    """
+    Background task calling `run_once` every `interval` seconds, or sooner when nudged.
+
+    Subclasses implement `interval` and `run_once`. An interval of 0 or less
+    disables the worker.
+    """
+
+    name = "worker"
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    @property
+    @abstractmethod
+    def interval(self) -> int:
+        """Seconds between passes."""
+
+    @abstractmethod
+    async def run_once(self) -> int:
+        """One pass; returns how many items were processed."""
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def nudge(self) -> None:
+        """Run the next pass now instead of waiting for the interval."""
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                done = await self.run_once()
+                if done:
+                    logger.info(f"{self.name}: processed {done}")
+            except Exception as e:
+                logger.error(f"{self.name} failed: {str(e)}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
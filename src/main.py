@@ -1,12 +1,26 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from core.database import session_manager, aget_db
+from core.security import verify_api_key
 from apps.requotes.router import router as bible_quotes_router
 from apps.auth.router import router as auth_router
+from apps.auth.emails import email_templates
+from apps.auth.themes import theme_catalog
+from apps.auth.verses import verse_pool
+from apps.auth.paystack import paystack_client
+from apps.auth.payments import payment_reconciler, payment_event_consumer
+from apps.auth.stats import stats_refresher
+from apps.requotes.rooms import room_registry
+from apps.requotes.services.limiter import limiter_metrics
+from apps.requotes.services.hedging import hedger
+from apps.requotes.services.cache import cache_metrics
+from apps.requotes.services.preprocess import audio_preprocessor
+from apps.requotes.services.transcription import transcription_backend
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 import logging
 from contextlib import asynccontextmanager
+from typing import Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,10 +37,53 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Database initialization failed: {str(e)}")
         raise
+
+    # Compile transactional email templates once per worker
+    email_templates.load()
+
+    # Load the static theme catalog once per worker (falls back to first request)
+    try:
+        async with session_manager.get_session() as session:
+            await theme_catalog.load(session)
+    except Exception as e:
+        logger.warning(f"Theme catalog not loaded at startup: {str(e)}")
+
+    # Precompute the curated inspirational verse pool (falls back to first request)
+    try:
+        async with session_manager.get_session() as session:
+            await verse_pool.load(session)
+    except Exception as e:
+        logger.warning(f"Inspirational verse pool not loaded from the store: {str(e)}")
     
+    # Pooled HTTP client shared by all Paystack calls
+    await paystack_client.start()
+
+    # Settle pending payments in the background
+    payment_reconciler.start()
+    payment_event_consumer.start()
+
+    # Keep the admin dashboard snapshot fresh
+    stats_refresher.start()
+
+    # Worker pool for audio resampling/encoding
+    audio_preprocessor.start()
+
+    # Load the speech-to-text model (local backend) before the first chunk
+    try:
+        await transcription_backend.start()
+    except Exception as e:
+        logger.warning(f"Transcription backend {transcription_backend.name} not started: {str(e)}")
+
     yield  # App runs here
     
     # Shutdown
+    await transcription_backend.close()
+    audio_preprocessor.stop()
+    await stats_refresher.stop()
+    await payment_event_consumer.stop()
+    await payment_reconciler.stop()
+    await paystack_client.close()
+
     try:
         logger.info("Closing database connections...")
         await session_manager.close()
@@ -38,7 +95,7 @@ app = FastAPI(
     title="Bible API",
     description="API for Bible quotes and resources",
     lifespan=lifespan,
-    dependencies=[Depends(aget_db)]  # Auto-inject db session to all routes
+    # No app-wide db dependency: routes that need a session opt in with Depends(aget_db)
 )
 
 # CORS Configuration
@@ -68,6 +125,25 @@ async def health_check(db: AsyncSession = Depends(aget_db)):
             "error": str(e)
         }
 
+# Runtime metrics endpoint
+@app.get("/metrics", tags=["Health Check"])
+async def metrics(
+    api_key: Optional[str] = None,
+    x_api_key: Optional[str] = Header(default=None)
+):
+    """Runtime metrics; needs the API key as `api_key` query parameter or `X-API-Key` header."""
+    if not verify_api_key(api_key or x_api_key):
+        raise HTTPException(status_code=401, detail="Invalid API key")
+    return {
+        "db_pool": session_manager.pool_status(),
+        "detect_quotes_rooms": room_registry.stats(),
+        "openai": limiter_metrics(),
+        "openai_hedging": hedger.snapshot(),
+        "openai_cache": cache_metrics(),
+        "audio_preprocess": audio_preprocessor.snapshot(),
+        "transcription": transcription_backend.snapshot(),
+    }
+
 # Include routers
 app.include_router(bible_quotes_router, tags=["Bible Quotes"])
 app.include_router(auth_router, tags=["Authentication"])
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+Shared fixtures.
+
+The application is imported from `src/` the way it runs in production.
+`fake_openai` is an in-process OpenAI API behind a real `AsyncOpenAI` client.
+Tests using the `database` fixture need a Postgres server: set
+TEST_DATABASE_URL (e.g. postgresql+asyncpg://postgres@localhost/postgres) and
+each test gets a fresh database created from it; without it they are skipped.
+"""
+import asyncio
+import os
+import sys
+import uuid
+
+import httpx
+import pytest
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+# Settings are read at import time; the values only need to be present
+for name, value in {
+    "APOSTGRES_DATABASE_URL": "postgresql+asyncpg://postgres@localhost/postgres",
+    "API_KEY": "test-api-key",
+    "OPENAI_API_KEY": "sk-test",
+    "SECRET_KEY": "test-secret",
+    "ALGORITHM": "HS256",
+    "SENDGRID_API_KEY": "test",
+    "BASE_URL": "http://localhost",
+    "PAYSTACK_SECRET_KEY": "sk_test",
+}.items():
+    os.environ.setdefault(name, value)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def database_url():
+    """URL of an empty database that is dropped after the test."""
+    import asyncpg
+
+    base_url = os.environ.get("TEST_DATABASE_URL")
+    if not base_url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    server_url = base_url.replace("+asyncpg", "")
+    name = f"test_{uuid.uuid4().hex[:12]}"
+    admin = await asyncpg.connect(server_url)
+    try:
+        await admin.execute(f'CREATE DATABASE "{name}"')
+    finally:
+        await admin.close()
+
+    yield base_url.rsplit("/", 1)[0] + "/" + name
+
+    admin = await asyncpg.connect(server_url)
+    try:
+        await admin.execute(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)')
+    finally:
+        await admin.close()
+
+
+@pytest.fixture
+async def database(database_url, monkeypatch):
+    """`session_manager` bound to a fresh database with the deployed schema."""
+    from core.config import settings
+    from core.database import session_manager
+
+    monkeypatch.setattr(settings, "APOSTGRES_DATABASE_URL", database_url)
+    await session_manager.init(startup_mode="create")
+    try:
+        yield session_manager
+    finally:
+        await session_manager.close()
+
+
+class FakeOpenAI:
+    """
+    In-process OpenAI API. Every request is recorded and answered by
+    `respond(request)` (a transcription by default); `active` and `max_active`
+    count requests in flight.
+    """
+
+    def __init__(self):
+        from openai import AsyncOpenAI
+
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.cancelled = 0
+        self.respond = self.transcription
+        self.client = AsyncOpenAI(
+            api_key="sk-test",
+            base_url="http://fake-openai/v1",
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(self._handle)),
+        )
+
+    async def transcription(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"text": "In the beginning God created the heaven and the earth."})
+
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            return await self.respond(request)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture
+def fake_openai():
+    return FakeOpenAI()
+
+
+@pytest.fixture
+def openai_services(fake_openai, monkeypatch):
+    """
+    The OpenAI service layer talking to `fake_openai`, with fresh limiters,
+    hedger and result caches instead of the module-level ones other tests used.
+    """
+    from apps.requotes.services import cache, openai as openai_service, transcription
+    from apps.requotes.services.hedging import Hedger
+    from apps.requotes.services.limiter import AdaptiveLimiter
+    from core.config import settings
+
+    monkeypatch.setattr(cache, "caches", {})
+    monkeypatch.setattr(openai_service, "client", fake_openai.client)
+    monkeypatch.setattr(openai_service, "hedger", Hedger())
+    monkeypatch.setattr(
+        openai_service, "transcription_limiter",
+        AdaptiveLimiter("transcription", settings.OPENAI_TRANSCRIBE_TARGET_LATENCY),
+    )
+    monkeypatch.setattr(
+        openai_service, "detection_limiter",
+        AdaptiveLimiter("detection", settings.OPENAI_DETECT_TARGET_LATENCY),
+    )
+    monkeypatch.setattr(openai_service, "detection_cache", cache.ResultCache(
+        "detection",
+        maxsize=settings.OPENAI_DETECTION_CACHE_SIZE,
+        ttl=settings.OPENAI_DETECTION_CACHE_TTL,
+        encode=openai_service.detection_cache._encode,
+        decode=openai_service.detection_cache._decode,
+    ))
+    monkeypatch.setattr(transcription, "transcript_cache", cache.ResultCache(
+        "transcript",
+        maxsize=settings.OPENAI_TRANSCRIPT_CACHE_SIZE,
+        ttl=settings.OPENAI_TRANSCRIPT_CACHE_TTL,
+    ))
+    return fake_openai
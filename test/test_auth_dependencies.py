@@ -0,0 +1,35 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from apps.auth.dependencies import decode_token, get_token_email
+from core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+def token(email: str, ttl: float = 60) -> str:
+    return jwt.encode({"sub": email, "exp": time.time() + ttl}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+
+async def test_get_token_email():
+    assert await get_token_email(token("a@example.com")) == "a@example.com"
+    with pytest.raises(HTTPException) as error:
+        await get_token_email("not-a-jwt")
+    assert error.value.status_code == 401
+
+
+def test_claims_cache_is_safe_across_threads():
+    # Short-lived tokens make the cache expire and evict entries while other threads read it
+    tokens = [token(f"user{n}@example.com", ttl=0.5 + n % 3) for n in range(200)]
+
+    def decode_all(offset):
+        return [decode_token(t)["sub"] for t in tokens[offset:] + tokens[:offset]]
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(decode_all, range(0, 200, 25)))
+
+    assert all(sorted(result) == sorted(f"user{n}@example.com" for n in range(200)) for result in results)
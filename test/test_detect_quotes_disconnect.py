@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from core.config import settings
+from core.database import session_manager
+from core.security import hash_key
+from main import app
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def lazy_sessions():
+    """An engine that is never connected to: sessions only connect on their first query."""
+    asyncio.run(session_manager.init(startup_mode="skip"))
+    yield
+    asyncio.run(session_manager.close())
+
+
+def test_no_upstream_calls_after_client_disconnects(fake_openai, openai_services, lazy_sessions, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "API_KEY", hash_key("ws-key"))
+    monkeypatch.setattr(settings, "DETECT_QUOTES_BACKLOG_DIR", str(tmp_path))
+
+    async def slow_transcription(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(30)
+        return await fake_openai.transcription(request)
+
+    fake_openai.respond = slow_transcription
+
+    with TestClient(app).websocket_connect("/ws/detect-quotes?api_key=ws-key&version=kjv") as websocket:
+        # Distinct chunks, so the transcript cache cannot serve any of them
+        for n in range(4):
+            websocket.send_bytes(bytes([n]) * 9600)
+        wait_for(lambda: fake_openai.active == 1)
+
+    # Leaving the session waits for the handler: the in-flight call is aborted and
+    # the queued chunks are saved for offline processing instead of being sent
+    assert len(list(tmp_path.glob("*.json"))) == 1
+    assert len(fake_openai.requests) == 1
+    assert fake_openai.cancelled == 1
+    assert fake_openai.active == 0
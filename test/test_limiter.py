@@ -0,0 +1,180 @@
+import asyncio
+import time
+
+import httpx
+import openai
+import pytest
+
+from apps.requotes.services.limiter import AdaptiveLimiter, CircuitOpenError, connection_id
+from core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+def error(status: int, retry_after: str = None) -> httpx.Response:
+    headers = {"retry-after": retry_after} if retry_after is not None else {}
+    return httpx.Response(status, headers=headers, json={"error": {"message": f"status {status}", "type": "test"}})
+
+
+def transcribe(fake_openai, model: str = "whisper-1"):
+    return lambda: fake_openai.client.audio.transcriptions.create(model=model, file=("chunk.wav", b"RIFF"))
+
+
+def requested_model(request: httpx.Request) -> str:
+    # The model is a field of the multipart upload
+    return request.content.split(b'name="model"\r\n\r\n')[1].split(b"\r\n")[0].decode()
+
+
+@pytest.fixture(autouse=True)
+def fast_failures(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_MAX_RETRIES", 3)
+    monkeypatch.setattr(settings, "OPENAI_CIRCUIT_FAILURES", 3)
+    monkeypatch.setattr(settings, "OPENAI_CIRCUIT_COOLDOWN", 0.2)
+
+
+async def test_concurrency_stays_within_the_limit(fake_openai):
+    limiter = AdaptiveLimiter("test", target_latency=1.0, initial_limit=2, min_limit=1, max_limit=2)
+
+    async def slow(request):
+        await asyncio.sleep(0.02)
+        return await fake_openai.transcription(request)
+
+    fake_openai.respond = slow
+    await asyncio.gather(*(limiter.call(transcribe(fake_openai)) for _ in range(10)))
+
+    assert fake_openai.max_active == 2
+    assert limiter.successes == 10
+    assert limiter.in_flight == 0
+
+
+async def test_aimd_grows_on_fast_calls_and_backs_off_on_slow_calls_and_429s(fake_openai):
+    # A target well above the fake's latency, so only the deliberately slow call misses it
+    limiter = AdaptiveLimiter("test", target_latency=0.3, initial_limit=4, min_limit=1, max_limit=16)
+
+    for _ in range(8):
+        await limiter.call(transcribe(fake_openai))
+    assert 5 < limiter.limit < 6
+
+    grown = limiter.limit
+    responses = iter([error(429, retry_after="0"), None])
+
+    async def rate_limited_once(request):
+        return next(responses) or await fake_openai.transcription(request)
+
+    fake_openai.respond = rate_limited_once
+    await limiter.call(transcribe(fake_openai))
+    assert limiter.rate_limited == 1
+    # Halved by the 429, then one additive step for the successful retry
+    assert limiter.limit == pytest.approx(grown / 2 + 1 / (grown / 2))
+
+    before = limiter.limit
+
+    async def slow(request):
+        await asyncio.sleep(0.4)
+        return await fake_openai.transcription(request)
+
+    fake_openai.respond = slow
+    await limiter.call(transcribe(fake_openai))
+    assert limiter.limit == pytest.approx(before * 0.9)
+
+
+async def test_retries_honour_retry_after(fake_openai):
+    limiter = AdaptiveLimiter("test", target_latency=1.0, initial_limit=4)
+    responses = iter([error(429, retry_after="0.2"), error(503, retry_after="0.1"), None])
+
+    async def flaky(request):
+        return next(responses) or await fake_openai.transcription(request)
+
+    fake_openai.respond = flaky
+    started = time.monotonic()
+    transcription = await limiter.call(transcribe(fake_openai))
+
+    assert transcription.text.startswith("In the beginning")
+    assert time.monotonic() - started >= 0.3
+    assert len(fake_openai.requests) == 3
+    assert limiter.retries == 2
+
+
+async def test_retries_stop_after_max_retries_and_do_not_cover_client_errors(fake_openai, monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_CIRCUIT_FAILURES", 100)
+    limiter = AdaptiveLimiter("test", target_latency=1.0, initial_limit=4)
+
+    async def down(request):
+        return error(503, retry_after="0")
+
+    fake_openai.respond = down
+    with pytest.raises(openai.InternalServerError):
+        await limiter.call(transcribe(fake_openai))
+    assert len(fake_openai.requests) == settings.OPENAI_MAX_RETRIES + 1
+
+    async def bad_request(request):
+        return error(400)
+
+    fake_openai.respond = bad_request
+    with pytest.raises(openai.BadRequestError):
+        await limiter.call(transcribe(fake_openai))
+    assert len(fake_openai.requests) == settings.OPENAI_MAX_RETRIES + 2
+
+
+async def test_circuit_opens_then_lets_a_single_probe_through(fake_openai, monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_MAX_RETRIES", 0)
+    limiter = AdaptiveLimiter("test", target_latency=1.0, initial_limit=4)
+
+    async def down(request):
+        return error(500)
+
+    fake_openai.respond = down
+    for _ in range(3):
+        with pytest.raises(openai.InternalServerError):
+            await limiter.call(transcribe(fake_openai))
+
+    # Open: fail fast without calling upstream
+    with pytest.raises(CircuitOpenError):
+        await limiter.call(transcribe(fake_openai))
+    assert len(fake_openai.requests) == 3
+
+    await asyncio.sleep(0.25)
+
+    async def recovered(request):
+        await asyncio.sleep(0.05)
+        return await fake_openai.transcription(request)
+
+    fake_openai.respond = recovered
+    # Half open: the first call probes, concurrent ones are still rejected
+    probe, other = await asyncio.gather(
+        limiter.call(transcribe(fake_openai)),
+        limiter.call(transcribe(fake_openai)),
+        return_exceptions=True,
+    )
+    assert probe.text.startswith("In the beginning")
+    assert isinstance(other, CircuitOpenError)
+    assert len(fake_openai.requests) == 4
+
+    # The probe closed the circuit
+    await limiter.call(transcribe(fake_openai))
+    assert len(fake_openai.requests) == 5
+    assert limiter.circuit_opens == 1
+
+
+async def test_queued_calls_are_served_round_robin_per_connection(fake_openai):
+    limiter = AdaptiveLimiter("test", target_latency=1.0, initial_limit=1, min_limit=1, max_limit=1)
+
+    async def slow(request):
+        await asyncio.sleep(0.01)
+        return await fake_openai.transcription(request)
+
+    fake_openai.respond = slow
+
+    async def call_from(connection: str, model: str):
+        connection_id.set(connection)
+        await limiter.call(transcribe(fake_openai, model))
+
+    busy = [asyncio.create_task(call_from("busy", f"busy-{n}")) for n in range(6)]
+    await asyncio.sleep(0)
+    quiet = asyncio.create_task(call_from("quiet", "quiet"))
+    await asyncio.gather(*busy, quiet)
+
+    order = [requested_model(request) for request in fake_openai.requests]
+    # FIFO would serve the quiet connection last; round-robin serves it next
+    assert order[:3] == ["busy-0", "busy-1", "quiet"]
+    assert order[3:] == [f"busy-{n}" for n in range(2, 6)]
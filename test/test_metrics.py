@@ -0,0 +1,56 @@
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from core.config import settings
+from core.database.metrics import InstrumentedAsyncPool, pool_metrics
+from core.security import hash_key
+from main import app
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_metrics_need_the_api_key(database, monkeypatch):
+    monkeypatch.setattr(settings, "API_KEY", hash_key("metrics-key"))
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/metrics")).status_code == 401
+        assert (await client.get("/metrics", params={"api_key": "wrong"})).status_code == 401
+
+        response = await client.get("/metrics", headers={"X-API-Key": "metrics-key"})
+        assert response.status_code == 200
+        assert "connects" in response.json()["db_pool"]
+        assert (await client.get("/metrics", params={"api_key": "metrics-key"})).status_code == 200
+
+
+async def test_opening_connections_is_not_counted_as_waiting(database_url):
+    engine = create_async_engine(database_url, poolclass=InstrumentedAsyncPool, pool_size=2, max_overflow=0)
+    pool_metrics.reset()
+    try:
+        # Two checkouts from an empty pool: both open a connection, neither waits
+        async with engine.connect() as first, engine.connect() as second:
+            await first.execute(text("SELECT 1"))
+            await second.execute(text("SELECT 1"))
+        assert pool_metrics.connects == 2
+        assert pool_metrics.waits == 0
+
+        # A third checkout while both are held blocks until one is returned
+        async def hold():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+                await asyncio.sleep(0.2)
+
+        holders = [asyncio.create_task(hold()) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        await asyncio.gather(*holders)
+
+        assert pool_metrics.connects == 2
+        assert pool_metrics.waits == 1
+        assert pool_metrics.wait_time.sum >= 0.1
+    finally:
+        await engine.dispose()
+        pool_metrics.reset()
@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.dialects import postgresql
+
+from apps.requotes.models import User, UserActivity
+from core.database.migrations import current_revision, head_revision, run_migrations
+
+pytestmark = pytest.mark.anyio
+
+ACTIVITY_INDEXES = ("ix_user_activities_user_type_date", "ix_user_activities_verse_caught")
+
+
+async def explain(conn, stmt) -> str:
+    sql = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    rows = await conn.execute(text(f"EXPLAIN {sql}"))
+    return "\n".join(row[0] for row in rows)
+
+
+async def test_activity_indexes_migration_builds_concurrently_and_serves_hot_queries(database):
+    engine = database.engine
+    # A database from before the activity indexes revision
+    async with engine.begin() as conn:
+        for name in ACTIVITY_INDEXES:
+            await conn.execute(text(f"DROP INDEX {name}"))
+        await conn.execute(text("UPDATE alembic_version SET version_num = '2f7e9b1c5a44'"))
+
+        await conn.execute(insert(User), [
+            {"user_name": f"user{n}", "email": f"user{n}@example.com", "password": "x"} for n in range(200)
+        ])
+        user_id = await conn.scalar(select(User.id).limit(1))
+        await conn.execute(text("""
+            INSERT INTO user_activities (user_id, activity_type, activity_data, activity_date)
+            SELECT u.id,
+                   (ARRAY['verse_caught', 'daily_login', 'verse_shared'])[1 + n % 3],
+                   'Book ' || n % 66,
+                   now() - n * interval '1 hour'
+            FROM users u, generate_series(1, 150) n
+        """))
+
+    async with engine.connect() as conn:
+        await run_migrations(conn)
+
+    async with engine.connect() as conn:
+        assert await current_revision(conn) == head_revision()
+        await conn.execute(text("ANALYZE user_activities"))
+
+        verse_count = select(func.count()).where(
+            UserActivity.user_id == user_id, UserActivity.activity_type == "verse_caught"
+        )
+        unique_books = select(func.count(UserActivity.activity_data.distinct())).where(
+            UserActivity.user_id == user_id, UserActivity.activity_type == "verse_caught"
+        )
+        last_login = (
+            select(UserActivity)
+            .where(UserActivity.user_id == user_id, UserActivity.activity_type == "daily_login")
+            .order_by(UserActivity.activity_date.desc())
+            .limit(1)
+        )
+
+        assert "ix_user_activities_verse_caught" in await explain(conn, verse_count)
+        assert "ix_user_activities_verse_caught" in await explain(conn, unique_books)
+        assert "ix_user_activities_user_type_date" in await explain(conn, last_login)
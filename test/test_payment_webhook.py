@@ -0,0 +1,39 @@
+import hashlib
+import hmac
+import json
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from apps.requotes.models import PaymentEvent
+from core.config import settings
+from main import app
+
+pytestmark = pytest.mark.anyio
+
+
+def signed(body: bytes) -> dict:
+    signature = hmac.new(settings.PAYSTACK_SECRET_KEY.encode(), msg=body, digestmod=hashlib.sha512).hexdigest()
+    return {"x-paystack-signature": signature, "content-type": "application/json"}
+
+
+async def post(body: bytes) -> httpx.Response:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await client.post("/api/payment-webhook", content=body, headers=signed(body))
+
+
+@pytest.mark.parametrize("body", [b"[]", b'"charge.success"', b"42", b'{"event": "charge.success", "data": []}'])
+async def test_non_object_payloads_are_rejected(database, body):
+    assert (await post(body)).status_code == 400
+
+
+async def test_event_is_recorded_once(database):
+    body = json.dumps({"event": "charge.success", "data": {"id": 7, "reference": "ref-7"}}).encode()
+
+    assert (await post(body)).status_code == 200
+    assert (await post(body)).status_code == 200
+
+    async with database.get_session() as session:
+        events = (await session.execute(select(PaymentEvent))).scalars().all()
+    assert [(event.id, event.reference) for event in events] == [("charge.success:7", "ref-7")]
@@ -0,0 +1,178 @@
+import asyncio
+import json
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select, text
+
+from apps.auth import payments
+from apps.auth.payments import PaymentEventConsumer, PaymentReconciler, mark_supporters
+from apps.requotes.models import Achievement, Payment, PaymentEvent, User
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def donor(database):
+    async with database.get_session() as session:
+        user = User(user_name="donor", email="donor@example.com", password="x")
+        session.add(user)
+        await session.flush()
+        session.add_all(
+            Payment(
+                user_id=user.id,
+                amount=50,
+                paystack_reference=f"ref-{n}",
+                status="pending",
+                payment_metadata={"original_usd_amount": 10},
+                created_at=datetime.utcnow() - timedelta(minutes=5),
+            )
+            for n in range(6)
+        )
+    return user
+
+
+async def supporter_achievements(database) -> int:
+    async with database.get_session() as session:
+        return await session.scalar(
+            select(func.count()).select_from(Achievement).where(Achievement.tag == "Supporter")
+        )
+
+
+async def test_concurrent_settlement_verifies_and_applies_each_payment_once(database, donor, monkeypatch):
+    verified = Counter()
+
+    async def fetch_transaction(reference):
+        verified[reference] += 1
+        await asyncio.sleep(0.05)
+        return {"status": "success", "channel": "card", "metadata": {"original_usd_amount": 10}}
+
+    monkeypatch.setattr(payments, "fetch_transaction", fetch_transaction)
+    async with database.get_session() as session:
+        session.add_all(
+            PaymentEvent(
+                id=f"charge.success:{n}",
+                event_type="charge.success",
+                reference=f"ref-{n}",
+                payload=json.dumps({"data": {"status": "success", "channel": "bank"}}),
+            )
+            for n in range(3)
+        )
+
+    settled = await asyncio.gather(
+        PaymentReconciler().reconcile_once(),
+        PaymentReconciler().reconcile_once(),
+        PaymentEventConsumer().run_once(),
+    )
+
+    assert settled[2] == 3
+    assert all(count == 1 for count in verified.values())
+    async with database.get_session() as session:
+        statuses = (await session.execute(select(Payment.status))).scalars().all()
+        assert statuses == ["success"] * 6
+        assert await session.scalar(select(User.is_supporter))
+    assert await supporter_achievements(database) == 1
+
+
+async def test_payments_are_not_locked_while_paystack_is_called(database, donor, monkeypatch):
+    called, release = asyncio.Event(), asyncio.Event()
+
+    async def fetch_transaction(reference):
+        called.set()
+        await release.wait()
+        return {"status": "success", "channel": "card"}
+
+    monkeypatch.setattr(payments, "fetch_transaction", fetch_transaction)
+    reconcile = asyncio.create_task(PaymentReconciler().reconcile_once())
+    await called.wait()
+
+    # What /api/verify-payment does meanwhile: lock a claimed payment and settle it
+    async with database.get_session() as session:
+        payment = await session.scalar(
+            select(Payment).where(Payment.paystack_reference == "ref-0").with_for_update(nowait=True)
+        )
+        payment.status = "failed"
+    release.set()
+
+    assert await reconcile == 5
+    async with database.get_session() as session:
+        statuses = dict((await session.execute(select(Payment.paystack_reference, Payment.status))).all())
+    assert statuses.pop("ref-0") == "failed"
+    assert set(statuses.values()) == {"success"}
+
+
+async def test_nudged_payments_skip_the_minimum_age(database, donor, monkeypatch):
+    verified = []
+
+    async def fetch_transaction(reference):
+        verified.append(reference)
+        return {"status": "success", "channel": "card"}
+
+    monkeypatch.setattr(payments, "fetch_transaction", fetch_transaction)
+    async with database.get_session() as session:
+        session.add(Payment(
+            user_id=donor.id, amount=5, paystack_reference="ref-new", status="pending", payment_metadata={}
+        ))
+
+    reconciler = PaymentReconciler()
+    assert await reconciler.reconcile_once() == 6
+    assert "ref-new" not in verified
+
+    reconciler.nudge("ref-new")
+    assert await reconciler.reconcile_once() == 1
+    assert verified[-1] == "ref-new"
+
+
+async def test_malformed_events_do_not_block_the_inbox(database, donor):
+    async with database.get_session() as session:
+        session.add_all([
+            PaymentEvent(
+                id="charge.success:1", event_type="charge.success", reference="ref-1",
+                payload=json.dumps({"data": {"status": "success", "channel": "bank"}}),
+            ),
+            PaymentEvent(
+                id="charge.success:2", event_type="charge.success", reference="ref-2",
+                payload=json.dumps({"data": {"channel": "bank"}}),
+            ),
+            PaymentEvent(
+                id="charge.success:3", event_type="charge.success", reference="ref-3",
+                payload=json.dumps({"data": {"status": "success", "channel": "card"}}),
+            ),
+        ])
+
+    assert await PaymentEventConsumer().run_once() == 3
+
+    async with database.get_session() as session:
+        events = {event.id: event for event in (await session.execute(select(PaymentEvent))).scalars()}
+        statuses = dict((await session.execute(select(Payment.paystack_reference, Payment.status))).all())
+    assert all(event.processed_at for event in events.values())
+    assert events["charge.success:2"].error == "unexpected transaction status None"
+    assert events["charge.success:1"].error is None
+    assert (statuses["ref-1"], statuses["ref-2"], statuses["ref-3"]) == ("success", "pending", "success")
+
+
+async def test_mark_supporters_concurrently_awards_once(database, donor):
+    async def mark():
+        async with database.get_session() as session:
+            await mark_supporters(session, [donor.id])
+
+    await asyncio.gather(*(mark() for _ in range(5)))
+
+    assert await supporter_achievements(database) == 1
+
+
+async def test_deploy_dedupes_achievements(database, donor):
+    async with database.engine.begin() as conn:
+        await conn.execute(text("DROP INDEX uq_achievements_user_tag"))
+        await conn.execute(text("UPDATE alembic_version SET version_num = 'd41a7e3c9f28'"))
+        for _ in range(3):
+            await conn.execute(
+                Achievement.__table__.insert().values(
+                    user_id=donor.id, name="VerseCatch Supporter", tag="Supporter", requirement="-"
+                )
+            )
+
+    await database.create_schema()
+
+    assert await supporter_achievements(database) == 1
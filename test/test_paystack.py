@@ -0,0 +1,117 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from apps.auth.paystack import PaystackClient
+from core.config import settings
+
+pytestmark = pytest.mark.anyio
+
+
+class FakePaystack(ThreadingHTTPServer):
+    """
+    Local Paystack API over real sockets. Responses are taken from `responses`
+    (then 200 with a successful transaction); `connections` counts the TCP
+    connections clients opened.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakePaystackHandler)
+        self.requests = []
+        self.responses = []
+        self.connections = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class FakePaystackHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so a pooled client can reuse its connection
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("Authorization")))
+        if self.server.responses:
+            status, body = self.server.responses.pop(0)
+        else:
+            reference = self.path.rsplit("/", 1)[-1]
+            status, body = 200, {"status": True, "data": {"reference": reference, "status": "success"}}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_paystack(monkeypatch):
+    server = FakePaystack()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(settings, "PAYSTACK_BASE_URL", server.url)
+    monkeypatch.setattr(settings, "PAYSTACK_MAX_RETRIES", 2)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+async def client(fake_paystack):
+    client = PaystackClient()
+    await client.start()
+    yield client
+    await client.close()
+
+
+async def test_verify_transaction_reuses_one_connection(client, fake_paystack):
+    for n in range(5):
+        status, body = await client.verify_transaction(f"ref-{n}")
+        assert status == 200
+        assert body["data"] == {"reference": f"ref-{n}", "status": "success"}
+
+    assert fake_paystack.requests[0] == ("/transaction/verify/ref-0", f"Bearer {settings.PAYSTACK_SECRET_KEY}")
+    assert len(fake_paystack.requests) == 5
+    assert fake_paystack.connections == 1
+
+
+async def test_transient_errors_are_retried(client, fake_paystack):
+    fake_paystack.responses = [(503, {"status": False}), (429, {"status": False})]
+
+    status, body = await client.verify_transaction("ref-1")
+
+    assert status == 200
+    assert body["data"]["reference"] == "ref-1"
+    assert len(fake_paystack.requests) == 3
+
+
+async def test_retries_give_up_with_the_last_response(client, fake_paystack):
+    fake_paystack.responses = [(502, {"status": False, "message": "bad gateway"})] * 4
+
+    status, body = await client.verify_transaction("ref-1")
+
+    assert status == 502
+    assert body["message"] == "bad gateway"
+    assert len(fake_paystack.requests) == settings.PAYSTACK_MAX_RETRIES + 1
+
+
+async def test_client_errors_are_not_retried(client, fake_paystack):
+    fake_paystack.responses = [(400, {"status": False, "message": "Transaction reference not found"})]
+
+    status, body = await client.verify_transaction("missing")
+
+    assert status == 400
+    assert body["message"] == "Transaction reference not found"
+    assert len(fake_paystack.requests) == 1
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from apps.requotes.services.cache import ResultCache
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_lookups_share_one_call():
+    cache = ResultCache("test-shared", maxsize=10, ttl=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "text"
+
+    results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+
+    assert results == ["text"] * 5
+    assert calls == 1
+    assert await cache.get_or_compute("k", compute) == "text"
+    assert calls == 1
+
+
+async def test_waiters_recover_when_the_owner_is_cancelled():
+    cache = ResultCache("test-cancelled", maxsize=10, ttl=60)
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return f"text {calls}"
+
+    owner = asyncio.create_task(cache.get_or_compute("k", compute))
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(cache.get_or_compute("k", compute)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    owner.cancel()
+
+    # One waiter takes over and the others join it instead of racing on the key
+    assert await asyncio.gather(*waiters) == ["text 2"] * 3
+    assert calls == 2
+    assert owner.cancelled()
+    assert not cache._inflight
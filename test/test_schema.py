@@ -0,0 +1,33 @@
+import pytest
+from sqlalchemy import text
+
+pytestmark = pytest.mark.anyio
+
+
+async def index_exists(database, name: str) -> bool:
+    async with database.engine.connect() as conn:
+        return await conn.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": name})
+
+
+async def test_fresh_schema_verifies(database):
+    assert await database.verify_schema()
+
+
+async def test_unmigrated_database_fails_verification_until_deployed(database):
+    async with database.engine.begin() as conn:
+        await conn.execute(text("UPDATE alembic_version SET version_num = 'd41a7e3c9f28'"))
+
+    assert not await database.verify_schema()
+    await database.create_schema()
+    assert await database.verify_schema()
+
+
+async def test_deploy_creates_model_indexes_missing_from_existing_tables(database):
+    # Same stamp and revision, but an index that was never built
+    async with database.engine.begin() as conn:
+        await conn.execute(text("DROP INDEX ix_user_activities_user_type_date"))
+
+    await database.create_schema()
+
+    assert await index_exists(database, "ix_user_activities_user_type_date")
+    assert await database.verify_schema()
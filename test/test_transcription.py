@@ -0,0 +1,49 @@
+import logging
+
+import pytest
+
+from apps.requotes.services import transcription
+from apps.requotes.services.transcription import TranscriptionBackend, transcript_to_text
+
+pytestmark = pytest.mark.anyio
+
+
+class FailingBackend(TranscriptionBackend):
+    name = "failing"
+
+    async def _transcribe(self, audio_chunk, audio_format):
+        raise RuntimeError("upstream down")
+
+
+class EchoBackend(TranscriptionBackend):
+    name = "echo"
+
+    async def _transcribe(self, audio_chunk, audio_format):
+        return audio_chunk.decode()
+
+
+def test_backends_must_implement_transcribe():
+    class Incomplete(TranscriptionBackend):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+async def test_transcript_to_text_uses_the_configured_backend(monkeypatch):
+    backend = EchoBackend()
+    monkeypatch.setattr(transcription, "transcription_backend", backend)
+
+    assert await transcript_to_text(b"in the beginning") == "in the beginning"
+    assert backend.calls == 1
+
+
+async def test_failed_transcription_is_logged_and_returns_none(monkeypatch, caplog):
+    backend = FailingBackend()
+    monkeypatch.setattr(transcription, "transcription_backend", backend)
+
+    with caplog.at_level(logging.ERROR, logger=transcription.__name__):
+        assert await transcript_to_text(b"\x00\x01" * 100) is None
+
+    assert backend.failures == 1
+    assert "upstream down" in caplog.text
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, select, text
+
+from apps.auth.router import unlock_theme
+from apps.requotes.models import Theme, User, UserTheme
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_user_and_theme(database, coins: int, price: int):
+    async with database.get_session() as session:
+        user = User(user_name="buyer", email="buyer@example.com", password="x", faith_coins=coins)
+        theme = Theme(name="dawn", display_name="Dawn", price=price, preview_image_url="dawn.png")
+        session.add_all([user, theme])
+    return user, theme
+
+
+async def test_deploy_dedupes_user_themes_and_creates_the_unique_index(database):
+    user, theme = await add_user_and_theme(database, coins=0, price=10)
+    # A database from before the index, with duplicate rows from racing unlocks
+    async with database.engine.begin() as conn:
+        await conn.execute(text("DROP INDEX uq_user_themes_user_theme"))
+        await conn.execute(text("DROP TABLE alembic_version"))
+        for unlocked in (False, True, False):
+            await conn.execute(
+                UserTheme.__table__.insert().values(user_id=user.id, theme_id=theme.id, unlocked=unlocked)
+            )
+
+    await database.create_schema()
+
+    async with database.engine.connect() as conn:
+        unlocked = (await conn.execute(select(UserTheme.unlocked))).scalars().all()
+        assert unlocked == [True]
+        assert await conn.scalar(text(
+            "SELECT indisunique FROM pg_index WHERE indexrelid = 'uq_user_themes_user_theme'::regclass"
+        ))
+
+
+async def test_parallel_unlocks_charge_once(database):
+    user, theme = await add_user_and_theme(database, coins=100, price=30)
+
+    async def unlock():
+        async with database.get_session() as session:
+            try:
+                return (await unlock_theme({"theme_id": str(theme.id)}, db=session, email=user.email))["message"]
+            except HTTPException as e:
+                return e.detail
+
+    messages = await asyncio.gather(*(unlock() for _ in range(10)))
+
+    assert sorted(messages) == ["Theme already unlocked"] * 9 + ["Theme unlocked successfully"]
+    async with database.get_session() as session:
+        assert await session.scalar(select(func.count()).select_from(UserTheme)) == 1
+        assert await session.scalar(select(User.faith_coins)) == 70
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from apps.auth.router import parse_ratings_cursor, ratings_cursor, user_ratings_query
+from apps.requotes.models import RATING_DESCRIPTIONS, User, UserActivity
+
+pytestmark = pytest.mark.anyio
+
+
+def test_rating_description_is_selectable():
+    sql = str(user_ratings_query().compile(dialect=postgresql.dialect()))
+    assert "CASE users.rating" in sql
+
+
+async def test_pages_carry_descriptions_and_verse_counts(database):
+    rated_at = datetime(2025, 1, 1)
+    async with database.get_session() as session:
+        users = [
+            User(
+                user_name=f"user{rating}",
+                email=f"user{rating}@example.com",
+                password="x",
+                has_rated=True,
+                rating=rating,
+                rated_at=rated_at + timedelta(days=rating),
+            )
+            for rating in range(1, 6)
+        ]
+        session.add_all(users)
+        await session.flush()
+        session.add_all(
+            UserActivity(user_id=users[4].id, activity_type="verse_caught")
+            for _ in range(3)
+        )
+
+    async with database.get_session() as session:
+        first = (await session.execute(user_ratings_query(limit=2))).all()
+        # limit + 1 rows: the extra one only signals a next page
+        assert [row.rating for row in first] == [5, 4, 3]
+        assert first[0].rating_description == RATING_DESCRIPTIONS[5]
+        assert first[0].total_verses_caught == 3
+        assert first[1].total_verses_caught == 0
+
+        after = (first[1].rated_at, first[1].id)
+        rest = (await session.execute(user_ratings_query(after, limit=2))).all()
+        assert [row.rating_description for row in rest] == [RATING_DESCRIPTIONS[r] for r in (3, 2, 1)]
+
+
+async def test_users_rated_without_a_date_come_last(database):
+    async with database.get_session() as session:
+        users = [
+            User(
+                user_name=f"user{n}",
+                email=f"user{n}@example.com",
+                password="x",
+                has_rated=True,
+                rating=3,
+                rated_at=datetime(2025, 1, 1) + timedelta(days=n) if n < 3 else None,
+            )
+            for n in range(6)
+        ]
+        session.add_all(users)
+
+    pages, after = [], None
+    async with database.get_session() as session:
+        while True:
+            rows = (await session.execute(user_ratings_query(after, limit=2))).all()
+            pages.append([row.user_name for row in rows[:2]])
+            if len(rows) <= 2:
+                break
+            after = parse_ratings_cursor(ratings_cursor(rows[1].rated_at, rows[1].id))
+
+    undated = sorted(users[3:], key=lambda user: user.id, reverse=True)
+    assert pages == [
+        ["user2", "user1"],
+        ["user0", undated[0].user_name],
+        [user.user_name for user in undated[1:]],
+    ]
@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from apps.auth.constants import inspirational_references, inspirational_verses
+from apps.auth.verses import InspirationalVersePool
+from apps.requotes.models import Verse, Version
+
+pytestmark = pytest.mark.anyio
+
+
+class UnavailableSession:
+    async def execute(self, statement):
+        raise OperationalError("SELECT", {}, Exception("connection refused"))
+
+
+async def test_a_failed_load_is_retried_on_first_use(database):
+    pool = InspirationalVersePool(inspirational_verses)
+    with pytest.raises(OperationalError):
+        await pool.load(UnavailableSession())
+    assert not pool.loaded
+
+    async with database.get_session() as session:
+        version = Version(name="KJV")
+        session.add(version)
+        await session.flush()
+        session.add_all(
+            Verse(version_id=version.id, book=book, chapter=chapter, verse_number=verse_number, text=f"{book} text")
+            for book, chapter, verse_number in inspirational_references[:3]
+        )
+
+    async with database.get_session() as session:
+        await pool.ensure_loaded(session)
+    assert pool.loaded
+    assert len(pool) == 3
+
+    verse, _ = pool.pick("user", 300, now=0)
+    assert verse["text"] == f"{verse['book']} text"
+
+
+async def test_the_embedded_fallback_is_not_final(database):
+    pool = InspirationalVersePool(inspirational_verses)
+
+    # No Bible version seeded yet
+    async with database.get_session() as session:
+        await pool.ensure_loaded(session)
+    assert not pool.loaded
+    assert len(pool) == len(inspirational_verses)
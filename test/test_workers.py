@@ -0,0 +1,25 @@
+import pytest
+
+from core.workers import PeriodicWorker
+
+
+def test_workers_must_implement_interval_and_run_once():
+    class NoRunOnce(PeriodicWorker):
+        interval = 5
+
+    with pytest.raises(TypeError):
+        NoRunOnce()
+    with pytest.raises(TypeError):
+        PeriodicWorker()
+
+
+def test_worker_with_non_positive_interval_does_not_start():
+    class Disabled(PeriodicWorker):
+        interval = 0
+
+        async def run_once(self) -> int:
+            return 0
+
+    worker = Disabled()
+    worker.start()
+    assert worker._task is None